@@ -3,3 +3,7 @@ from .realization import Realization, Catchment_Area
 from .formulation import CatchmentFormulation, Formulation
 from .catchment import Catchment, FormulatableCatchment
 from .hydrolocation import HydroLocation, HydroLocationType, NWISLocation
+from .network import (EnsembleSimulation, Network, Partitioning, Simulation, partition_network, run_partitioned,
+                      simulate, simulate_ensemble)
+from .memoize import ResponseCache
+from .serialization import ObjectGraph
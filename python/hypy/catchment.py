@@ -2,6 +2,7 @@ import pandas as pd
 from .formulation import CatchmentFormulation
 from .nexus import Nexus
 from .realization import Realization
+from .serialization import deepcopy_linked, reduce_linked, set_slot_state, slot_state
 from typing import List, Optional, Tuple, Union
 
 Catchments_Collection = Union['Catchment', List['Catchment'], Tuple['Catchment', ...]]
@@ -100,6 +101,17 @@ class Catchment:
         self._conjoined_catchments = self._convert_collection_to_tuple(conjoined_catchments)
         self._realization = realization
 
+    def __copy__(self) -> 'Catchment':
+        # Shallow, so the copy keeps its links to the original objects, without flattening their graph
+        return set_slot_state(type(self).__new__(type(self)), slot_state(self))
+
+    def __deepcopy__(self, memo: dict) -> 'Catchment':
+        return deepcopy_linked(self, memo)
+
+    def __reduce__(self):
+        # Pickles the whole graph linked to this catchment, flattened rather than recursing along its links
+        return reduce_linked(self)
+
     @property
     def conjoined_catchments(self) -> Tuple['Catchment', ...]:
         """
@@ -1,5 +1,10 @@
+import copy
+import numpy as np
+
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Type, TYPE_CHECKING
+from typing import Any, Dict, Mapping, Optional, Type, TYPE_CHECKING
+
+from .serialization import deepcopy_linked, reduce_linked, set_slot_state, slot_state
 
 if TYPE_CHECKING:
     from .catchment import FormulatableCatchment
@@ -74,6 +79,16 @@ class Formulation(ABC):
     def __init__(self, formulation_id: str):
         self._id = formulation_id
 
+    def __copy__(self) -> 'Formulation':
+        return set_slot_state(type(self).__new__(type(self)), slot_state(self))
+
+    def __deepcopy__(self, memo: dict) -> 'Formulation':
+        return deepcopy_linked(self, memo)
+
+    def __reduce__(self):
+        # Formulations may be linked to a catchment, so are pickled within its flattened graph
+        return reduce_linked(self)
+
     @property
     def id(self) -> str:
         """
@@ -90,6 +105,97 @@ class Formulation(ABC):
     def get_response(self, input_flux: float, **kwargs) -> float:
         pass
 
+    def get_ensemble_response(self, input_flux: np.ndarray, member_params: Optional[Mapping[str, np.ndarray]] = None,
+                              **kwargs) -> np.ndarray:
+        """
+        Get the responses of several ensemble members at once.
+
+        The default implementation calls ::method:`get_response` for each member.  Any member parameters are applied
+        with ::method:`set_param_values` to a copy of this formulation, so this formulation is left unchanged.
+        Subtypes able to compute all members with array operations should override this.
+
+        Parameters
+        ----------
+        input_flux: np.ndarray
+            The input flux of each member.
+        member_params: Optional[Mapping[str, np.ndarray]]
+            Optional map of parameter names to the value of the parameter for each member, overriding this
+            formulation's own values.
+        kwargs
+            Any other arguments, as for ::method:`get_response`.
+
+        Returns
+        -------
+        np.ndarray
+            The response of each member.
+        """
+        if not member_params:
+            return np.fromiter((self.get_response(x, **kwargs) for x in input_flux), dtype=np.float64,
+                               count=len(input_flux))
+        member = copy.copy(self)
+        outputs = np.empty(len(input_flux), dtype=np.float64)
+        for m, x in enumerate(input_flux):
+            member.set_param_values({name: values[m] for name, values in member_params.items()})
+            outputs[m] = member.get_response(x, **kwargs)
+        return outputs
+
+    @property
+    def is_deterministic(self) -> bool:
+        """
+        Whether ::method:`get_response` always returns the same value for the same arguments and
+        ::attribute:`param_values`, so that its responses may be memoized.
+
+        Subtypes that are deterministic must override this, along with ::attribute:`param_values`.
+
+        Returns
+        -------
+        bool
+            Whether responses are deterministic, which is ``False`` unless overridden.
+        """
+        return False
+
+    @property
+    def param_values(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the current values of this formulation's parameters, which identify its responses when memoized.
+
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            A map of parameter names to their current values, or ``None`` if the formulation type does not expose
+            them, in which case its responses are not memoized.
+
+        See Also
+        -------
+        ::attribute:`is_deterministic`
+        """
+        return None
+
+    def set_param_values(self, values: Mapping[str, Any]):
+        """
+        Set the values of some of this formulation's parameters.
+
+        The default implementation sets the attribute named after each parameter, which suits formulation types whose
+        ::attribute:`param_values` are read from attributes of the same names.  Other types must override this to
+        support parameter ensembles.
+
+        Parameters
+        ----------
+        values: Mapping[str, Any]
+            A map of parameter names to their new values.
+
+        Raises
+        ------
+        ValueError
+            If any name is not one of this formulation's ::attribute:`param_values`.
+        """
+        known = self.param_values or {}
+        unknown = [name for name in values if name not in known]
+        if unknown:
+            raise ValueError("{} has no parameter(s) {}".format(type(self).__name__, unknown))
+        for name, value in values.items():
+            setattr(self, name, value)
+
     @property
     @abstractmethod
     def required_params(self) -> Dict[str, Type]:
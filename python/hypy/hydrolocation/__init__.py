@@ -1,2 +1,2 @@
 from .hydrolocation import HydroLocation, HydroLocationType
-from .nwis_location import NWISLocation
+from .nwis_location import NWISLocation, gather_data, iter_data
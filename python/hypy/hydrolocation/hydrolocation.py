@@ -3,6 +3,8 @@ from __future__ import annotations
 from enum import Enum, auto
 from typing import TYPE_CHECKING, Tuple
 
+from ..serialization import set_slot_state, slot_state
+
 if TYPE_CHECKING:
     from shapely.geometry import Point
 
@@ -66,6 +68,12 @@ class HydroLocation:
         self._referenced_position = referenced_position
         self._realized_nexus = realized_nexus
 
+    def __getstate__(self):
+        return slot_state(self)
+
+    def __setstate__(self, state):
+        set_slot_state(self, state)
+
     @property
     def realized_nexus(self) -> str:
         """
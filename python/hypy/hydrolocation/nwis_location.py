@@ -1,7 +1,14 @@
 from __future__ import annotations
 
-from typing import Tuple, TYPE_CHECKING
-from hydrotools import nwis_client
+import aiohttp
+import asyncio
+import gzip
+import json
+import pandas as pd
+
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
 
 from hypy.hydrolocation import HydroLocation, HydroLocationType
 
@@ -11,6 +18,12 @@ if TYPE_CHECKING:
     from datetime import datetime
     from shapely.geometry import Point
 
+# NWIS instantaneous values service, requested directly by both the blocking and the asynchronous methods
+_IV_URL = "https://waterservices.usgs.gov/nwis/iv/"
+_IV_HEADERS = {"Accept-Encoding": "gzip"}
+_IV_COLUMNS = ["value_time", "variable_name", "usgs_site_code", "measurement_unit", "value", "qualifiers", "series"]
+_IV_CATEGORIES = ["variable_name", "usgs_site_code", "measurement_unit", "qualifiers", "series"]
+
 class NWISLocation(HydroLocation):
     """
     An NWIS subclass of HydroLocation
@@ -51,6 +64,224 @@ class NWISLocation(HydroLocation):
                  end: str | datetime | datetime64 | Timestamp | None = None
                  ) -> DataFrame:
         """
-        Get observation data from NWIS
+        Get observation data from NWIS.
+
+        Parameters
+        ----------
+        start:
+            Optional start of the observation period.
+        end:
+            Optional end of the observation period, which requires a start.
+
+        Returns
+        -------
+        DataFrame
+            The observation data, in the canonical layout of the NWIS client, which is empty if there is none.
+
+        Raises
+        ------
+        ValueError
+            If an end is given without a start.
+        """
+        request = Request("{}?{}".format(_IV_URL, urlencode(_iv_params(self._station_id, start, end))),
+                          headers=_IV_HEADERS)
+        with urlopen(request) as response:
+            body = response.read()
+            if response.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+        return _iv_frame(json.loads(body))
+
+    async def get_data_async(self,
+                             start: str | datetime | datetime64 | Timestamp | None = None,
+                             end: str | datetime | datetime64 | Timestamp | None = None,
+                             session: Optional[aiohttp.ClientSession] = None
+                             ) -> DataFrame:
+        """
+        Get observation data from NWIS without blocking the running event loop.
+
+        The request is made on the running loop through ``session`` (or a session opened for the call), so it can be
+        cancelled like any other awaitable.  The request is validated and its response parsed as by ::method:`get_data`.
+
+        Parameters
+        ----------
+        start:
+            Optional start of the observation period.
+        end:
+            Optional end of the observation period, which requires a start.
+        session: Optional[aiohttp.ClientSession]
+            The session to make the request with, or ``None`` to open one for the call.
+
+        Returns
+        -------
+        DataFrame
+            The observation data.
+
+        Raises
+        ------
+        ValueError
+            If an end is given without a start.
         """
-        return nwis_client.IVDataService().get(self._station_id, startDT=start, endDT=end)
+        params = _iv_params(self._station_id, start, end)
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.get_data_async(start, end, session)
+        async with session.get(_IV_URL, params=params, headers=_IV_HEADERS) as response:
+            response.raise_for_status()
+            return _iv_frame(await response.json(content_type=None))
+
+
+def _iv_date(date: str | datetime | datetime64 | Timestamp) -> str:
+    """
+    Format a date for an NWIS request, treating dates without a time zone as UTC.
+    """
+    date = pd.Timestamp(date)
+    date = date.tz_localize("UTC") if date.tz is None else date.tz_convert("UTC")
+    return date.strftime("%Y-%m-%dT%H:%M%z")
+
+
+def _iv_params(station_id: str,
+               start: str | datetime | datetime64 | Timestamp | None,
+               end: str | datetime | datetime64 | Timestamp | None) -> Dict[str, str]:
+    """
+    Query parameters of an NWIS instantaneous streamflow request for a single station, validating the period.
+    """
+    if end is not None and start is None:
+        raise ValueError("An end of the observation period requires a start")
+    params = {"sites": station_id, "parameterCd": "00060", "siteStatus": "all", "format": "json"}
+    if start is not None:
+        params["startDT"] = _iv_date(start)
+    if end is not None:
+        params["endDT"] = _iv_date(end)
+    return params
+
+
+def _iv_frame(payload: Dict[str, Any]) -> DataFrame:
+    """
+    Flatten an NWIS instantaneous values response into the canonical data frame layout of the NWIS client.
+    """
+    rows = []
+    for series in payload["value"]["timeSeries"]:
+        site = series["sourceInfo"]["siteCode"][0]["value"]
+        variable = series["variable"]["variableName"].lower().split(",")[0]
+        unit = series["variable"]["unit"]["unitCode"]
+        for index, values in enumerate(series["values"]):
+            rows.extend((value["dateTime"], variable, site, unit, value["value"], str(value["qualifiers"]), str(index))
+                        for value in values["value"])
+    if not rows:
+        frame = pd.DataFrame({"value_time": pd.Series(dtype="datetime64[ns]"), "value": pd.Series(dtype="float32")},
+                             columns=_IV_COLUMNS)
+        frame[_IV_CATEGORIES] = frame[_IV_CATEGORIES].astype("category")
+        return frame
+    frame = pd.DataFrame(rows, columns=_IV_COLUMNS)
+    frame["value_time"] = pd.to_datetime(frame["value_time"], utc=True).dt.tz_localize(None)
+    frame["value"] = pd.to_numeric(frame["value"], downcast="float")
+    frame[_IV_CATEGORIES] = frame[_IV_CATEGORIES].astype("category")
+    return frame.sort_values(["usgs_site_code", "measurement_unit", "value_time"], ignore_index=True)
+
+
+async def iter_data(locations: Iterable[NWISLocation],
+                    start: str | datetime | datetime64 | Timestamp | None = None,
+                    end: str | datetime | datetime64 | Timestamp | None = None,
+                    max_concurrency: int = 4,
+                    session: Optional[aiohttp.ClientSession] = None
+                    ) -> AsyncIterator[Tuple[NWISLocation, DataFrame]]:
+    """
+    Asynchronously get observation data for many NWIS locations, yielding each location's data as it arrives.
+
+    At most ``max_concurrency`` requests are in flight at a time, and a new request is only started once a result has
+    been consumed, so a slow consumer throttles retrieval rather than accumulating results in memory.  Closing the
+    iterator or cancelling the consuming task cancels any requests in flight.
+
+    Parameters
+    ----------
+    locations: Iterable[NWISLocation]
+        The locations to get data for.
+    start:
+        Optional start of the observation period.
+    end:
+        Optional end of the observation period.
+    max_concurrency: int
+        The maximum number of requests in flight at once.
+    session: Optional[aiohttp.ClientSession]
+        The session to make requests with, or ``None`` to open one shared by all the requests.
+
+    Yields
+    ------
+    Tuple[NWISLocation, DataFrame]
+        Each location and its observation data, in order of completion.
+    """
+    if max_concurrency < 1:
+        raise ValueError("Maximum concurrency must be positive")
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=max_concurrency))
+    remaining = iter(locations)
+    pending: Dict[asyncio.Task, NWISLocation] = {}
+
+    def fill():
+        for location in remaining:
+            pending[asyncio.ensure_future(location.get_data_async(start, end, session=session))] = location
+            if len(pending) >= max_concurrency:
+                break
+
+    try:
+        fill()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield pending.pop(task), task.result()
+            fill()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if own_session:
+            await session.close()
+
+
+async def gather_data(locations: Iterable[NWISLocation],
+                      start: str | datetime | datetime64 | Timestamp | None = None,
+                      end: str | datetime | datetime64 | Timestamp | None = None,
+                      max_concurrency: int = 4,
+                      session: Optional[aiohttp.ClientSession] = None
+                      ) -> List[DataFrame]:
+    """
+    Asynchronously get observation data for many NWIS locations, with bounded concurrency.
+
+    Cancelling the awaiting task cancels all outstanding requests.
+
+    Parameters
+    ----------
+    locations: Iterable[NWISLocation]
+        The locations to get data for.
+    start:
+        Optional start of the observation period.
+    end:
+        Optional end of the observation period.
+    max_concurrency: int
+        The maximum number of requests in flight at once.
+    session: Optional[aiohttp.ClientSession]
+        The session to make requests with, or ``None`` to open one shared by all the requests.
+
+    Returns
+    -------
+    List[DataFrame]
+        The observation data for each location, in the same order as ``locations``.
+
+    See Also
+    -------
+    ::function:`iter_data`
+    """
+    if max_concurrency < 1:
+        raise ValueError("Maximum concurrency must be positive")
+    if session is None:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=max_concurrency)) as session:
+            return await gather_data(locations, start, end, max_concurrency, session)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(location: NWISLocation) -> DataFrame:
+        async with semaphore:
+            return await location.get_data_async(start, end, session=session)
+
+    return list(await asyncio.gather(*(fetch(location) for location in locations)))
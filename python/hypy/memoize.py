@@ -0,0 +1,313 @@
+"""
+Opt-in memoization of the responses of deterministic formulations.
+
+Responses are memoized per sub-basin and timestep, keyed on a digest of the parameters of every formulation in the
+sub-basin, taken once per run, and the input fluxes of its catchments, so calibration and ensemble reruns skip every
+sub-basin whose parameters and inputs are unchanged, and only recompute the others.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import weakref
+import numpy as np
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .formulation import Formulation
+    from .network import Network
+
+
+def parameter_digest(formulation: Formulation) -> Optional[bytes]:
+    """
+    Compute a digest identifying a formulation's type and current parameter values.
+
+    Parameters
+    ----------
+    formulation: Formulation
+        The formulation.
+
+    Returns
+    -------
+    Optional[bytes]
+        The digest, or ``None`` if the formulation does not expose its ::attribute:`Formulation.param_values`.
+    """
+    params = formulation.param_values
+    if params is None:
+        return None
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(formulation.get_formulation_type().encode())
+    digest.update(pickle.dumps(sorted(params.items()), protocol=4))
+    return digest.digest()
+
+
+class _RunPlan:
+    """
+    How the responses of a set of catchments are computed during a run, with the parameter digest of each sub-basin
+    taken at the start of the run.
+    """
+
+    __slots__ = ["formulations", "passed", "direct", "members", "bounds", "digests"]
+
+    def __init__(self, network: Network, catchments: np.ndarray, sub_basins: np.ndarray):
+        self.formulations = [getattr(network.catchment(int(c)), "formulation", None) for c in catchments]
+        digests = [None if f is None or not f.is_deterministic else parameter_digest(f) for f in self.formulations]
+        passed = np.fromiter((f is None for f in self.formulations), dtype=bool, count=catchments.size)
+        memoized = np.fromiter((d is not None for d in digests), dtype=bool, count=catchments.size)
+        self.passed = np.flatnonzero(passed)
+        self.direct = np.flatnonzero(~passed & ~memoized)
+        # Memoized catchments ordered by sub-basin, with each sub-basin's members between consecutive bounds
+        positions = np.flatnonzero(memoized)
+        labels = sub_basins[catchments[positions]]
+        order = np.argsort(labels, kind="stable")
+        self.members = positions[order]
+        self.bounds = np.flatnonzero(np.diff(labels[order], prepend=-1, append=-1))
+        self.digests = [hashlib.blake2b(b"".join(digests[p] for p in self.members[start:end].tolist()),
+                                        digest_size=20).digest()
+                        for start, end in zip(self.bounds[:-1].tolist(), self.bounds[1:].tolist())]
+
+
+class ResponseCache:
+    """
+    Least-recently-used cache of the responses of sub-basins of deterministic formulations, optionally persisted to an
+    on-disk SQLite database.
+
+    The catchments given to ::method:`responses` are grouped into sub-basins of about ``sub_basin_size`` catchments
+    (see ::function:`partition_network`), and the responses of each sub-basin at a timestep are memoized together, so an
+    unchanged sub-basin is skipped with a single lookup.  A catchment's formulation is memoized only if it is
+    deterministic and exposes its ::attribute:`Formulation.param_values`.  Parameter values are read once per run, at
+    its first timestep (step ``0``), so they must not change during a run, and memoized responses must not depend on
+    the timestep.
+
+    At most ``max_entries`` sub-basin responses are held in memory.  When a database path is given, every computed
+    response is also written to it (in batches, and on ::method:`flush` or ::method:`close`), and responses evicted
+    from memory or computed in earlier sessions are read back from it on demand.  Each thread and process opens its own
+    connection to the database, and processes forked from the one that created the cache, such as the workers of
+    ::function:`run_partitioned`, read from it without writing to it.  The in-memory entries, run plans and hit counts
+    are guarded by a lock, so a cache can be shared by the threads of one process.
+    """
+
+    __slots__ = ["_entries", "_max_entries", "_sub_basin_size", "_path", "_pid", "_local", "_lock", "_connections",
+                 "_pending", "_sub_basins", "_plans", "_hits", "_misses"]
+
+    _BATCH_SIZE = 10000
+
+    def __init__(self, max_entries: int = 1000000, path: Optional[str | Path] = None, sub_basin_size: int = 64):
+        """
+        Initialize an empty cache.
+
+        Parameters
+        ----------
+        max_entries: int
+            The maximum number of sub-basin responses held in memory.
+        path: Optional[str | Path]
+            The path of a SQLite database to persist responses to, which is created if it does not exist, or ``None``
+            to only hold responses in memory.
+        sub_basin_size: int
+            The approximate number of catchments of the sub-basins whose responses are memoized together.
+        """
+        if max_entries < 1:
+            raise ValueError("Response cache must allow at least one entry")
+        if sub_basin_size < 1:
+            raise ValueError("Sub-basins must have at least one catchment")
+        self._entries: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._max_entries = max_entries
+        self._sub_basin_size = sub_basin_size
+        self._path = None if path is None else str(path)
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._pending: List[Tuple[bytes, bytes]] = []
+        # Keyed weakly by network, so the plans of a collected network are never taken for those of a new one
+        self._sub_basins: weakref.WeakKeyDictionary[Network, Tuple[int, np.ndarray]] = weakref.WeakKeyDictionary()
+        self._plans: weakref.WeakKeyDictionary[Network, Dict[bytes, _RunPlan]] = weakref.WeakKeyDictionary()
+        self._hits = 0
+        self._misses = 0
+        if self._path is not None:
+            self._database()
+
+    def __contains__(self, key: bytes) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def _database(self) -> Optional[sqlite3.Connection]:
+        """
+        Get the calling thread's connection to the database, opening it first if needed.
+        """
+        if self._path is None:
+            return None
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            # Connections cannot be shared with forked processes, so those inherited are left untouched
+            connection = sqlite3.connect(self._path, check_same_thread=False)
+            connection.execute("CREATE TABLE IF NOT EXISTS sub_basin_responses (key BLOB PRIMARY KEY, value BLOB)")
+            self._local.connection, self._local.pid = connection, os.getpid()
+            if self._pid == os.getpid():
+                with self._lock:
+                    self._connections.append(connection)
+        return connection
+
+    def close(self):
+        """
+        Write any pending responses to the database, if any, and close every connection to it.
+        """
+        self.flush()
+        if self._pid == os.getpid():
+            with self._lock:
+                for connection in self._connections:
+                    connection.close()
+                self._connections.clear()
+            self._local = threading.local()
+
+    def flush(self):
+        """
+        Write any pending responses to the database, if any.
+        """
+        if self._path is None or self._pid != os.getpid():
+            return
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending:
+            with self._database() as connection:
+                connection.executemany("INSERT OR REPLACE INTO sub_basin_responses VALUES (?, ?)", pending)
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """
+        Get memoized responses.
+
+        Parameters
+        ----------
+        key: bytes
+            The response key.
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            The responses, or ``None`` if they are not memoized.
+        """
+        with self._lock:
+            values = self._entries.get(key)
+            if values is not None:
+                self._entries.move_to_end(key)
+                return values
+        connection = self._database()
+        if connection is not None:
+            row = connection.execute("SELECT value FROM sub_basin_responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                values = np.frombuffer(row[0], dtype=np.float64)
+                self._remember(key, values)
+                return values
+        return None
+
+    def put(self, key: bytes, values: np.ndarray):
+        """
+        Memoize responses.
+
+        Parameters
+        ----------
+        key: bytes
+            The response key.
+        values: np.ndarray
+            The responses.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self._remember(key, values)
+        if self._path is not None and self._pid == os.getpid():
+            with self._lock:
+                self._pending.append((key, values.tobytes()))
+                full = len(self._pending) >= self._BATCH_SIZE
+            if full:
+                self.flush()
+
+    def _remember(self, key: bytes, values: np.ndarray):
+        with self._lock:
+            self._entries[key] = values
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def _plan(self, network: Network, catchments: np.ndarray, step: int) -> _RunPlan:
+        key = hashlib.blake2b(catchments.tobytes(), digest_size=20).digest()
+        with self._lock:
+            plans = self._plans.setdefault(network, {})
+            plan = plans.get(key)
+            if plan is None or step == 0:
+                version, sub_basins = self._sub_basins.get(network, (None, None))
+                if version != network.topology_version:
+                    from .network.partition import partition_network
+                    num_sub_basins = max(1, -(-network.num_catchments // self._sub_basin_size))
+                    sub_basins = partition_network(network, num_sub_basins).labels
+                    self._sub_basins[network] = (network.topology_version, sub_basins)
+                # A run starts at its first timestep, discarding the plans of the network's earlier runs
+                if step == 0:
+                    plans.clear()
+                plan = plans[key] = _RunPlan(network, catchments, sub_basins)
+        return plan
+
+    def responses(self, network: Network, catchments: np.ndarray, inputs: np.ndarray, step: int) -> np.ndarray:
+        """
+        Compute catchment outflows using the formulation of each catchment, skipping every sub-basin whose responses
+        to the same inputs are memoized.
+
+        Parameters
+        ----------
+        network: Network
+            The network, which must retain its catchment objects.
+        catchments: np.ndarray
+            The indices of the catchments to compute.
+        inputs: np.ndarray
+            The total input flux of each catchment for this timestep.
+        step: int
+            The timestep index.
+
+        Returns
+        -------
+        np.ndarray
+            The outflow of each catchment for this timestep.
+
+        See Also
+        -------
+        ::function:`formulation_response`
+        """
+        plan = self._plan(network, catchments, step)
+        inputs = np.asarray(inputs, dtype=np.float64)
+        outputs = np.empty(catchments.size, dtype=np.float64)
+        outputs[plan.passed] = inputs[plan.passed]
+        for i in plan.direct.tolist():
+            outputs[i] = plan.formulations[i].get_response(inputs[i], step=step)
+        for start, end, digest in zip(plan.bounds[:-1].tolist(), plan.bounds[1:].tolist(), plan.digests):
+            members = plan.members[start:end]
+            values = inputs[members]
+            key = hashlib.blake2b(values.tobytes(), digest_size=20, key=digest).digest()
+            responses = self.get(key)
+            with self._lock:
+                if responses is None:
+                    self._misses += 1
+                else:
+                    self._hits += 1
+            if responses is None:
+                responses = np.fromiter((plan.formulations[i].get_response(x, step=step)
+                                         for i, x in zip(members.tolist(), values.tolist())),
+                                        dtype=np.float64, count=members.size)
+                self.put(key, responses)
+            outputs[members] = responses
+        return outputs
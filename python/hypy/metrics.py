@@ -0,0 +1,346 @@
+"""
+Skill metrics comparing simulated and observed values for many locations at once.
+
+All metrics work on time by location arrays, reducing over the time axis to give one value per location.  Entries
+where either the simulated or observed value is ``NaN``, or that are excluded by an optional mask, are ignored.  Every
+metric is computed from the same small set of per-location sufficient statistics (count, means, and centered second
+moments), which is what allows the rolling window and chunk-by-chunk streaming forms.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from typing import Callable, Dict, Optional, Tuple
+
+
+# Per-location sufficient statistics: count, simulated mean, observed mean, simulated and observed sums of squared
+# deviations, and sum of co-deviations
+_Moments = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _valid(simulated: np.ndarray, observed: np.ndarray, mask: Optional[np.ndarray]) -> np.ndarray:
+    if simulated.shape != observed.shape:
+        raise ValueError("Simulated and observed arrays must have the same shape")
+    valid = ~(np.isnan(simulated) | np.isnan(observed))
+    return valid if mask is None else valid & mask
+
+
+def _moments(simulated: np.ndarray, observed: np.ndarray, mask: Optional[np.ndarray]) -> _Moments:
+    simulated = np.asarray(simulated, dtype=np.float64)
+    observed = np.asarray(observed, dtype=np.float64)
+    valid = _valid(simulated, observed, mask)
+    n = valid.sum(axis=0).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_s = np.where(valid, simulated, 0.0).sum(axis=0) / n
+        mean_o = np.where(valid, observed, 0.0).sum(axis=0) / n
+    dev_s = np.where(valid, simulated - mean_s, 0.0)
+    dev_o = np.where(valid, observed - mean_o, 0.0)
+    return n, mean_s, mean_o, (dev_s * dev_s).sum(axis=0), (dev_o * dev_o).sum(axis=0), (dev_s * dev_o).sum(axis=0)
+
+
+def _merge(a: _Moments, b: _Moments) -> _Moments:
+    """
+    Combine the sufficient statistics of two disjoint sets of values, using the pairwise update of Chan et al.
+    """
+    n_a, mean_s_a, mean_o_a, m2_s_a, m2_o_a, c_a = a
+    n_b, mean_s_b, mean_o_b, m2_s_b, m2_o_b, c_b = b
+    n = n_a + n_b
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = np.where(n > 0, n_b / n, 0.0)
+    delta_s = np.where(n_b > 0, np.nan_to_num(mean_s_b) - np.nan_to_num(mean_s_a), 0.0)
+    delta_o = np.where(n_b > 0, np.nan_to_num(mean_o_b) - np.nan_to_num(mean_o_a), 0.0)
+    mean_s = np.where(n > 0, np.nan_to_num(mean_s_a) + delta_s * weight, np.nan)
+    mean_o = np.where(n > 0, np.nan_to_num(mean_o_a) + delta_o * weight, np.nan)
+    factor = n_a * weight
+    return (n, mean_s, mean_o, m2_s_a + m2_s_b + delta_s * delta_s * factor,
+            m2_o_a + m2_o_b + delta_o * delta_o * factor, c_a + c_b + delta_s * delta_o * factor)
+
+
+def _bias(moments: _Moments) -> np.ndarray:
+    return moments[1] - moments[2]
+
+
+def _kge(moments: _Moments) -> np.ndarray:
+    _, mean_s, mean_o, m2_s, m2_o, c = moments
+    r = c / np.sqrt(m2_s * m2_o)
+    alpha = np.sqrt(m2_s / m2_o)
+    beta = mean_s / mean_o
+    return 1.0 - np.sqrt((r - 1.0) ** 2 + (alpha - 1.0) ** 2 + (beta - 1.0) ** 2)
+
+
+def _nse(moments: _Moments) -> np.ndarray:
+    return 1.0 - _sse(moments) / moments[4]
+
+
+def _pbias(moments: _Moments) -> np.ndarray:
+    return 100.0 * (moments[1] - moments[2]) / moments[2]
+
+
+def _rmse(moments: _Moments) -> np.ndarray:
+    return np.sqrt(_sse(moments) / moments[0])
+
+
+def _sse(moments: _Moments) -> np.ndarray:
+    n, mean_s, mean_o, m2_s, m2_o, c = moments
+    return m2_s + m2_o - 2.0 * c + n * (mean_s - mean_o) ** 2
+
+
+METRICS: Dict[str, Callable[[_Moments], np.ndarray]] = {
+    "bias": _bias,
+    "kge": _kge,
+    "nse": _nse,
+    "pbias": _pbias,
+    "rmse": _rmse,
+}
+
+
+def _compute(metric: str, moments: _Moments) -> np.ndarray:
+    try:
+        function = METRICS[metric]
+    except KeyError:
+        raise ValueError("Unsupported metric {}".format(metric)) from None
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = function(moments)
+    return np.where(moments[0] > 0, values, np.nan)
+
+
+def bias(simulated: np.ndarray, observed: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Mean error of simulated values relative to observed values, per location.
+
+    Parameters
+    ----------
+    simulated: np.ndarray
+        Time by location array of simulated values.
+    observed: np.ndarray
+        Time by location array of observed values.
+    mask: Optional[np.ndarray]
+        Optional time by location boolean array of the entries to include.
+
+    Returns
+    -------
+    np.ndarray
+        The mean error for each location.
+    """
+    return _compute("bias", _moments(simulated, observed, mask))
+
+
+def kge(simulated: np.ndarray, observed: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Kling-Gupta efficiency of simulated values relative to observed values, per location.
+
+    Parameters
+    ----------
+    simulated: np.ndarray
+        Time by location array of simulated values.
+    observed: np.ndarray
+        Time by location array of observed values.
+    mask: Optional[np.ndarray]
+        Optional time by location boolean array of the entries to include.
+
+    Returns
+    -------
+    np.ndarray
+        The Kling-Gupta efficiency for each location.
+    """
+    return _compute("kge", _moments(simulated, observed, mask))
+
+
+def nse(simulated: np.ndarray, observed: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Nash-Sutcliffe efficiency of simulated values relative to observed values, per location.
+
+    Parameters
+    ----------
+    simulated: np.ndarray
+        Time by location array of simulated values.
+    observed: np.ndarray
+        Time by location array of observed values.
+    mask: Optional[np.ndarray]
+        Optional time by location boolean array of the entries to include.
+
+    Returns
+    -------
+    np.ndarray
+        The Nash-Sutcliffe efficiency for each location.
+    """
+    return _compute("nse", _moments(simulated, observed, mask))
+
+
+def pbias(simulated: np.ndarray, observed: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Percent bias of simulated values relative to observed values, per location.
+
+    Parameters
+    ----------
+    simulated: np.ndarray
+        Time by location array of simulated values.
+    observed: np.ndarray
+        Time by location array of observed values.
+    mask: Optional[np.ndarray]
+        Optional time by location boolean array of the entries to include.
+
+    Returns
+    -------
+    np.ndarray
+        The percent bias for each location.
+    """
+    return _compute("pbias", _moments(simulated, observed, mask))
+
+
+def rmse(simulated: np.ndarray, observed: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Root mean squared error of simulated values relative to observed values, per location.
+
+    Parameters
+    ----------
+    simulated: np.ndarray
+        Time by location array of simulated values.
+    observed: np.ndarray
+        Time by location array of observed values.
+    mask: Optional[np.ndarray]
+        Optional time by location boolean array of the entries to include.
+
+    Returns
+    -------
+    np.ndarray
+        The root mean squared error for each location.
+    """
+    return _compute("rmse", _moments(simulated, observed, mask))
+
+
+def rolling(metric: str, simulated: np.ndarray, observed: np.ndarray, window: int,
+            mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Compute a metric over every rolling window of consecutive timesteps, for all locations at once.
+
+    Windowed sums are taken as differences of cumulative sums over the time axis, so the cost does not depend on the
+    window length.  Values are first shifted by each location's mean observed value to limit loss of precision.
+
+    Parameters
+    ----------
+    metric: str
+        The name of the metric (one of the keys of ::attribute:`METRICS`).
+    simulated: np.ndarray
+        Time by location array of simulated values.
+    observed: np.ndarray
+        Time by location array of observed values.
+    window: int
+        The number of timesteps in each window.
+    mask: Optional[np.ndarray]
+        Optional time by location boolean array of the entries to include.
+
+    Returns
+    -------
+    np.ndarray
+        Array with the metric for the window ending at each timestep from ``window - 1`` on, for each location.
+    """
+    simulated = np.asarray(simulated, dtype=np.float64)
+    observed = np.asarray(observed, dtype=np.float64)
+    if window < 1 or window > simulated.shape[0]:
+        raise ValueError("Window must be between 1 and the number of timesteps")
+    valid = _valid(simulated, observed, mask)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shift = np.nan_to_num(np.where(valid, observed, 0.0).sum(axis=0) / valid.sum(axis=0))
+    s = np.where(valid, simulated - shift, 0.0)
+    o = np.where(valid, observed - shift, 0.0)
+
+    def windowed(values: np.ndarray) -> np.ndarray:
+        totals = np.cumsum(values, axis=0)
+        return np.concatenate((totals[window - 1:window], totals[window:] - totals[:-window]))
+
+    n = windowed(valid.astype(np.float64))
+    sum_s, sum_o = windowed(s), windowed(o)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_s, mean_o = sum_s / n, sum_o / n
+        moments = (n, mean_s + shift, mean_o + shift,
+                   np.maximum(windowed(s * s) - sum_s * mean_s, 0.0),
+                   np.maximum(windowed(o * o) - sum_o * mean_o, 0.0),
+                   windowed(s * o) - sum_s * mean_o)
+    return _compute(metric, moments)
+
+
+class MetricAccumulator:
+    """
+    Streaming accumulator of skill metrics for many locations, fed with consecutive chunks of timesteps.
+
+    Only the per-location sufficient statistics are retained between chunks, so memory use does not depend on the
+    number of timesteps.  Chunks are combined with a numerically stable pairwise update, so results match computing
+    over all timesteps at once.
+    """
+
+    __slots__ = ["_moments"]
+
+    def __init__(self):
+        self._moments: Optional[_Moments] = None
+
+    @property
+    def count(self) -> Optional[np.ndarray]:
+        """
+        The number of valid timesteps accumulated for each location, or ``None`` if nothing has been accumulated.
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            The number of valid timesteps accumulated for each location.
+        """
+        return None if self._moments is None else self._moments[0]
+
+    def compute(self, metric: str) -> np.ndarray:
+        """
+        Compute a metric over everything accumulated so far.
+
+        Parameters
+        ----------
+        metric: str
+            The name of the metric (one of the keys of ::attribute:`METRICS`).
+
+        Returns
+        -------
+        np.ndarray
+            The metric value for each location.
+        """
+        if self._moments is None:
+            raise RuntimeError("No values have been accumulated")
+        return _compute(metric, self._moments)
+
+    def merge(self, other: MetricAccumulator) -> MetricAccumulator:
+        """
+        Merge the statistics accumulated by another accumulator (e.g., for another span of time) into this one.
+
+        Parameters
+        ----------
+        other: MetricAccumulator
+            The other accumulator, for the same locations.
+
+        Returns
+        -------
+        MetricAccumulator
+            This instance.
+        """
+        if other._moments is not None:
+            self._moments = other._moments if self._moments is None else _merge(self._moments, other._moments)
+        return self
+
+    def update(self, simulated: np.ndarray, observed: np.ndarray,
+               mask: Optional[np.ndarray] = None) -> MetricAccumulator:
+        """
+        Accumulate a chunk of timesteps.
+
+        Parameters
+        ----------
+        simulated: np.ndarray
+            Time by location array of simulated values for the chunk.
+        observed: np.ndarray
+            Time by location array of observed values for the chunk.
+        mask: Optional[np.ndarray]
+            Optional time by location boolean array of the entries of the chunk to include.
+
+        Returns
+        -------
+        MetricAccumulator
+            This instance.
+        """
+        moments = _moments(simulated, observed, mask)
+        self._moments = moments if self._moments is None else _merge(self._moments, moments)
+        return self
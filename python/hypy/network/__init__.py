@@ -0,0 +1,14 @@
+from .network import Network
+from .partition import Partitioning, formulation_weights, partition_network, run_partitioned
+from .simulation import (EnsembleSimulation, NexusTransfer, Simulation, formulation_ensemble_response,
+                         formulation_response, simulate, simulate_ensemble)
+from .observations import AlignedObservations, align_observations
+from .validation import ValidationCheck, ValidationError, ValidationReport, validate
+from .realization_index import RealizationIndex
+from .conjoined import ConjoinedIndex
+from .forcing import ArrayForcing, ForcingProvider, NetCDFForcing, ParquetForcing, prefetch
+from .incremental import IncrementalSimulation
+from .shared import SharedNetwork
+from .paths import NexusTree, downstream_paths
+from .gauges import GaugeCoverage
+from .lazy import LazyCatchment, LazyNetwork, LazyNexus
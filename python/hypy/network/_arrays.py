@@ -0,0 +1,55 @@
+import numpy as np
+
+from typing import Tuple
+
+
+def _csr(keys: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Group the positions of ``keys`` by key value into compressed sparse row form.
+
+    Negative keys are treated as "no key" and left out of the grouping.
+
+    Parameters
+    ----------
+    keys: np.ndarray
+        Integer key for each position.
+    size: int
+        The number of distinct groups (i.e., one more than the largest possible key).
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The ``offsets`` array (length ``size + 1``) and the ``indices`` array, such that the positions having key ``k``
+        are ``indices[offsets[k]:offsets[k + 1]]``.
+    """
+    valid = np.flatnonzero(keys >= 0)
+    counts = np.bincount(keys[valid], minlength=size)
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    indices = valid[np.argsort(keys[valid], kind="stable")]
+    return offsets, indices
+
+
+def _csr_gather(offsets: np.ndarray, indices: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gather the entries of several CSR rows at once, without a Python-level loop over the rows.
+
+    Parameters
+    ----------
+    offsets: np.ndarray
+        CSR offsets array.
+    indices: np.ndarray
+        CSR indices array.
+    rows: np.ndarray
+        The rows to gather.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The position within ``rows`` each gathered entry came from, and the gathered entries themselves.
+    """
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    owner = np.repeat(np.arange(rows.size), lengths)
+    positions = np.arange(owner.size) - np.repeat(np.cumsum(lengths) - lengths, lengths) + starts[owner]
+    return owner, indices[positions]
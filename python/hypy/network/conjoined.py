@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from typing import TYPE_CHECKING
+
+from ._arrays import _csr
+
+if TYPE_CHECKING:
+    from .network import Network
+
+
+def _components(n: int, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Find the connected components of an undirected graph, as the smallest node index of each node's component.
+
+    This is a vectorized union-find: every pass hooks the larger root of each link onto the smaller one, then fully
+    compresses paths by pointer jumping, until every link joins nodes with the same root.
+    """
+    parent = np.arange(n, dtype=np.int64)
+    while True:
+        root_first, root_second = parent[first], parent[second]
+        differ = root_first != root_second
+        if not differ.any():
+            return parent
+        low = np.minimum(root_first[differ], root_second[differ])
+        high = np.maximum(root_first[differ], root_second[differ])
+        np.minimum.at(parent, high, low)
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+
+class ConjoinedIndex:
+    """
+    Index of the groups of catchments connected, directly or transitively, by HY_Features conjoint relationships.
+
+    Groups are numbered contiguously from ``0`` in order of their lowest catchment index, and catchments without
+    conjoined catchments form groups of their own.  The members of every group are stored contiguously, so that a
+    group's members are a slice of a single array.
+    """
+
+    __slots__ = ["_group_ids", "_offsets", "_members"]
+
+    @classmethod
+    def from_network(cls, network: Network) -> ConjoinedIndex:
+        """
+        Build the index from the ::attribute:`Catchment.conjoined_catchments` of a network's retained objects.
+
+        Conjoined catchments that are not part of the network are ignored.
+
+        Parameters
+        ----------
+        network: Network
+            The network, which must retain its catchment objects.
+
+        Returns
+        -------
+        ConjoinedIndex
+            The index of conjoined catchment groups.
+        """
+        links = [(c.id, j.id) for c in (network.catchment(i) for i in range(network.num_catchments))
+                 for j in c.conjoined_catchments]
+        id_index = pd.Index(network.catchment_ids)
+        first = id_index.get_indexer(pd.Index([a for a, _ in links], dtype=object))
+        second = id_index.get_indexer(pd.Index([b for _, b in links], dtype=object))
+        known = (first >= 0) & (second >= 0)
+        return cls(network.num_catchments, first[known], second[known])
+
+    def __init__(self, num_catchments: int, first: np.ndarray, second: np.ndarray):
+        """
+        Build the index from links between pairs of catchments.
+
+        Parameters
+        ----------
+        num_catchments: int
+            The number of catchments.
+        first: np.ndarray
+            The index of the first catchment of each link.
+        second: np.ndarray
+            The index of the second catchment of each link.
+        """
+        roots = _components(num_catchments, np.asarray(first, dtype=np.int64), np.asarray(second, dtype=np.int64))
+        _, self._group_ids = np.unique(roots, return_inverse=True)
+        self._group_ids = self._group_ids.astype(np.int64)
+        self._offsets, self._members = _csr(self._group_ids, self.num_groups)
+
+    @property
+    def group_ids(self) -> np.ndarray:
+        """
+        The group of each catchment.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one entry per catchment.
+        """
+        return self._group_ids
+
+    @property
+    def members_array(self) -> np.ndarray:
+        """
+        The indices of all catchments, ordered by group, with the members of group ``g`` at positions
+        ``offsets[g]:offsets[g + 1]``.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array of catchment indices.
+        """
+        return self._members
+
+    @property
+    def num_groups(self) -> int:
+        return int(self._group_ids.max()) + 1 if self._group_ids.size > 0 else 0
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """
+        The start position of each group's members within ::attribute:`members_array`, plus a final end position.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one more entry than there are groups.
+        """
+        return self._offsets
+
+    @property
+    def sizes(self) -> np.ndarray:
+        """
+        The number of catchments in each group.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one entry per group.
+        """
+        return np.diff(self._offsets)
+
+    def group_of(self, catchment: int) -> int:
+        """
+        Get the group of a catchment.
+
+        Parameters
+        ----------
+        catchment: int
+            The catchment index.
+
+        Returns
+        -------
+        int
+            The group index.
+        """
+        return int(self._group_ids[catchment])
+
+    def members(self, group: int) -> np.ndarray:
+        """
+        Get the catchments of a group.
+
+        Parameters
+        ----------
+        group: int
+            The group index.
+
+        Returns
+        -------
+        np.ndarray
+            The indices of the group's catchments, in ascending order.
+        """
+        return self._members[self._offsets[group]:self._offsets[group + 1]]
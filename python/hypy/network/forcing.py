@@ -0,0 +1,392 @@
+from __future__ import annotations
+
+import importlib
+import threading
+import numpy as np
+import pandas as pd
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from queue import Empty, Full, Queue
+from typing import Iterator, Optional, Sequence, Tuple, TypeVar, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .network import Network
+
+T = TypeVar("T")
+
+
+def _optional(module: str, extra: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise ImportError("This forcing source requires the optional {} dependency (install hypy[{}])".format(
+            module, extra)) from None
+
+
+# Marks the end of the items produced by a background thread
+_DONE = object()
+
+
+def _start_producer(items: Iterator[T], depth: int) -> Tuple[Queue, threading.Event, threading.Thread]:
+    """
+    Start a background thread putting items, each paired with ``None``, into a queue of at most ``depth`` items,
+    followed by ``_DONE`` paired with any exception raised while producing them, until the returned event is set.
+    """
+    queue: Queue = Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_DONE, e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    return queue, stopped, thread
+
+
+def _stop_producer(queue: Queue, stopped: threading.Event, thread: threading.Thread):
+    """
+    Stop a background thread started by ::function:`_start_producer`, draining its queue so that it cannot block.
+    """
+    stopped.set()
+    try:
+        while True:
+            queue.get_nowait()
+    except Empty:
+        pass
+    thread.join()
+
+
+def prefetch(items: Iterator[T], depth: int = 1) -> Iterator[T]:
+    """
+    Iterate over items produced on a background thread, which works up to ``depth`` items ahead of the consumer.
+
+    Exceptions raised while producing items are re-raised to the consumer, and the producer stops once the consumer
+    stops iterating.
+
+    Parameters
+    ----------
+    items: Iterator[T]
+        The items, which are produced on the background thread.
+    depth: int
+        The number of produced items waiting to be consumed that may be held, or ``0`` to produce items on demand.
+
+    Returns
+    -------
+    Iterator[T]
+        The same items, in order.
+    """
+    if depth < 1:
+        yield from items
+        return
+    queue, stopped, thread = _start_producer(items, depth)
+    try:
+        while True:
+            item, error = queue.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        _stop_producer(queue, stopped, thread)
+
+
+class ForcingProvider(ABC):
+    """
+    Source of time by catchment forcing inputs that can be read a block of timesteps at a time.
+
+    Sources order their catchments independently of any network; ::method:`chunks` aligns blocks to the catchment
+    indices of a network as they are read, so only one block (plus any being prefetched) is ever held in memory.
+    """
+
+    __slots__ = ()
+
+    @property
+    @abstractmethod
+    def catchment_ids(self) -> np.ndarray:
+        """
+        The identifiers of the catchments of the source, in the order of its columns.
+
+        Returns
+        -------
+        np.ndarray
+            Object array of catchment identifiers.
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def num_steps(self) -> int:
+        """
+        The number of timesteps of the source.
+
+        Returns
+        -------
+        int
+            The number of timesteps of the source.
+        """
+        pass
+
+    @abstractmethod
+    def read(self, start: int, stop: int, columns: np.ndarray) -> np.ndarray:
+        """
+        Read a block of timesteps for some of the source's catchments.
+
+        Parameters
+        ----------
+        start: int
+            The first timestep to read.
+        stop: int
+            The timestep after the last to read.
+        columns: np.ndarray
+            The positions within ::attribute:`catchment_ids` of the catchments to read.
+
+        Returns
+        -------
+        np.ndarray
+            Time by catchment array, with catchments in the order of ``columns``.
+        """
+        pass
+
+    def columns_for(self, network: Network) -> np.ndarray:
+        """
+        Find the source column of every catchment of a network.
+
+        Parameters
+        ----------
+        network: Network
+            The network.
+
+        Returns
+        -------
+        np.ndarray
+            The position within ::attribute:`catchment_ids` of each of the network's catchments, or ``-1`` where the
+            source has no forcing for the catchment.
+        """
+        return pd.Index(self.catchment_ids).get_indexer(network.catchment_ids)
+
+    def chunks(self,
+               network: Network,
+               chunk_size: int,
+               start: int = 0,
+               stop: Optional[int] = None,
+               prefetch_depth: int = 1,
+               fill_value: Optional[float] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Iterate over blocks of timesteps aligned to the catchments of a network, reading ahead on a background thread.
+
+        Parameters
+        ----------
+        network: Network
+            The network to align forcing to.
+        chunk_size: int
+            The number of timesteps per block.
+        start: int
+            The first timestep.
+        stop: Optional[int]
+            The timestep after the last, or ``None`` for all of the source's timesteps.
+        prefetch_depth: int
+            The number of blocks to read ahead of the consumer, or ``0`` to read blocks on demand.
+        fill_value: Optional[float]
+            The forcing of network catchments missing from the source, or ``None`` to raise an error for them.
+
+        Returns
+        -------
+        Iterator[Tuple[int, np.ndarray]]
+            The first timestep of each block, and the block as a time by catchment array ordered according to the
+            network's catchment indices.
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be positive")
+        columns = self.columns_for(network)
+        missing = columns < 0
+        if missing.any() and fill_value is None:
+            raise KeyError("No forcing for catchment(s) {}".format(list(network.catchment_ids[missing][:10])))
+        stop = self.num_steps if stop is None else min(stop, self.num_steps)
+        present = np.flatnonzero(~missing)
+
+        def read_aligned() -> Iterator[Tuple[int, np.ndarray]]:
+            for first in range(start, stop, chunk_size):
+                last = min(first + chunk_size, stop)
+                if present.size == columns.size:
+                    yield first, np.asarray(self.read(first, last, columns), dtype=np.float64)
+                else:
+                    block = np.full((last - first, columns.size), fill_value, dtype=np.float64)
+                    block[:, present] = self.read(first, last, columns[present])
+                    yield first, block
+
+        return prefetch(read_aligned(), prefetch_depth)
+
+
+class ArrayForcing(ForcingProvider):
+    """
+    Forcing held in a time by catchment array, such as a memory-mapped ``.npy`` file, of which only the blocks being
+    read are loaded into memory.
+    """
+
+    __slots__ = ["_array", "_catchment_ids"]
+
+    @classmethod
+    def from_npy(cls, path: str | Path, catchment_ids: Sequence[str]) -> ArrayForcing:
+        """
+        Memory-map forcing from a ``.npy`` file.
+
+        Parameters
+        ----------
+        path: str | Path
+            The path to the file, holding a time by catchment array.
+        catchment_ids: Sequence[str]
+            The identifiers of the catchments of the array's columns.
+
+        Returns
+        -------
+        ArrayForcing
+            The forcing provider.
+        """
+        return cls(np.load(path, mmap_mode="r"), catchment_ids)
+
+    def __init__(self, array: np.ndarray, catchment_ids: Sequence[str]):
+        """
+        Initialize from an array.
+
+        Parameters
+        ----------
+        array: np.ndarray
+            Time by catchment array, which may be a ::class:`np.memmap`.
+        catchment_ids: Sequence[str]
+            The identifiers of the catchments of the array's columns.
+        """
+        self._array = array
+        self._catchment_ids = np.asarray(catchment_ids, dtype=object)
+        if array.ndim != 2 or array.shape[1] != self._catchment_ids.size:
+            raise ValueError("Forcing must be a time by catchment array with one column per catchment identifier")
+
+    @property
+    def catchment_ids(self) -> np.ndarray:
+        return self._catchment_ids
+
+    @property
+    def num_steps(self) -> int:
+        return self._array.shape[0]
+
+    def read(self, start: int, stop: int, columns: np.ndarray) -> np.ndarray:
+        return self._array[start:stop].take(columns, axis=1)
+
+
+class NetCDFForcing(ForcingProvider):
+    """
+    Forcing held in a variable of a NetCDF file, of which each block is read as a single slab.
+
+    Requires the optional ``netCDF4`` dependency.
+    """
+
+    __slots__ = ["_dataset", "_variable", "_catchment_ids", "_time_axis"]
+
+    def __init__(self, path: str | Path, variable: str, id_variable: str = "ids", time_dimension: str = "time"):
+        """
+        Open a NetCDF file.
+
+        Parameters
+        ----------
+        path: str | Path
+            The path to the file.
+        variable: str
+            The name of the two-dimensional forcing variable, with a time dimension and a catchment dimension.
+        id_variable: str
+            The name of the variable of catchment identifiers along the catchment dimension.
+        time_dimension: str
+            The name of the time dimension.
+        """
+        netcdf = _optional("netCDF4", "netcdf")
+        self._dataset = netcdf.Dataset(str(path), "r")
+        self._variable = self._dataset.variables[variable]
+        if self._variable.ndim != 2 or time_dimension not in self._variable.dimensions:
+            raise ValueError("Forcing variable {} must have {} and catchment dimensions".format(
+                variable, time_dimension))
+        self._time_axis = self._variable.dimensions.index(time_dimension)
+        self._catchment_ids = np.asarray(self._dataset.variables[id_variable][:], dtype=str).astype(object)
+
+    @property
+    def catchment_ids(self) -> np.ndarray:
+        return self._catchment_ids
+
+    @property
+    def num_steps(self) -> int:
+        return self._variable.shape[self._time_axis]
+
+    def close(self):
+        """
+        Close the underlying file.
+        """
+        self._dataset.close()
+
+    def read(self, start: int, stop: int, columns: np.ndarray) -> np.ndarray:
+        if self._time_axis == 0:
+            block = self._variable[start:stop, :]
+        else:
+            block = self._variable[:, start:stop].T
+        return np.ma.filled(block.astype(np.float64), np.nan).take(columns, axis=1)
+
+
+class ParquetForcing(ForcingProvider):
+    """
+    Forcing held in a Parquet file in wide layout, with a row per timestep and a column per catchment, of which only
+    the row groups overlapping each block are read.
+
+    Requires the optional ``pyarrow`` dependency.
+    """
+
+    __slots__ = ["_file", "_catchment_ids", "_row_offsets"]
+
+    def __init__(self, path: str | Path, time_column: Optional[str] = None):
+        """
+        Open a Parquet file.
+
+        Parameters
+        ----------
+        path: str | Path
+            The path to the file.
+        time_column: Optional[str]
+            The name of a timestamp column to exclude from the catchment columns, if present.
+        """
+        parquet = _optional("pyarrow.parquet", "arrow")
+        self._file = parquet.ParquetFile(str(path))
+        names = [name for name in self._file.schema_arrow.names if name != time_column]
+        self._catchment_ids = np.asarray(names, dtype=object)
+        metadata = self._file.metadata
+        self._row_offsets = np.concatenate(([0], np.cumsum([metadata.row_group(g).num_rows
+                                                            for g in range(metadata.num_row_groups)])))
+
+    @property
+    def catchment_ids(self) -> np.ndarray:
+        return self._catchment_ids
+
+    @property
+    def num_steps(self) -> int:
+        return int(self._row_offsets[-1])
+
+    def read(self, start: int, stop: int, columns: np.ndarray) -> np.ndarray:
+        first = int(np.searchsorted(self._row_offsets, start, side="right")) - 1
+        last = int(np.searchsorted(self._row_offsets, stop, side="left"))
+        names = list(self._catchment_ids[columns])
+        table = self._file.read_row_groups(list(range(first, last)), columns=list(dict.fromkeys(names)))
+        block = np.column_stack([table.column(name).to_numpy() for name in names]) if names else \
+            np.empty((table.num_rows, 0))
+        offset = int(self._row_offsets[first])
+        return block[start - offset:stop - offset].astype(np.float64)
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import numpy as np
+
+from typing import Iterable, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from ..hydrolocation.hydrolocation import HydroLocationType
+from ._arrays import _csr, _csr_gather
+from .paths import NexusTree
+
+if TYPE_CHECKING:
+    from ..hydrolocation import NWISLocation
+    from .network import Network
+
+
+def _network_gauges(network: Network) -> Sequence[NWISLocation]:
+    """
+    Find the hydrometric stations realized by the nexuses retained by a network.
+    """
+    if not network.has_objects:
+        raise RuntimeError("Network does not retain nexus objects, so gauge locations must be given")
+    locations = (network.nexus(i).hydro_location for i in range(network.num_nexuses))
+    return [loc for loc in locations if loc is not None and loc.ltype == HydroLocationType.hydrometricStation]
+
+
+class GaugeCoverage:
+    """
+    Labelling of the catchments of a ::class:`Network` with their controlling gauge: the first gauge downstream of each
+    catchment, at or below its outflow nexus.
+
+    The catchments controlled by a gauge make up its incremental gauge basin, which is the part of its drainage area not
+    drained by any gauge upstream of it.  Flow is traced downstream along the network's ::class:`NexusTree`, so a
+    catchment is controlled by the gauges along its primary downstream path.  Catchments with no gauge downstream are
+    labelled ``-1``.
+
+    Labels are found in a single top-down pass over the nexus tree, and gauges added later with ::method:`add_gauges`
+    only relabel the nexuses upstream of them.
+    """
+
+    __slots__ = ["_network", "_tree", "_preorder", "_gauge_nexuses", "_station_ids", "_nexus_gauge", "_catchment_gauge",
+                 "_basins", "_topology_version"]
+
+    def __init__(self, network: Network, gauges: Optional[Iterable[NWISLocation]] = None):
+        """
+        Label the catchments of a network.
+
+        Parameters
+        ----------
+        network: Network
+            The network.
+        gauges: Optional[Iterable[NWISLocation]]
+            The gauges, or ``None`` for the hydrometric stations realized by the network's retained nexus objects.
+            Stations that are not ::class:`NWISLocation` objects are identified by their nexus identifiers.
+        """
+        self._network = network
+        self._tree: NexusTree = network._cached("nexus_tree", NexusTree)
+        self._preorder = np.empty(network.num_nexuses, dtype=np.int64)
+        self._preorder[self._tree.start] = np.arange(network.num_nexuses)
+        self._gauge_nexuses = np.empty(0, dtype=np.int64)
+        self._station_ids = np.empty(0, dtype=object)
+        self._nexus_gauge = np.full(network.num_nexuses, -1, dtype=np.int64)
+        self._catchment_gauge = np.full(network.num_catchments, -1, dtype=np.int64)
+        self._basins: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._topology_version = network.topology_version
+        gauges = _network_gauges(network) if gauges is None else list(gauges)
+        nexuses, station_ids = self._locate(gauges)
+        self._gauge_nexuses = nexuses
+        self._station_ids = station_ids
+        self._nexus_gauge[nexuses] = np.arange(nexuses.size)
+        for level in self._tree.levels[1:]:
+            ungauged = level[self._nexus_gauge[level] < 0]
+            self._nexus_gauge[ungauged] = self._nexus_gauge[self._tree.parent[ungauged]]
+        self._label_catchments(np.arange(network.num_catchments))
+
+    @property
+    def catchment_gauge(self) -> np.ndarray:
+        """
+        The controlling gauge of each catchment, which also identifies its incremental gauge basin.
+
+        Returns
+        -------
+        np.ndarray
+            The position within ::attribute:`station_ids` of each catchment's controlling gauge, or ``-1``.
+        """
+        return self._catchment_gauge
+
+    @property
+    def downstream_gauge(self) -> np.ndarray:
+        """
+        The next gauge downstream of each gauge.
+
+        Returns
+        -------
+        np.ndarray
+            The position within ::attribute:`station_ids` of the gauge controlling the catchment each gauge's nexus
+            flows into, or ``-1``.
+        """
+        parents = self._tree.parent[self._gauge_nexuses]
+        return np.where(parents >= 0, self._nexus_gauge[np.maximum(parents, 0)], -1)
+
+    @property
+    def gauge_nexuses(self) -> np.ndarray:
+        """
+        The index of the network nexus realized by each gauge.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one entry per gauge.
+        """
+        return self._gauge_nexuses
+
+    @property
+    def num_gauges(self) -> int:
+        return self._gauge_nexuses.size
+
+    @property
+    def station_ids(self) -> np.ndarray:
+        """
+        The station identifier of each gauge.
+
+        Returns
+        -------
+        np.ndarray
+            Object array with one entry per gauge.
+        """
+        return self._station_ids
+
+    def _label_catchments(self, catchments: np.ndarray):
+        outflow = self._network.catchment_outflow[catchments]
+        self._catchment_gauge[catchments] = np.where(outflow >= 0, self._nexus_gauge[np.maximum(outflow, 0)], -1)
+        self._basins = None
+
+    def _locate(self, gauges: Sequence[NWISLocation]) -> Tuple[np.ndarray, np.ndarray]:
+        if self._network.topology_version != self._topology_version:
+            raise RuntimeError("Network topology has changed since its gauge coverage was computed")
+        nexuses = np.fromiter((self._network.nexus_index(g.realized_nexus) for g in gauges), dtype=np.int64,
+                              count=len(gauges))
+        station_ids = np.array([getattr(g, "station_id", g.realized_nexus) for g in gauges], dtype=object)
+        if np.unique(np.concatenate((self._gauge_nexuses, nexuses))).size != self._gauge_nexuses.size + nexuses.size:
+            raise ValueError("Nexuses may each have only one gauge")
+        return nexuses, station_ids
+
+    def add_gauges(self, gauges: Iterable[NWISLocation]):
+        """
+        Add gauges, relabelling only the nexuses and catchments upstream of them.
+
+        Gauges are added after the existing gauges, so the positions of existing gauges are unchanged, though their
+        incremental basins may shrink.
+
+        Parameters
+        ----------
+        gauges: Iterable[NWISLocation]
+            The gauges to add, at nexuses that do not already have one.
+        """
+        nexuses, station_ids = self._locate(list(gauges))
+        first = self._gauge_nexuses.size
+        self._gauge_nexuses = np.concatenate((self._gauge_nexuses, nexuses))
+        self._station_ids = np.concatenate((self._station_ids, station_ids))
+        tree = self._tree
+        # Add upstream gauges first, so each new gauge relabels only the upstream nexuses still sharing its old label
+        changed = []
+        for i in np.argsort(-tree.start[nexuses], kind="stable"):
+            nexus = nexuses[i]
+            upstream = self._preorder[tree.start[nexus]:tree.start[nexus] + tree.size[nexus]]
+            upstream = upstream[self._nexus_gauge[upstream] == self._nexus_gauge[nexus]]
+            self._nexus_gauge[upstream] = first + i
+            changed.append(upstream)
+        if changed:
+            self._label_catchments(_csr_gather(*self._network.contributing, np.concatenate(changed))[1])
+
+    def basin_catchments(self, gauge: int) -> np.ndarray:
+        """
+        The catchments of the incremental basin of a gauge.
+
+        Parameters
+        ----------
+        gauge: int
+            The position of the gauge within ::attribute:`station_ids`.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted integer array of catchment indices.
+        """
+        offsets, indices = self.basins()
+        return indices[offsets[gauge]:offsets[gauge + 1]]
+
+    def basins(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The membership of every incremental gauge basin, in compressed sparse row form.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Offsets and catchment indices, where the catchments of the basin of gauge ``j`` are
+            ``indices[offsets[j]:offsets[j + 1]]``; catchments with no gauge downstream are omitted.
+        """
+        if self._basins is None:
+            gauged = np.flatnonzero(self._catchment_gauge >= 0)
+            offsets, indices = _csr(self._catchment_gauge[gauged], self.num_gauges)
+            self._basins = (offsets, gauged[indices])
+        return self._basins
+
+    def incremental_totals(self, values: np.ndarray) -> np.ndarray:
+        """
+        Sum a per-catchment quantity, such as drainage area, over each incremental gauge basin.
+
+        Parameters
+        ----------
+        values: np.ndarray
+            The quantity for each catchment, in index order.
+
+        Returns
+        -------
+        np.ndarray
+            The total over the incremental basin of each gauge.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != self._catchment_gauge.shape:
+            raise ValueError("Values must have one entry per catchment")
+        gauged = self._catchment_gauge >= 0
+        return np.bincount(self._catchment_gauge[gauged], weights=values[gauged], minlength=self.num_gauges)
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import numpy as np
+
+from typing import Any, Iterable, List, Mapping, Optional, Set, Tuple, TYPE_CHECKING
+
+from ..memoize import parameter_digest
+from ._arrays import _csr_gather
+from .simulation import Response, formulation_response
+
+if TYPE_CHECKING:
+    from ..formulation import Formulation
+    from .network import Network
+
+
+def _param_key(formulation: Optional[Formulation]) -> Optional[bytes]:
+    """
+    Snapshot the parameter values of a formulation, or ``None`` if it has none or does not expose them.
+    """
+    return None if formulation is None else parameter_digest(formulation)
+
+
+class IncrementalSimulation:
+    """
+    Simulation of a ::class:`Network` over a fixed block of forcing that, after edits, re-simulates only the affected
+    region of the network.
+
+    The outflow of every catchment at every timestep is kept from the last run.  Since a catchment's outflow depends
+    only on its own formulation and forcing and on what flows into it, an edit can only affect the edited catchments
+    and those downstream of them.  On ::method:`rerun`, only that downstream closure is re-simulated, reading the kept
+    outflows of all other catchments wherever they flow into it.
+
+    Edits to formulations are tracked as they are made, through ::method:`set_formulation` and
+    ::method:`set_param_values`, so a rerun only compares the edited catchments against a snapshot taken at the last
+    run, and skips those whose formulation object and ::attribute:`Formulation.param_values` turn out unchanged.
+    Catchments whose inflow or outflow nexus changed are found by comparing the network's topology arrays (along with
+    the catchments receiving from the nexuses involved, since their share of the flow may change).  Any other edit, such
+    as a change of forcing or a formulation changed directly, must be reported through ::method:`mark_changed`.
+
+    Results are the same as those of a ::class:`Simulation` starting without flow.
+    """
+
+    __slots__ = ["_network", "_forcing", "_response", "_outputs", "_flows", "_inflow", "_outflow", "_formulations",
+                 "_param_keys", "_marked", "_edited", "_last_region"]
+
+    def __init__(self, network: Network, forcing: np.ndarray, response: Response = formulation_response):
+        """
+        Initialize without running.
+
+        Parameters
+        ----------
+        network: Network
+            The network to simulate.
+        forcing: np.ndarray
+            Forcing inputs, as a time by catchment array ordered according to the network's catchment indices.
+        response: Response
+            Callable computing catchment outflows, by default using each catchment's formulation.
+        """
+        if forcing.ndim != 2 or forcing.shape[1] != network.num_catchments:
+            raise ValueError("Forcing must be a time by catchment array")
+        self._network = network
+        self._forcing = forcing
+        self._response = response
+        self._outputs: Optional[np.ndarray] = None
+        self._flows: Optional[np.ndarray] = None
+        self._inflow: Optional[np.ndarray] = None
+        self._outflow: Optional[np.ndarray] = None
+        self._formulations: List[Optional[Formulation]] = []
+        self._param_keys: List[Optional[bytes]] = []
+        self._marked = np.zeros(network.num_catchments, dtype=bool)
+        self._edited: Set[int] = set()
+        self._last_region = np.empty(0, dtype=np.int64)
+
+    @property
+    def flows(self) -> Optional[np.ndarray]:
+        """
+        The flow at each nexus for each timestep as of the last run, or ``None`` before the first run.
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            Time by nexus array.
+        """
+        return self._flows
+
+    @property
+    def last_region(self) -> np.ndarray:
+        """
+        The catchments that were simulated by the last run.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted integer array of catchment indices.
+        """
+        return self._last_region
+
+    @property
+    def network(self) -> Network:
+        return self._network
+
+    @property
+    def outputs(self) -> Optional[np.ndarray]:
+        """
+        The outflow of each catchment for each timestep as of the last run, or ``None`` before the first run.
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            Time by catchment array.
+        """
+        return self._outputs
+
+    def _changes(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the changed catchments since the last run, and any nexuses whose contributing catchments changed.
+        """
+        net = self._network
+        changed = self._marked.copy()
+        nexuses = np.empty(0, dtype=np.int64)
+        moved = (net.catchment_inflow != self._inflow) | (net.catchment_outflow != self._outflow)
+        if moved.any():
+            nexuses = np.unique(np.concatenate((self._inflow[moved], net.catchment_inflow[moved],
+                                                self._outflow[moved], net.catchment_outflow[moved])))
+            nexuses = nexuses[nexuses >= 0]
+            changed[moved] = True
+            changed[_csr_gather(*net.receiving, nexuses)[1]] = True
+        for i in self._edited:
+            formulation = self._formulation(i)
+            if formulation is not self._formulations[i] or _param_key(formulation) != self._param_keys[i]:
+                changed[i] = True
+        return np.flatnonzero(changed), nexuses
+
+    def _formulation(self, index: int) -> Optional[Formulation]:
+        return getattr(self._network.catchment(index), "formulation", None)
+
+    def _index(self, catchment: int | str) -> int:
+        return self._network.catchment_index(catchment) if isinstance(catchment, str) else int(catchment)
+
+    def _snapshot(self, catchments: Optional[Iterable[int]] = None):
+        """
+        Snapshot the topology, and the formulations of the given catchments, or of every catchment if not given.
+        """
+        self._inflow = self._network.catchment_inflow.copy()
+        self._outflow = self._network.catchment_outflow.copy()
+        if catchments is None:
+            indices = range(self._network.num_catchments) if self._network.has_objects else range(0)
+            self._formulations = [self._formulation(i) for i in indices]
+            self._param_keys = [_param_key(f) for f in self._formulations]
+        else:
+            for i in catchments:
+                self._formulations[i] = self._formulation(i)
+                self._param_keys[i] = _param_key(self._formulations[i])
+        self._marked[:] = False
+        self._edited.clear()
+
+    def _simulate_region(self, region: np.ndarray, nexuses: np.ndarray):
+        """
+        Re-simulate a downstream-closed region, then recompute the flows of its outflow nexuses and any others given.
+        """
+        net = self._network
+        outputs = self._outputs
+        offsets, _ = net.receiving
+        inflow = net.catchment_inflow[region]
+        routed = np.flatnonzero(inflow >= 0)
+        inflow_nexuses, local_inflow = np.unique(inflow[routed], return_inverse=True)
+        owner, contributors = _csr_gather(*net.contributing, inflow_nexuses)
+        share = 1.0 / np.maximum(offsets[inflow_nexuses + 1] - offsets[inflow_nexuses], 1)
+        for t in range(self._forcing.shape[0]):
+            inputs = self._forcing[t, region].astype(np.float64)
+            if t > 0 and routed.size > 0:
+                flow = np.bincount(owner, weights=outputs[t - 1, contributors], minlength=inflow_nexuses.size)
+                inputs[routed] += (flow * share)[local_inflow]
+            outputs[t, region] = self._response(net, region, inputs, t)
+
+        outflow = net.catchment_outflow[region]
+        affected = np.union1d(outflow[outflow >= 0], nexuses)
+        owner, contributors = _csr_gather(*net.contributing, affected)
+        self._flows[:, affected] = 0.0
+        if contributors.size > 0:
+            starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+            self._flows[:, affected[owner[starts]]] = np.add.reduceat(outputs[:, contributors], starts, axis=1)
+
+    def changed_catchments(self) -> np.ndarray:
+        """
+        Find the catchments edited since the last run.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted integer array of catchment indices, which is every catchment before the first run.
+        """
+        if self._outputs is None:
+            return np.arange(self._network.num_catchments)
+        return self._changes()[0]
+
+    def mark_changed(self, catchments: Iterable[int | str]):
+        """
+        Report catchments as changed in ways that cannot be detected, such as changes to their forcing.
+
+        Parameters
+        ----------
+        catchments: Iterable[int | str]
+            The indices or identifiers of the changed catchments.
+        """
+        for catchment in catchments:
+            self._marked[self._index(catchment)] = True
+
+    def rerun(self) -> np.ndarray:
+        """
+        Re-simulate the region downstream of all catchments edited since the last run, or run everything if there has
+        not been one.
+
+        Returns
+        -------
+        np.ndarray
+            The flow at each nexus for each timestep, as a time by nexus array.
+        """
+        if self._outputs is None:
+            return self.run()
+        changed, nexuses = self._changes()
+        self._last_region = self._network.downstream_closure(changed)
+        if self._last_region.size > 0 or nexuses.size > 0:
+            self._simulate_region(self._last_region, nexuses)
+        self._snapshot(self._edited)
+        return self._flows
+
+    def run(self) -> np.ndarray:
+        """
+        Simulate the whole network, discarding any kept results.
+
+        Returns
+        -------
+        np.ndarray
+            The flow at each nexus for each timestep, as a time by nexus array.
+        """
+        net = self._network
+        self._outputs = np.zeros(self._forcing.shape, dtype=np.float64)
+        self._flows = np.zeros((self._forcing.shape[0], net.num_nexuses), dtype=np.float64)
+        self._last_region = np.arange(net.num_catchments)
+        self._simulate_region(self._last_region, np.empty(0, dtype=np.int64))
+        self._snapshot()
+        return self._flows
+
+    def set_formulation(self, catchment: int | str, formulation: Formulation):
+        """
+        Assign a new formulation to a catchment, to be re-simulated on the next ::method:`rerun`.
+
+        Parameters
+        ----------
+        catchment: int | str
+            The index or identifier of the catchment.
+        formulation: Formulation
+            The formulation.
+        """
+        index = self._index(catchment)
+        self._network.catchment(index).formulation = formulation
+        self._edited.add(index)
+
+    def set_param_values(self, catchment: int | str, values: Mapping[str, Any]):
+        """
+        Set parameter values of the formulation of a catchment, to be re-simulated on the next ::method:`rerun` if they
+        differ from those of the last run.
+
+        Parameters
+        ----------
+        catchment: int | str
+            The index or identifier of the catchment.
+        values: Mapping[str, Any]
+            A map of parameter names to their new values.
+
+        See Also
+        -------
+        ::method:`Formulation.set_param_values`
+        """
+        index = self._index(catchment)
+        self._network.catchment(index).formulation.set_param_values(values)
+        self._edited.add(index)
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import copy
+import weakref
+import numpy as np
+import pandas as pd
+
+from collections import OrderedDict
+from typing import Any, Mapping, Optional, Tuple, TYPE_CHECKING
+
+from ..catchment import Catchment
+from ..hydrolocation.hydrolocation import HydroLocation, HydroLocationType
+from ..hydrolocation.nwis_location import NWISLocation
+from ..nexus import Nexus
+from ..realization import Realization
+from . import tables as _tables
+from .network import Network
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+
+class LazyCatchment(Catchment):
+    """
+    A ::class:`Catchment` materialized by a ::class:`LazyNetwork`, which finds its inflow and outflow nexuses through
+    the network when they are accessed, rather than holding them.
+    """
+
+    __slots__ = ["_store", "_index", "__weakref__"]
+
+    def __init__(self, store: LazyNetwork, index: int, realization: Optional[Realization] = None):
+        """
+        Initialize without materializing any neighbours.
+
+        Parameters
+        ----------
+        store: LazyNetwork
+            The lazy network materializing the catchment.
+        index: int
+            The index of the catchment within the network.
+        realization: Optional[Realization]
+            The optional catchment realization object associated with this catchment.
+        """
+        super().__init__(str(store.network.catchment_ids[index]), {}, realization=realization)
+        self._store = store
+        self._index = index
+
+    def __deepcopy__(self, memo: dict) -> LazyCatchment:
+        return _materialized_catchment(copy.deepcopy(self._store, memo), self._index)
+
+    def __reduce__(self):
+        return _materialized_catchment, (self._store, self._index)
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def inflow(self) -> Optional[LazyNexus]:
+        return self._store._neighbour_nexus(self._store.network.catchment_inflow[self._index])
+
+    @property
+    def outflow(self) -> Optional[LazyNexus]:
+        return self._store._neighbour_nexus(self._store.network.catchment_outflow[self._index])
+
+
+class LazyNexus(Nexus):
+    """
+    A ::class:`Nexus` materialized by a ::class:`LazyNetwork`, which finds its contributing and receiving catchments
+    through the network when they are accessed, rather than holding them.
+    """
+
+    __slots__ = ["_store", "_index", "__weakref__"]
+
+    def __init__(self, store: LazyNetwork, index: int, hydro_location: HydroLocation):
+        """
+        Initialize without materializing any neighbours.
+
+        Parameters
+        ----------
+        store: LazyNetwork
+            The lazy network materializing the nexus.
+        index: int
+            The index of the nexus within the network.
+        hydro_location: HydroLocation
+            HydroLocation associated with this nexus.
+        """
+        super().__init__(str(store.network.nexus_ids[index]), hydro_location)
+        self._store = store
+        self._index = index
+
+    def __deepcopy__(self, memo: dict) -> LazyNexus:
+        return _materialized_nexus(copy.deepcopy(self._store, memo), self._index)
+
+    def __reduce__(self):
+        return _materialized_nexus, (self._store, self._index)
+
+    @property
+    def contributing_catchments(self) -> Tuple[LazyCatchment, ...]:
+        return tuple(self._store.catchment(int(i)) for i in self._store.network.contributing_catchments(self._index))
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def receiving_catchments(self) -> Tuple[LazyCatchment, ...]:
+        return tuple(self._store.catchment(int(i)) for i in self._store.network.receiving_catchments(self._index))
+
+
+def _materialized_catchment(store: LazyNetwork, index: int) -> LazyCatchment:
+    return store.catchment(index)
+
+
+def _materialized_nexus(store: LazyNetwork, index: int) -> LazyNexus:
+    return store.nexus(index)
+
+
+class LazyNetwork:
+    """
+    Source of ::class:`Catchment` and ::class:`Nexus` objects materialized on demand from a ::class:`Network` that does
+    not retain objects, such as one read from tables on disk or attached from a published snapshot.
+
+    Objects are built only when first requested, either directly or by following the links of other materialized
+    objects (such as ::attribute:`Catchment.outflow` or ::attribute:`Nexus.receiving_catchments`), which are resolved
+    through the network's arrays on every access instead of being held.  Memory therefore scales with the part of the
+    network actually touched.
+
+    The most recently used ``max_objects`` objects are kept in a bounded cache, beyond which the least recently used are
+    evicted.  An evicted object that is still referenced elsewhere continues to be returned, so each catchment or nexus
+    is represented by at most one object at a time; otherwise it is rebuilt on its next access, without any state (such
+    as a realization) set on it after it was built.
+    """
+
+    __slots__ = ["_network", "_max_objects", "_objects", "_live", "_location_rows", "_locations", "_realization_kind"]
+
+    @classmethod
+    def from_arrow(cls, tables: Mapping[str, pa.Table], max_objects: int = 100000,
+                   realization_kind: Optional[str] = None) -> LazyNetwork:
+        """
+        Create from Arrow tables in the layout produced by ::method:`Network.to_arrow`.
+
+        Parameters
+        ----------
+        tables: Mapping[str, pa.Table]
+            The tables, by name, of which only ``catchments`` is required.
+        max_objects: int
+            The maximum number of materialized objects kept in the cache.
+        realization_kind: Optional[str]
+            The kind of realization from the ``realizations`` table to give each catchment, if any.
+
+        Returns
+        -------
+        LazyNetwork
+            The lazy network.
+        """
+        return cls.from_pandas(_tables.arrow_to_pandas(tables), max_objects, realization_kind)
+
+    @classmethod
+    def from_pandas(cls, tables: Mapping[str, pd.DataFrame], max_objects: int = 100000,
+                    realization_kind: Optional[str] = None) -> LazyNetwork:
+        """
+        Create from data frames in the layout produced by ::method:`Network.to_pandas`, building nexus hydrolocations
+        from any ``hydrolocations`` table.
+
+        Parameters
+        ----------
+        tables: Mapping[str, pd.DataFrame]
+            The tables, by name, of which only ``catchments`` is required.
+        max_objects: int
+            The maximum number of materialized objects kept in the cache.
+        realization_kind: Optional[str]
+            The kind of realization from the ``realizations`` table to give each catchment, if any.
+
+        Returns
+        -------
+        LazyNetwork
+            The lazy network.
+        """
+        return cls(Network.from_pandas(tables), tables.get("hydrolocations"), max_objects, realization_kind)
+
+    def __init__(self,
+                 network: Network,
+                 hydrolocations: Optional[pd.DataFrame] = None,
+                 max_objects: int = 100000,
+                 realization_kind: Optional[str] = None):
+        """
+        Initialize without materializing any objects.
+
+        Parameters
+        ----------
+        network: Network
+            The network backing the objects.
+        hydrolocations: Optional[pd.DataFrame]
+            Table of nexus hydrolocations, with ``nexus_id``, ``type``, ``x`` and ``y`` columns and an optional
+            ``station_id`` column, whose entries give ::class:`NWISLocation` hydrolocations, or ``None`` to give each
+            nexus a hydrolocation of undefined type without a geometry.
+        max_objects: int
+            The maximum number of materialized objects kept in the cache.
+        realization_kind: Optional[str]
+            The kind of realization from the network's ::attribute:`Network.realizations` to give each catchment, if
+            any.
+        """
+        if max_objects < 1:
+            raise ValueError("Lazy network must allow at least one cached object")
+        self._network = network
+        self._max_objects = max_objects
+        self._objects: OrderedDict[Tuple[bool, int], Any] = OrderedDict()
+        self._live: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self._locations = hydrolocations
+        self._location_rows = None
+        if hydrolocations is not None:
+            rows = _tables._positions(hydrolocations["nexus_id"], pd.Index(network.nexus_ids, dtype=object),
+                                      "nexus_id")
+            self._location_rows = np.full(network.num_nexuses, -1, dtype=np.int64)
+            self._location_rows[rows[rows >= 0]] = np.flatnonzero(rows >= 0)
+        self._realization_kind = realization_kind
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def __reduce__(self):
+        return LazyNetwork, (self._network, self._locations, self._max_objects, self._realization_kind)
+
+    @property
+    def max_objects(self) -> int:
+        return self._max_objects
+
+    @property
+    def network(self) -> Network:
+        """
+        The network backing the materialized objects.
+
+        Returns
+        -------
+        Network
+            The network.
+        """
+        return self._network
+
+    def _cache(self, key: Tuple[bool, int], obj: Any) -> Any:
+        self._objects[key] = obj
+        if len(self._objects) > self._max_objects:
+            self._objects.popitem(last=False)
+        return obj
+
+    def _hydro_location(self, index: int) -> HydroLocation:
+        nexus_id = str(self._network.nexus_ids[index])
+        row = -1 if self._location_rows is None else self._location_rows[index]
+        if row < 0:
+            return HydroLocation(nexus_id)
+        location = self._locations.iloc[row]
+        shape = None if pd.isna(location["x"]) else (float(location["x"]), float(location["y"]))
+        station_id = location.get("station_id")
+        if station_id is not None and not pd.isna(station_id):
+            return NWISLocation(str(station_id), nexus_id, shape)
+        return HydroLocation(nexus_id, shape, HydroLocationType[location["type"]])
+
+    def _lookup(self, key: Tuple[bool, int]) -> Optional[Any]:
+        obj = self._objects.get(key)
+        if obj is not None:
+            self._objects.move_to_end(key)
+            return obj
+        obj = self._live.get(key)
+        return None if obj is None else self._cache(key, obj)
+
+    def _neighbour_nexus(self, index: int) -> Optional[LazyNexus]:
+        return None if index < 0 else self.nexus(int(index))
+
+    def _realization(self, index: int) -> Optional[Realization]:
+        if self._realization_kind is None:
+            return None
+        realizations = self._network.realizations
+        realization_id = realizations.realization_for(index, self._realization_kind)
+        if realization_id is None:
+            return None
+        realization = realizations.realization(realization_id, self._realization_kind)
+        return Realization(realization_id, str(self._network.catchment_ids[index])) if realization is None else \
+            realization
+
+    def catchment(self, catchment: int | str) -> LazyCatchment:
+        """
+        Get a catchment object, materializing it if needed.
+
+        Parameters
+        ----------
+        catchment: int | str
+            The index or identifier of the catchment.
+
+        Returns
+        -------
+        LazyCatchment
+            The catchment object.
+        """
+        index = self._network.catchment_index(catchment) if isinstance(catchment, str) else int(catchment)
+        key = (True, index)
+        obj = self._lookup(key)
+        if obj is None:
+            if not 0 <= index < self._network.num_catchments:
+                raise IndexError("Catchment index {} is out of range".format(index))
+            obj = self._live[key] = self._cache(key, LazyCatchment(self, index, self._realization(index)))
+        return obj
+
+    def clear(self):
+        """
+        Evict every object from the cache.
+        """
+        self._objects.clear()
+
+    def nexus(self, nexus: int | str) -> LazyNexus:
+        """
+        Get a nexus object, materializing it if needed.
+
+        Parameters
+        ----------
+        nexus: int | str
+            The index or identifier of the nexus.
+
+        Returns
+        -------
+        LazyNexus
+            The nexus object.
+        """
+        index = self._network.nexus_index(nexus) if isinstance(nexus, str) else int(nexus)
+        key = (False, index)
+        obj = self._lookup(key)
+        if obj is None:
+            if not 0 <= index < self._network.num_nexuses:
+                raise IndexError("Nexus index {} is out of range".format(index))
+            obj = self._live[key] = self._cache(key, LazyNexus(self, index, self._hydro_location(index)))
+        return obj
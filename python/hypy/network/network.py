@@ -0,0 +1,1075 @@
+from __future__ import annotations
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from . import ordering, paths as _paths, tables as _tables
+from ._arrays import _csr, _csr_gather
+from .conjoined import ConjoinedIndex
+from .gauges import GaugeCoverage
+from .realization_index import RealizationIndex
+from .validation import ValidationReport, validate
+from ..serialization import ObjectGraph, set_slot_state, slot_names, slot_state
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+    from ..catchment import Catchment
+    from ..hydrolocation import NWISLocation
+    from ..hydrolocation.hydrolocation import HydroLocation
+    from ..nexus import Nexus
+
+
+class Network:
+    """
+    Array-backed representation of the topology of a network of ::class:`Catchment` and ::class:`Nexus` objects.
+
+    Catchments and nexuses are each assigned a contiguous integer index, and the network topology is held as two arrays
+    giving, for every catchment, the index of its inflow and outflow nexus (or ``-1`` when it has none).  The
+    contributing and receiving catchments of every nexus are derived from these in compressed sparse row form.  This
+    makes whole-network operations possible with array operations rather than walks over the object graph.
+
+    A network may optionally retain the objects it was built from, which are then accessible by index or identifier.
+
+    Derived per-catchment attributes, such as the topological order and stream orders, are computed on first access
+    and cached.  The cache is cleared whenever the topology is changed through ::method:`set_inflow`,
+    ::method:`set_outflow` or ::method:`refresh`, and ::attribute:`topology_version` is incremented, so other holders of
+    derived data can tell when it is stale.
+    """
+
+    __slots__ = ["_catchment_ids", "_nexus_ids", "_catchment_inflow", "_catchment_outflow", "_catchment_index",
+                 "_nexus_index", "_catchments", "_nexuses", "_contributing", "_receiving", "_cache",
+                 "_topology_version", "_realizations", "_flowpath_length", "_flowpath_celerity", "__weakref__"]
+
+    @classmethod
+    def from_catchments(cls, catchments: Iterable[Catchment], nexuses: Iterable[Nexus] = tuple()) -> Network:
+        """
+        Build a network from catchment objects.
+
+        The nexuses of the network are any supplied explicitly, plus any referenced as the inflow or outflow of one of
+        the catchments.
+
+        Parameters
+        ----------
+        catchments: Iterable[Catchment]
+            The catchments of the network.
+        nexuses: Iterable[Nexus]
+            Any additional nexuses to include, such as those not connected to any of the catchments.
+
+        Returns
+        -------
+        Network
+            A new network object, retaining references to the given objects.
+        """
+        catchments = list(catchments)
+        nexus_objects: Dict[str, Nexus] = {}
+        for nexus in nexuses:
+            nexus_objects.setdefault(nexus.id, nexus)
+        for catchment in catchments:
+            for nexus in (catchment.inflow, catchment.outflow):
+                if nexus is not None:
+                    nexus_objects.setdefault(nexus.id, nexus)
+        inflow_ids = [None if c.inflow is None else c.inflow.id for c in catchments]
+        outflow_ids = [None if c.outflow is None else c.outflow.id for c in catchments]
+        return cls.from_ids(catchment_ids=[c.id for c in catchments], nexus_ids=list(nexus_objects),
+                            inflow_ids=inflow_ids, outflow_ids=outflow_ids, catchments=catchments,
+                            nexuses=list(nexus_objects.values()))
+
+    @classmethod
+    def from_ids(cls,
+                 catchment_ids: Sequence[str],
+                 nexus_ids: Sequence[str],
+                 inflow_ids: Sequence[Optional[str]],
+                 outflow_ids: Sequence[Optional[str]],
+                 catchments: Optional[Sequence[Catchment]] = None,
+                 nexuses: Optional[Sequence[Nexus]] = None) -> Network:
+        """
+        Build a network from identifiers alone.
+
+        Parameters
+        ----------
+        catchment_ids: Sequence[str]
+            The identifiers of the catchments, in index order.
+        nexus_ids: Sequence[str]
+            The identifiers of the nexuses, in index order.
+        inflow_ids: Sequence[Optional[str]]
+            The identifier of the inflow nexus of each catchment, or ``None`` where it has none.
+        outflow_ids: Sequence[Optional[str]]
+            The identifier of the outflow nexus of each catchment, or ``None`` where it has none.
+        catchments: Optional[Sequence[Catchment]]
+            The optional catchment objects corresponding to ``catchment_ids``.
+        nexuses: Optional[Sequence[Nexus]]
+            The optional nexus objects corresponding to ``nexus_ids``.
+
+        Returns
+        -------
+        Network
+            A new network object.
+        """
+        nexus_index = {nid: i for i, nid in enumerate(nexus_ids)}
+
+        def lookup(ids: Sequence[Optional[str]]) -> np.ndarray:
+            try:
+                return np.fromiter((-1 if nid is None else nexus_index[nid] for nid in ids), dtype=np.int64,
+                                   count=len(ids))
+            except KeyError as e:
+                raise ValueError("Catchment references unknown nexus {}".format(e)) from None
+
+        return cls(catchment_ids=catchment_ids, nexus_ids=nexus_ids, catchment_inflow=lookup(inflow_ids),
+                   catchment_outflow=lookup(outflow_ids), catchments=catchments, nexuses=nexuses)
+
+    @classmethod
+    def from_arrow(cls, tables: Mapping[str, pa.Table]) -> Network:
+        """
+        Build a network from Arrow tables in the layout produced by ::method:`to_arrow`.
+
+        Parameters
+        ----------
+        tables: Mapping[str, pa.Table]
+            The tables, by name, of which only ``catchments`` is required.
+
+        Returns
+        -------
+        Network
+            A new network object, not retaining any objects.
+
+        See Also
+        -------
+        ::method:`from_pandas`
+        """
+        return cls.from_pandas(_tables.arrow_to_pandas(tables))
+
+    @classmethod
+    def from_pandas(cls, tables: Mapping[str, pd.DataFrame]) -> Network:
+        """
+        Build a network from data frames in the layout produced by ::method:`to_pandas`.
+
+        Only the ``catchments`` table is required.  Without a ``nexuses`` table, the nexuses are those referenced by the
+        catchments.  Any ``realizations`` table is attached to the new network's ::attribute:`realizations`, and any
+        ``flowpath_length`` and ``flowpath_celerity`` columns are set as the flowpath attributes, while derived
+        attribute columns are ignored, since they are recomputed on demand.
+
+        The round trip is partial: the new network does not retain objects, so the ``hydrolocations`` table is not
+        read.  ::method:`LazyNetwork.from_pandas` builds nexuses with these hydrolocations.
+
+        Parameters
+        ----------
+        tables: Mapping[str, pd.DataFrame]
+            The tables, by name.
+
+        Returns
+        -------
+        Network
+            A new network object, not retaining any objects.
+        """
+        network = cls(**_tables.network_arguments(tables))
+        realizations = tables.get("realizations")
+        if realizations is not None:
+            for kind, rows in realizations.groupby("kind", sort=False):
+                network.realizations.attach_table(rows, kind)
+        catchments = tables["catchments"]
+        if "flowpath_length" in catchments:
+            network.set_flowpath_attributes(catchments["flowpath_length"].to_numpy(dtype=np.float64),
+                                            catchments["flowpath_celerity"].to_numpy(dtype=np.float64)
+                                            if "flowpath_celerity" in catchments else None)
+        return network
+
+    @classmethod
+    def _from_arrays(cls,
+                     catchment_ids: np.ndarray,
+                     nexus_ids: np.ndarray,
+                     catchment_inflow: np.ndarray,
+                     catchment_outflow: np.ndarray,
+                     contributing: Tuple[np.ndarray, np.ndarray],
+                     receiving: Tuple[np.ndarray, np.ndarray],
+                     derived_arrays: Mapping[str, np.ndarray | Tuple[np.ndarray, ...]]) -> Network:
+        """
+        Wrap arrays already known to form a valid network, such as those of a published network, without copying or
+        checking them, and with identifier lookups only built when first needed, restoring any
+        ::attribute:`derived_arrays`.
+        """
+        network = cls.__new__(cls)
+        network._catchment_ids = catchment_ids
+        network._nexus_ids = nexus_ids
+        network._catchment_inflow = catchment_inflow
+        network._catchment_outflow = catchment_outflow
+        network._catchment_index = None
+        network._nexus_index = None
+        network._catchments = None
+        network._nexuses = None
+        network._contributing = contributing
+        network._receiving = receiving
+        network._cache = dict(derived_arrays)
+        network._topology_version = 0
+        network._realizations = None
+        network._flowpath_length = None
+        network._flowpath_celerity = None
+        return network
+
+    def __init__(self,
+                 catchment_ids: Sequence[str],
+                 nexus_ids: Sequence[str],
+                 catchment_inflow: np.ndarray,
+                 catchment_outflow: np.ndarray,
+                 catchments: Optional[Sequence[Catchment]] = None,
+                 nexuses: Optional[Sequence[Nexus]] = None):
+        """
+        Initialize from identifier arrays and index-based topology arrays.
+
+        Parameters
+        ----------
+        catchment_ids: Sequence[str]
+            The identifiers of the catchments, in index order.
+        nexus_ids: Sequence[str]
+            The identifiers of the nexuses, in index order.
+        catchment_inflow: np.ndarray
+            The index of the inflow nexus of each catchment, or ``-1`` where it has none.
+        catchment_outflow: np.ndarray
+            The index of the outflow nexus of each catchment, or ``-1`` where it has none.
+        catchments: Optional[Sequence[Catchment]]
+            The optional catchment objects corresponding to ``catchment_ids``.
+        nexuses: Optional[Sequence[Nexus]]
+            The optional nexus objects corresponding to ``nexus_ids``.
+        """
+        self._catchment_ids = np.asarray(catchment_ids, dtype=object)
+        self._nexus_ids = np.asarray(nexus_ids, dtype=object)
+        self._catchment_inflow = np.asarray(catchment_inflow, dtype=np.int64)
+        self._catchment_outflow = np.asarray(catchment_outflow, dtype=np.int64)
+        if self._catchment_inflow.shape != self._catchment_ids.shape or \
+                self._catchment_outflow.shape != self._catchment_ids.shape:
+            raise ValueError("Catchment inflow and outflow arrays must have one entry per catchment")
+        self._catchment_index: Optional[Dict[str, int]] = None
+        self._nexus_index: Optional[Dict[str, int]] = None
+        if len(self._catchment_lookup()) != self._catchment_ids.size:
+            raise ValueError("Catchment identifiers must be unique")
+        if len(self._nexus_lookup()) != self._nexus_ids.size:
+            raise ValueError("Nexus identifiers must be unique")
+        self._catchments = None if catchments is None else list(catchments)
+        self._nexuses = None if nexuses is None else list(nexuses)
+        self._cache: Dict[str, Any] = {}
+        self._topology_version = 0
+        self._realizations: Optional[RealizationIndex] = None
+        self._flowpath_length: Optional[np.ndarray] = None
+        self._flowpath_celerity: Optional[np.ndarray] = None
+        self._topology_changed()
+
+    def __len__(self) -> int:
+        return self.num_catchments
+
+    def __deepcopy__(self, memo: dict) -> Network:
+        # The copy is entered in the memo before its state is copied, so that state referring back to the network, such
+        # as its realization index, refers to the copy
+        network = memo[id(self)] = Network.__new__(Network)
+        state, graph, catchments, nexuses = self._flattened()
+        copied = copy.deepcopy(graph, memo)
+        memo.update(zip(graph._positions, copied.restore()))
+        # The memo is keyed by ids, so the flattened objects must outlive the operation
+        memo.setdefault(id(memo), []).append(graph)
+        return _restored_network(copy.deepcopy(state, memo), copied, catchments, nexuses, network)
+
+    def __reduce__(self):
+        return (_restored_network, self._flattened())
+
+    def _flattened(self) -> Tuple[Tuple[Any, ...], ObjectGraph, Optional[List[int]], Optional[List[int]]]:
+        # Retained objects are flattened into a single graph, rather than each saved with a graph of its own
+        state = tuple(None if name in ("_catchments", "_nexuses") else value
+                      for name, value in zip(slot_names(Network), slot_state(self)))
+        graph = ObjectGraph.flatten((self._catchments or []) + (self._nexuses or []))
+        catchments = None if self._catchments is None else [graph.position(c) for c in self._catchments]
+        nexuses = None if self._nexuses is None else [graph.position(n) for n in self._nexuses]
+        return state, graph, catchments, nexuses
+
+    @property
+    def catchment_ids(self) -> np.ndarray:
+        """
+        The identifiers of the network's catchments, in index order.
+
+        Returns
+        -------
+        np.ndarray
+            Array of catchment identifier strings.
+        """
+        return self._catchment_ids
+
+    @property
+    def catchment_inflow(self) -> np.ndarray:
+        """
+        The index of the inflow nexus of each catchment, or ``-1`` for catchments without one.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one entry per catchment.
+        """
+        return self._catchment_inflow
+
+    @property
+    def catchment_outflow(self) -> np.ndarray:
+        """
+        The index of the outflow nexus of each catchment, or ``-1`` for catchments without one.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one entry per catchment.
+        """
+        return self._catchment_outflow
+
+    @property
+    def conjoined_groups(self) -> ConjoinedIndex:
+        """
+        The index of groups of catchments connected by conjoint relationships, computed from the retained objects.
+
+        The relationships are read once, since ::attribute:`Catchment.conjoined_catchments` is not expected to change
+        after initialization; the index is only rebuilt after ::method:`refresh` or a change to the topology.
+
+        Returns
+        -------
+        ConjoinedIndex
+            The index of conjoined catchment groups.
+        """
+        return self._cached("conjoined_groups", ConjoinedIndex.from_network)
+
+    @property
+    def contributing(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The contributing catchments of every nexus, in compressed sparse row form.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The ``offsets`` and ``indices`` arrays, such that the catchments contributing to nexus ``n`` are
+            ``indices[offsets[n]:offsets[n + 1]]``.
+        """
+        return self._contributing
+
+    @property
+    def derived_arrays(self) -> Dict[str, np.ndarray | Tuple[np.ndarray, ...]]:
+        """
+        The derived values computed so far, such as the topological order and stream orders, which consist only of
+        numeric arrays, and so can be restored by ::class:`SharedNetwork` without recomputing them.
+
+        Returns
+        -------
+        Dict[str, np.ndarray | Tuple[np.ndarray, ...]]
+            Map of the keys of derived values to an array or a tuple of arrays.
+        """
+        def numeric(value: Any) -> bool:
+            return isinstance(value, np.ndarray) and value.dtype.kind != "O"
+
+        return {key: value for key, value in self._cache.items()
+                if numeric(value) or (isinstance(value, tuple) and all(numeric(v) for v in value))}
+
+    @property
+    def flowpath_celerity(self) -> Optional[np.ndarray]:
+        """
+        The flow celerity along the flowpath of each catchment, if set through ::method:`set_flowpath_attributes`.
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            Array of per-catchment celerities, in units of length per unit of time, or ``None``.
+        """
+        return self._flowpath_celerity
+
+    @property
+    def flowpath_length(self) -> Optional[np.ndarray]:
+        """
+        The length of the flowpath of each catchment, from its inflow to its outflow nexus, if set through
+        ::method:`set_flowpath_attributes`.
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            Array of per-catchment lengths, or ``None``.
+        """
+        return self._flowpath_length
+
+    @property
+    def has_objects(self) -> bool:
+        """
+        Whether this network retains the ::class:`Catchment` and ::class:`Nexus` objects it represents.
+
+        Returns
+        -------
+        bool
+            Whether this network retains the objects it represents.
+        """
+        return self._catchments is not None
+
+    @property
+    def has_realizations(self) -> bool:
+        """
+        Whether the network's ::attribute:`realizations` index has been created, which first accessing it does.
+
+        Returns
+        -------
+        bool
+            Whether the realization index exists.
+        """
+        return self._realizations is not None
+
+    @property
+    def nexus_ids(self) -> np.ndarray:
+        """
+        The identifiers of the network's nexuses, in index order.
+
+        Returns
+        -------
+        np.ndarray
+            Array of nexus identifier strings.
+        """
+        return self._nexus_ids
+
+    @property
+    def nexus_objects(self) -> Optional[Tuple[Nexus, ...]]:
+        """
+        The retained nexus objects, in index order.
+
+        Returns
+        -------
+        Optional[Tuple[Nexus, ...]]
+            The nexus objects, or ``None`` if the network does not retain them.
+        """
+        return None if self._nexuses is None else tuple(self._nexuses)
+
+    @property
+    def num_catchments(self) -> int:
+        return self._catchment_ids.size
+
+    @property
+    def num_nexuses(self) -> int:
+        return self._nexus_ids.size
+
+    @property
+    def realizations(self) -> RealizationIndex:
+        """
+        The index of realizations backing the network's catchments, created empty on first access.
+
+        Returns
+        -------
+        RealizationIndex
+            The index of realizations backing the network's catchments.
+        """
+        if self._realizations is None:
+            self._realizations = RealizationIndex(self)
+        return self._realizations
+
+    @property
+    def receiving(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The receiving catchments of every nexus, in compressed sparse row form.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The ``offsets`` and ``indices`` arrays, such that the catchments receiving from nexus ``n`` are
+            ``indices[offsets[n]:offsets[n + 1]]``.
+        """
+        return self._receiving
+
+    @property
+    def hydrologic_sequence(self) -> np.ndarray:
+        """
+        The hydrologic sequence number of each catchment, which is greater than that of every catchment upstream of it.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one entry per catchment.
+
+        See Also
+        -------
+        ::function:`ordering.hydrologic_sequence`
+        """
+        return self._cached("hydrologic_sequence", ordering.hydrologic_sequence)
+
+    @property
+    def is_mainstem(self) -> np.ndarray:
+        """
+        Whether each catchment lies on the mainstem of the whole basin it drains to.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean array with one entry per catchment.
+        """
+        return self._cached("is_mainstem", lambda net: self._is_outlet()[net.mainstem])
+
+    @property
+    def mainstem(self) -> np.ndarray:
+        """
+        The mainstem path of each catchment, identified by the index of the path's most downstream catchment.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one entry per catchment.
+
+        See Also
+        -------
+        ::function:`ordering.mainstem`
+        """
+        return self._cached("mainstem", ordering.mainstem)
+
+    @property
+    def shreve_magnitude(self) -> np.ndarray:
+        """
+        The Shreve magnitude of each catchment.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one entry per catchment.
+        """
+        return self._cached("shreve_magnitude", ordering.shreve_magnitude)
+
+    @property
+    def strahler_order(self) -> np.ndarray:
+        """
+        The Strahler stream order of each catchment.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one entry per catchment.
+        """
+        return self._cached("strahler_order", ordering.strahler_order)
+
+    @property
+    def topology_version(self) -> int:
+        """
+        Counter incremented every time the topology of this network changes.
+
+        Returns
+        -------
+        int
+            The current topology version.
+        """
+        return self._topology_version
+
+    def _cached(self, key: str, compute: Callable[[Network], Any]) -> Any:
+        """
+        Get a derived value from the cache, computing and caching it first if needed.
+        """
+        if key not in self._cache:
+            self._cache[key] = compute(self)
+        return self._cache[key]
+
+    def _catchment_lookup(self) -> Dict[str, int]:
+        if self._catchment_index is None:
+            self._catchment_index = {cid: i for i, cid in enumerate(self._catchment_ids.tolist())}
+        return self._catchment_index
+
+    def _is_outlet(self) -> np.ndarray:
+        """
+        Whether each catchment is an outlet, i.e., flows into no other catchment of the network.
+        """
+        outlet = np.ones(self.num_catchments, dtype=bool)
+        outlet[self.catchment_edges()[0]] = False
+        return outlet
+
+    def _nexus_lookup(self) -> Dict[str, int]:
+        if self._nexus_index is None:
+            self._nexus_index = {nid: i for i, nid in enumerate(self._nexus_ids.tolist())}
+        return self._nexus_index
+
+    def _nexus_position(self, nexus: Optional[int | str]) -> int:
+        if nexus is None:
+            return -1
+        return self.nexus_index(nexus) if isinstance(nexus, str) else int(nexus)
+
+    def _topology_changed(self):
+        """
+        Rebuild the derived nexus connections and clear cached values after a change to the topology arrays.
+        """
+        self._contributing = _csr(self._catchment_outflow, self.num_nexuses)
+        self._receiving = _csr(self._catchment_inflow, self.num_nexuses)
+        self._cache.clear()
+        self._topology_version += 1
+
+    def catchment(self, catchment: int | str) -> Catchment:
+        """
+        Get a retained catchment object by index or identifier.
+
+        Parameters
+        ----------
+        catchment: int | str
+            The index or identifier of the catchment.
+
+        Returns
+        -------
+        Catchment
+            The catchment object.
+        """
+        if self._catchments is None:
+            raise RuntimeError("Network does not retain catchment objects")
+        return self._catchments[self.catchment_index(catchment) if isinstance(catchment, str) else catchment]
+
+    def catchment_index(self, catchment_id: str) -> int:
+        """
+        Get the index of a catchment from its identifier.
+
+        Parameters
+        ----------
+        catchment_id: str
+            The catchment identifier.
+
+        Returns
+        -------
+        int
+            The index of the catchment within this network.
+        """
+        return self._catchment_lookup()[catchment_id]
+
+    def catchment_indices(self, catchment_ids: Iterable[str]) -> np.ndarray:
+        """
+        Get the indices of several catchments from their identifiers.
+
+        Parameters
+        ----------
+        catchment_ids: Iterable[str]
+            The catchment identifiers.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array of catchment indices.
+
+        Raises
+        ------
+        KeyError
+            If any of the identifiers is not of a catchment in this network.
+        """
+        id_index = self._cached("catchment_id_index", lambda net: pd.Index(net.catchment_ids))
+        catchment_ids = np.asarray(catchment_ids if isinstance(catchment_ids, (list, tuple, np.ndarray, pd.Series))
+                                   else list(catchment_ids), dtype=object)
+        indices = id_index.get_indexer(catchment_ids).astype(np.int64)
+        if (indices < 0).any():
+            raise KeyError("Unknown catchment(s) {}".format(list(catchment_ids[indices < 0])))
+        return indices
+
+    def catchment_edges(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The direct upstream-to-downstream connections between catchments.
+
+        There is an edge from catchment ``a`` to catchment ``b`` when the outflow nexus of ``a`` is the inflow nexus of
+        ``b``.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The arrays of upstream and downstream catchment indices of each edge.
+        """
+        def edges(net: Network) -> Tuple[np.ndarray, np.ndarray]:
+            upstream = np.flatnonzero(net.catchment_outflow >= 0)
+            owner, downstream = _csr_gather(*net.receiving, net.catchment_outflow[upstream])
+            return upstream[owner], downstream
+
+        return self._cached("edges", edges)
+
+    def contributing_catchments(self, nexus: int) -> np.ndarray:
+        """
+        The indices of the catchments contributing to a nexus.
+
+        Parameters
+        ----------
+        nexus: int
+            The nexus index.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array of catchment indices.
+        """
+        offsets, indices = self._contributing
+        return indices[offsets[nexus]:offsets[nexus + 1]]
+
+    def nexus(self, nexus: int | str) -> Nexus:
+        """
+        Get a retained nexus object by index or identifier.
+
+        Parameters
+        ----------
+        nexus: int | str
+            The index or identifier of the nexus.
+
+        Returns
+        -------
+        Nexus
+            The nexus object.
+        """
+        if self._nexuses is None:
+            raise RuntimeError("Network does not retain nexus objects")
+        return self._nexuses[self.nexus_index(nexus) if isinstance(nexus, str) else nexus]
+
+    def nexus_index(self, nexus_id: str) -> int:
+        """
+        Get the index of a nexus from its identifier.
+
+        Parameters
+        ----------
+        nexus_id: str
+            The nexus identifier.
+
+        Returns
+        -------
+        int
+            The index of the nexus within this network.
+        """
+        return self._nexus_lookup()[nexus_id]
+
+    def receiving_catchments(self, nexus: int) -> np.ndarray:
+        """
+        The indices of the catchments receiving from a nexus.
+
+        Parameters
+        ----------
+        nexus: int
+            The nexus index.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array of catchment indices.
+        """
+        offsets, indices = self._receiving
+        return indices[offsets[nexus]:offsets[nexus + 1]]
+
+    def subnetwork(self, catchments: np.ndarray) -> Network:
+        """
+        Create the subnetwork made up of the given catchments and every nexus they flow from or into.
+
+        Parameters
+        ----------
+        catchments: np.ndarray
+            The indices of the catchments to include, in the order they should have in the subnetwork.
+
+        Returns
+        -------
+        Network
+            The subnetwork, retaining objects if this network does.
+        """
+        catchments = np.asarray(catchments, dtype=np.int64)
+        inflow = self._catchment_inflow[catchments]
+        outflow = self._catchment_outflow[catchments]
+        referenced = np.concatenate((inflow, outflow))
+        nexuses, local = np.unique(referenced[referenced >= 0], return_inverse=True)
+        local_inflow = np.full(catchments.size, -1, dtype=np.int64)
+        local_outflow = np.full(catchments.size, -1, dtype=np.int64)
+        local_inflow[inflow >= 0] = local[:np.count_nonzero(inflow >= 0)]
+        local_outflow[outflow >= 0] = local[np.count_nonzero(inflow >= 0):]
+        network = Network(catchment_ids=self._catchment_ids[catchments], nexus_ids=self._nexus_ids[nexuses],
+                          catchment_inflow=local_inflow, catchment_outflow=local_outflow,
+                          catchments=None if self._catchments is None else [self._catchments[i] for i in catchments],
+                          nexuses=None if self._nexuses is None else [self._nexuses[i] for i in nexuses])
+        if self._flowpath_length is not None:
+            network.set_flowpath_attributes(self._flowpath_length[catchments],
+                                            None if self._flowpath_celerity is None else
+                                            self._flowpath_celerity[catchments])
+        return network
+
+    def downstream_closure(self, catchments: np.ndarray) -> np.ndarray:
+        """
+        Find the catchments downstream of any of several catchments, including the catchments themselves.
+
+        The closure is grown frontier by frontier, moving from each catchment through its outflow nexus to the
+        nexus's receiving catchments, so each frontier is handled with array operations.
+
+        Parameters
+        ----------
+        catchments: np.ndarray
+            The indices of the catchments to start from.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted integer array of the indices of every catchment reachable downstream, including those given.
+        """
+        reached = np.zeros(self.num_catchments, dtype=bool)
+        frontier = np.unique(np.asarray(catchments, dtype=np.int64))
+        reached[frontier] = True
+        while frontier.size > 0:
+            outflow = self._catchment_outflow[frontier]
+            _, downstream = _csr_gather(*self._receiving, outflow[outflow >= 0])
+            frontier = np.unique(downstream[~reached[downstream]])
+            reached[frontier] = True
+        return np.flatnonzero(reached)
+
+    def downstream_paths(self,
+                         sources: Iterable[str | HydroLocation],
+                         targets: Optional[Iterable[str | HydroLocation]] = None) -> pd.DataFrame:
+        """
+        Compute the flow path length and travel time from hydrolocations to the hydrolocations downstream of them.
+
+        Parameters
+        ----------
+        sources: Iterable[str | HydroLocation]
+            The source hydrolocations, or the identifiers of their nexuses.
+        targets: Optional[Iterable[str | HydroLocation]]
+            The target hydrolocations, or the identifiers of their nexuses, or ``None`` to use the sources.
+
+        Returns
+        -------
+        pd.DataFrame
+            Table with ``source_nexus_id``, ``target_nexus_id``, ``distance`` and ``travel_time`` columns, with a row
+            for every target downstream of a source.
+
+        See Also
+        -------
+        ::function:`paths.downstream_paths`
+        """
+        return _paths.downstream_paths(self, sources, targets)
+
+    def gauge_coverage(self, gauges: Optional[Iterable[NWISLocation]] = None) -> GaugeCoverage:
+        """
+        Label every catchment with its controlling gauge, the first gauge downstream of it, and its incremental gauge
+        basin.
+
+        Parameters
+        ----------
+        gauges: Optional[Iterable[NWISLocation]]
+            The gauges, or ``None`` for the hydrometric stations realized by the network's retained nexus objects.
+
+        Returns
+        -------
+        GaugeCoverage
+            The labelling, to which further gauges can be added.
+        """
+        return GaugeCoverage(self, gauges)
+
+    def mainstem_path(self, catchment: int | str) -> np.ndarray:
+        """
+        The catchments of the mainstem path that a catchment belongs to.
+
+        Parameters
+        ----------
+        catchment: int | str
+            The index or identifier of the catchment.
+
+        Returns
+        -------
+        np.ndarray
+            The indices of the catchments of the path, in upstream-to-downstream order.
+        """
+        index = self.catchment_index(catchment) if isinstance(catchment, str) else catchment
+
+        def group(net: Network) -> Tuple[np.ndarray, np.ndarray]:
+            by_sequence = np.argsort(net.hydrologic_sequence)
+            offsets, indices = _csr(net.mainstem[by_sequence], net.num_catchments)
+            return offsets, by_sequence[indices]
+
+        offsets, indices = self._cached("mainstem_paths", group)
+        path = self.mainstem[index]
+        return indices[offsets[path]:offsets[path + 1]]
+
+    def refresh(self):
+        """
+        Re-read the inflow and outflow of every retained catchment object, for when those objects have been changed.
+
+        Every cached derived value is discarded, including the ::attribute:`conjoined_groups`, which are read again from
+        the objects when next accessed.
+        """
+        if self._catchments is None:
+            raise RuntimeError("Network does not retain catchment objects")
+        nexus_index = self._nexus_lookup()
+        for nexus in (n for c in self._catchments for n in (c.inflow, c.outflow)):
+            if nexus is not None and nexus.id not in nexus_index:
+                raise ValueError("Catchment references unknown nexus {}".format(nexus.id))
+        self._catchment_inflow = np.fromiter(
+            (-1 if c.inflow is None else nexus_index[c.inflow.id] for c in self._catchments),
+            dtype=np.int64, count=self.num_catchments)
+        self._catchment_outflow = np.fromiter(
+            (-1 if c.outflow is None else nexus_index[c.outflow.id] for c in self._catchments),
+            dtype=np.int64, count=self.num_catchments)
+        self._topology_changed()
+
+    def set_flowpath_attributes(self, length: np.ndarray, celerity: Optional[np.ndarray] = None):
+        """
+        Set the length of the flowpath of each catchment, and optionally the flow celerity along it, for flow path
+        distance and travel time queries.
+
+        Parameters
+        ----------
+        length: np.ndarray
+            The flowpath length of each catchment, in index order.
+        celerity: Optional[np.ndarray]
+            The positive flow celerity of each catchment, in index order, or ``None`` if travel times are not needed.
+        """
+        length = np.asarray(length, dtype=np.float64)
+        if length.shape != self._catchment_ids.shape:
+            raise ValueError("Flowpath lengths must have one entry per catchment")
+        if celerity is not None:
+            celerity = np.asarray(celerity, dtype=np.float64)
+            if celerity.shape != self._catchment_ids.shape:
+                raise ValueError("Flowpath celerities must have one entry per catchment")
+            if not (celerity > 0).all():
+                raise ValueError("Flowpath celerities must be positive")
+        self._flowpath_length = length
+        self._flowpath_celerity = celerity
+
+    def set_inflow(self, catchment: int | str, nexus: Optional[int | str]):
+        """
+        Change the inflow nexus of a catchment within this network's topology.
+
+        Retained catchment and nexus objects are not modified.
+
+        Parameters
+        ----------
+        catchment: int | str
+            The index or identifier of the catchment.
+        nexus: Optional[int | str]
+            The index or identifier of the new inflow nexus, or ``None`` to remove the catchment's inflow.
+        """
+        index = self.catchment_index(catchment) if isinstance(catchment, str) else catchment
+        self._catchment_inflow[index] = self._nexus_position(nexus)
+        self._topology_changed()
+
+    def set_outflow(self, catchment: int | str, nexus: Optional[int | str]):
+        """
+        Change the outflow nexus of a catchment within this network's topology.
+
+        Retained catchment and nexus objects are not modified.
+
+        Parameters
+        ----------
+        catchment: int | str
+            The index or identifier of the catchment.
+        nexus: Optional[int | str]
+            The index or identifier of the new outflow nexus, or ``None`` to remove the catchment's outflow.
+        """
+        index = self.catchment_index(catchment) if isinstance(catchment, str) else catchment
+        self._catchment_outflow[index] = self._nexus_position(nexus)
+        self._topology_changed()
+
+    def validate(self) -> ValidationReport:
+        """
+        Validate the topology invariants of the objects this network retains.
+
+        Returns
+        -------
+        ValidationReport
+            The report of all issues found.
+
+        See Also
+        -------
+        ::function:`validation.validate`
+        """
+        if self._catchments is None:
+            raise RuntimeError("Network does not retain catchment objects")
+        return validate(self._catchments, self._nexuses or tuple())
+
+    def to_arrow(self, attributes: bool = True) -> Dict[str, pa.Table]:
+        """
+        Export the network as Arrow tables, for analysis with Arrow-based tools without per-row conversion.
+
+        Parameters
+        ----------
+        attributes: bool
+            Whether to include derived per-catchment attributes, which requires the network to be acyclic.
+
+        Returns
+        -------
+        Dict[str, pa.Table]
+            The ``catchments``, ``nexuses``, ``edges``, ``hydrolocations`` and ``realizations`` tables.
+
+        See Also
+        -------
+        ::function:`tables.to_arrow`
+        """
+        return _tables.to_arrow(self, attributes)
+
+    def to_pandas(self, attributes: bool = True) -> Dict[str, pd.DataFrame]:
+        """
+        Export the network as data frames built directly from its arrays.
+
+        Parameters
+        ----------
+        attributes: bool
+            Whether to include derived per-catchment attributes, which requires the network to be acyclic.
+
+        Returns
+        -------
+        Dict[str, pd.DataFrame]
+            The ``catchments``, ``nexuses``, ``edges``, ``hydrolocations`` and ``realizations`` tables.
+
+        See Also
+        -------
+        ::function:`tables.to_pandas`
+        """
+        return _tables.to_pandas(self, attributes)
+
+    def topological_levels(self) -> np.ndarray:
+        """
+        The topological level of each catchment: ``0`` for headwaters, and otherwise one more than the greatest level
+        of the catchments directly upstream of it.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one entry per catchment.
+
+        Raises
+        ------
+        ValueError
+            If the network contains a cycle.
+        """
+        return self._cached("topology", _sort_topologically)[1]
+
+    def topological_order(self) -> np.ndarray:
+        """
+        Order the network's catchments so that every catchment comes after all catchments upstream of it.
+
+        The order is computed frontier by frontier, starting from the headwater catchments, with each frontier handled
+        as a whole using array operations.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array of all catchment indices, in upstream-to-downstream order.
+
+        Raises
+        ------
+        ValueError
+            If the network contains a cycle, in which case no such order exists.
+        """
+        return self._cached("topology", _sort_topologically)[0]
+
+
+def _sort_topologically(network: Network) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the topological order and level of every catchment of a network, one frontier at a time.
+    """
+    n = network.num_catchments
+    upstream, downstream = network.catchment_edges()
+    offsets, indices = _csr(upstream, n)
+    indices = downstream[indices]
+    in_degree = np.bincount(downstream, minlength=n)
+    frontier = np.flatnonzero(in_degree == 0)
+    levels = np.full(n, -1, dtype=np.int64)
+    order: List[np.ndarray] = []
+    while frontier.size > 0:
+        levels[frontier] = len(order)
+        order.append(frontier)
+        _, next_catchments = _csr_gather(offsets, indices, frontier)
+        # Only the degrees of the catchments the frontier flows into change, keeping the sort linear overall
+        np.subtract.at(in_degree, next_catchments, 1)
+        next_catchments = np.unique(next_catchments)
+        frontier = next_catchments[in_degree[next_catchments] == 0]
+    order = np.concatenate(order) if order else np.empty(0, dtype=np.int64)
+    if order.size != n:
+        raise ValueError("Network contains a cycle")
+    return order, levels
+
+
+def _restored_network(state: Tuple[Any, ...], graph: ObjectGraph, catchments: Optional[List[int]],
+                      nexuses: Optional[List[int]], network: Optional[Network] = None) -> Network:
+    network = set_slot_state(Network.__new__(Network) if network is None else network, state)
+    restored = graph.restore()
+    network._catchments = None if catchments is None else [restored[i] for i in catchments]
+    network._nexuses = None if nexuses is None else [restored[i] for i in nexuses]
+    return network
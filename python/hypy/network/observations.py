@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import numpy as np
+import pandas as pd
+
+from typing import Mapping, Optional, Sequence, TYPE_CHECKING
+
+from ..hydrolocation.nwis_location import gather_data
+from .network import Network
+
+if TYPE_CHECKING:
+    from ..hydrolocation import NWISLocation
+
+# Factors converting each supported flow unit to cubic meters per second
+FLOW_UNIT_FACTORS: Mapping[str, float] = {
+    "m3/s": 1.0,
+    "cms": 1.0,
+    "ft3/s": 0.028316846592,
+    "cfs": 0.028316846592,
+}
+
+
+class AlignedObservations:
+    """
+    Observations for many gauges aligned to a common time axis and to the nexuses of a ::class:`Network`.
+
+    Values are held in a dense time by gauge array, alongside a mask of which entries actually have observations.
+    Column ``j`` holds the observations of the gauge at nexus ``nexus_indices[j]``, so simulated time by nexus flows
+    can be aligned with ``simulated[:, nexus_indices]``.
+    """
+
+    __slots__ = ["_time", "_values", "_mask", "_nexus_indices", "_station_ids"]
+
+    def __init__(self, time: pd.DatetimeIndex, values: np.ndarray, mask: np.ndarray, nexus_indices: np.ndarray,
+                 station_ids: np.ndarray):
+        """
+        Initialize from already-aligned arrays.
+
+        Parameters
+        ----------
+        time: pd.DatetimeIndex
+            The time axis, labelling the start of each timestep.
+        values: np.ndarray
+            The time by gauge array of observed values, with ``NaN`` where there are no observations.
+        mask: np.ndarray
+            The time by gauge boolean array indicating where there are observations.
+        nexus_indices: np.ndarray
+            The index of the network nexus realized by each gauge.
+        station_ids: np.ndarray
+            The station identifier of each gauge.
+        """
+        self._time = time
+        self._values = values
+        self._mask = mask
+        self._nexus_indices = nexus_indices
+        self._station_ids = station_ids
+
+    @property
+    def mask(self) -> np.ndarray:
+        """
+        Time by gauge boolean array indicating which entries of ::attribute:`values` are observed.
+
+        Returns
+        -------
+        np.ndarray
+            Time by gauge boolean array indicating which entries of ::attribute:`values` are observed.
+        """
+        return self._mask
+
+    @property
+    def nexus_indices(self) -> np.ndarray:
+        """
+        The network index of the nexus realized by each gauge.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one entry per gauge.
+        """
+        return self._nexus_indices
+
+    @property
+    def num_gauges(self) -> int:
+        return self._station_ids.size
+
+    @property
+    def station_ids(self) -> np.ndarray:
+        return self._station_ids
+
+    @property
+    def time(self) -> pd.DatetimeIndex:
+        return self._time
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        Time by gauge array of observed values, averaged over each timestep, with ``NaN`` where none were observed.
+
+        Returns
+        -------
+        np.ndarray
+            Time by gauge array of observed values.
+        """
+        return self._values
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        The aligned observations as a time-indexed data frame, with a column per gauge station.
+
+        Returns
+        -------
+        pd.DataFrame
+            The aligned observations as a time-indexed data frame.
+        """
+        return pd.DataFrame(self._values, index=self._time, columns=self._station_ids)
+
+
+def _to_naive_utc(times: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    return times if times.tz is None else times.tz_convert("UTC").tz_localize(None)
+
+
+def align_observations(network: Network,
+                       locations: Sequence[NWISLocation],
+                       time: pd.DatetimeIndex,
+                       data: Optional[Sequence[pd.DataFrame]] = None,
+                       units: str = "m3/s",
+                       nodata: float = -999999.0) -> AlignedObservations:
+    """
+    Align the observations of many NWIS gauges to a network's nexuses and a simulation time axis.
+
+    Observations of all gauges are combined and handled together: values are converted to ``units`` according to
+    their ``measurement_unit`` column (when present), binned into the timesteps of ``time``, and averaged within each
+    timestep.  A timestep spans from its label up to the next label, with the final timestep spanning the same
+    duration as the one before it (or the index frequency, if it has one).
+
+    Parameters
+    ----------
+    network: Network
+        The network whose nexuses the gauges realize.
+    locations: Sequence[NWISLocation]
+        The gauge locations.
+    time: pd.DatetimeIndex
+        The simulation time axis.
+    data: Optional[Sequence[pd.DataFrame]]
+        The observation data of each location, as from ::method:`NWISLocation.get_data`, or ``None`` to retrieve it
+        concurrently for the span of ``time`` (which must then not be called from within a running event loop).
+    units: str
+        The flow units to convert values to.
+    nodata: float
+        Value marking missing observations.
+
+    Returns
+    -------
+    AlignedObservations
+        The aligned observations.
+    """
+    time = _to_naive_utc(pd.DatetimeIndex(time))
+    if time.size > 1:
+        step = time.freq if time.freq is not None else time[-1] - time[-2]
+    elif time.freq is not None:
+        step = time.freq
+    else:
+        raise ValueError("Cannot determine the timestep of a single-entry time axis without a frequency")
+    edges = np.append(time.to_numpy("datetime64[ns]"), (time[-1] + step).to_datetime64().astype("datetime64[ns]"))
+    if units not in FLOW_UNIT_FACTORS:
+        raise ValueError("Unsupported flow units {}".format(units))
+
+    if data is None:
+        data = asyncio.run(gather_data(locations, start=time[0], end=edges[-1]))
+    if len(data) != len(locations):
+        raise ValueError("Observation data must be given for each location")
+    nexus_indices = np.fromiter((network.nexus_index(location.realized_nexus) for location in locations),
+                                dtype=np.int64, count=len(locations))
+    station_ids = np.array([location.station_id for location in locations], dtype=object)
+
+    num_steps, num_gauges = time.size, len(locations)
+    gauge = np.repeat(np.arange(num_gauges), [len(frame) for frame in data])
+    combined = pd.concat(list(data), ignore_index=True) if num_gauges > 0 else pd.DataFrame()
+    if combined.empty:
+        return AlignedObservations(time, np.full((num_steps, num_gauges), np.nan),
+                                   np.zeros((num_steps, num_gauges), dtype=bool), nexus_indices, station_ids)
+
+    values = combined["value"].to_numpy(dtype=np.float64, copy=True)
+    values[values == nodata] = np.nan
+    if "measurement_unit" in combined:
+        factors = combined["measurement_unit"].astype(str).map(FLOW_UNIT_FACTORS).to_numpy(dtype=np.float64)
+        if np.isnan(factors).any():
+            unknown = set(combined["measurement_unit"][np.isnan(factors)].astype(str))
+            raise ValueError("Unsupported observation units {}".format(sorted(unknown)))
+        values *= factors / FLOW_UNIT_FACTORS[units]
+
+    observed_at = _to_naive_utc(pd.DatetimeIndex(combined["value_time"])).to_numpy("datetime64[ns]")
+    bins = np.searchsorted(edges, observed_at, side="right") - 1
+    valid = (bins >= 0) & (bins < num_steps) & ~np.isnan(values)
+    cells = bins[valid] * num_gauges + gauge[valid]
+    sums = np.bincount(cells, weights=values[valid], minlength=num_steps * num_gauges)
+    counts = np.bincount(cells, minlength=num_steps * num_gauges)
+    mask = counts > 0
+    aligned = np.full(num_steps * num_gauges, np.nan)
+    aligned[mask] = sums[mask] / counts[mask]
+    return AlignedObservations(time, aligned.reshape(num_steps, num_gauges), mask.reshape(num_steps, num_gauges),
+                               nexus_indices, station_ids)
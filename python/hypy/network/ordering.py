@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import numpy as np
+
+from typing import Iterator, Tuple, TYPE_CHECKING
+
+from ._arrays import _csr
+
+if TYPE_CHECKING:
+    from .network import Network
+
+
+def _edges_by_level(network: Network) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Iterate over the topological levels of a network after the first, with the catchment edges flowing into each.
+
+    Yields
+    ------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        The distinct downstream catchments of the level, the upstream catchment of each edge into the level, and the
+        position within the distinct downstream catchments of each edge's downstream catchment.
+    """
+    levels = network.topological_levels()
+    upstream, downstream = network.catchment_edges()
+    offsets, indices = _csr(levels[downstream], int(levels.max()) + 1 if levels.size > 0 else 0)
+    for level in range(1, offsets.size - 1):
+        edges = indices[offsets[level]:offsets[level + 1]]
+        targets, position = np.unique(downstream[edges], return_inverse=True)
+        yield targets, upstream[edges], position
+
+
+def strahler_order(network: Network) -> np.ndarray:
+    """
+    Compute the Strahler stream order of every catchment of a network.
+
+    Parameters
+    ----------
+    network: Network
+        The network.
+
+    Returns
+    -------
+    np.ndarray
+        The Strahler order of each catchment.
+    """
+    order = np.ones(network.num_catchments, dtype=np.int64)
+    for targets, sources, position in _edges_by_level(network):
+        incoming = order[sources]
+        highest = np.zeros(targets.size, dtype=np.int64)
+        np.maximum.at(highest, position, incoming)
+        ties = np.bincount(position[incoming == highest[position]], minlength=targets.size)
+        order[targets] = np.where(ties > 1, highest + 1, highest)
+    return order
+
+
+def shreve_magnitude(network: Network) -> np.ndarray:
+    """
+    Compute the Shreve magnitude of every catchment of a network.
+
+    Parameters
+    ----------
+    network: Network
+        The network.
+
+    Returns
+    -------
+    np.ndarray
+        The Shreve magnitude of each catchment.
+    """
+    magnitude = np.ones(network.num_catchments, dtype=np.int64)
+    for targets, sources, position in _edges_by_level(network):
+        magnitude[targets] = np.bincount(position, weights=magnitude[sources], minlength=targets.size)
+    return magnitude
+
+
+def hydrologic_sequence(network: Network) -> np.ndarray:
+    """
+    Compute the hydrologic sequence number of every catchment of a network.
+
+    The sequence numbers are the positions of the catchments in an upstream-to-downstream ordering, so every catchment
+    has a greater number than all catchments upstream of it.
+
+    Parameters
+    ----------
+    network: Network
+        The network.
+
+    Returns
+    -------
+    np.ndarray
+        The hydrologic sequence number of each catchment.
+    """
+    sequence = np.empty(network.num_catchments, dtype=np.int64)
+    sequence[network.topological_order()] = np.arange(network.num_catchments)
+    return sequence
+
+
+def mainstem(network: Network) -> np.ndarray:
+    """
+    Compute the mainstem path each catchment of a network belongs to.
+
+    Paths are traced upstream from each outlet, continuing at every confluence along the upstream catchment of greatest
+    Shreve magnitude (then greatest Strahler order, then lowest index).  Every other upstream catchment at the
+    confluence starts a new path, which is identified by the index of its most downstream catchment.  Where a nexus
+    flows into several catchments, only the first is treated as downstream.
+
+    Parameters
+    ----------
+    network: Network
+        The network.
+
+    Returns
+    -------
+    np.ndarray
+        The index of the most downstream catchment of the path each catchment belongs to.
+    """
+    n = network.num_catchments
+    upstream, downstream = network.catchment_edges()
+    magnitude = network.shreve_magnitude
+    strahler = network.strahler_order
+    # The first receiving catchment of each catchment's outflow nexus is its downstream catchment along paths
+    first = np.unique(upstream, return_index=True)[1]
+    primary = np.full(n, -1, dtype=np.int64)
+    primary[upstream[first]] = downstream[first]
+    edges = np.flatnonzero(primary[upstream] == downstream)
+
+    # Choose each catchment's main upstream catchment by sorting edges on downstream, then preference
+    chosen = edges[np.lexsort((upstream[edges], -strahler[upstream[edges]], -magnitude[upstream[edges]],
+                               downstream[edges]))]
+    chosen = chosen[np.unique(downstream[chosen], return_index=True)[1]]
+    parent = np.arange(n, dtype=np.int64)
+    parent[upstream[chosen]] = downstream[chosen]
+    # Each catchment joins the path of its main downstream catchment, resolved one level at a time from downstream
+    levels = network.topological_levels()
+    offsets, indices = _csr(levels, int(levels.max()) + 1 if n > 0 else 0)
+    path = np.arange(n, dtype=np.int64)
+    for level in range(offsets.size - 2, -1, -1):
+        members = indices[offsets[level]:offsets[level + 1]]
+        path[members] = path[parent[members]]
+    return path
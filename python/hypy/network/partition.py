@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import time
+import numpy as np
+import pandas as pd
+
+from queue import Empty
+from typing import Dict, List, Mapping, Optional, Tuple, TYPE_CHECKING
+
+from ._arrays import _csr
+from .network import Network
+from .simulation import NexusTransfer, Response, formulation_response
+
+if TYPE_CHECKING:
+    from ..catchment import Catchment
+
+# Seconds to wait for partition results before checking whether any worker has exited without reporting
+_POLL_INTERVAL = 0.5
+
+
+def formulation_weights(network: Network, costs: Mapping[str, float], default: float = 1.0) -> np.ndarray:
+    """
+    Derive partitioning weights for catchments from the relative cost of their formulation types.
+
+    Parameters
+    ----------
+    network: Network
+        The network, which must retain its catchment objects.
+    costs: Mapping[str, float]
+        Relative cost of each formulation type, keyed by ::method:`Formulation.get_formulation_type` value.
+    default: float
+        The cost of catchments whose formulation type is not in ``costs`` or which have no formulation.
+
+    Returns
+    -------
+    np.ndarray
+        The weight of each catchment.
+    """
+    def cost(catchment: Catchment) -> float:
+        formulation = getattr(catchment, "formulation", None)
+        return default if formulation is None else costs.get(formulation.get_formulation_type(), default)
+
+    return np.fromiter((cost(network.catchment(i)) for i in range(network.num_catchments)), dtype=np.float64,
+                       count=network.num_catchments)
+
+
+class Partitioning:
+    """
+    An assignment of every catchment of a ::class:`Network` to one of several partitions.
+
+    Partitions exchange water only through boundary nexuses, which are those having contributing or receiving
+    catchments in more than one partition.  Flows are exchanged according to the ::attribute:`boundary_exchange` table,
+    which has a row for every boundary nexus, partition contributing to it (the source), and partition needing its
+    total flow (the destination).  The destinations of a nexus are the partitions of its receiving catchments, or for a
+    nexus without receiving catchments, its owning partition.
+    """
+
+    __slots__ = ["_network", "_labels", "_num_partitions", "_members", "_owners", "_exchange"]
+
+    def __init__(self, network: Network, labels: np.ndarray):
+        """
+        Initialize from the partition label of each catchment.
+
+        Parameters
+        ----------
+        network: Network
+            The partitioned network.
+        labels: np.ndarray
+            The partition index of each catchment, numbered contiguously from ``0``.
+        """
+        self._network = network
+        self._labels = np.asarray(labels, dtype=np.int64)
+        if self._labels.shape != (network.num_catchments,):
+            raise ValueError("Partition labels must have one entry per catchment")
+        self._num_partitions = int(self._labels.max()) + 1 if self._labels.size > 0 else 0
+        order = np.argsort(self._labels, kind="stable")
+        bounds = np.searchsorted(self._labels[order], np.arange(self._num_partitions + 1))
+        self._members = [order[bounds[p]:bounds[p + 1]] for p in range(self._num_partitions)]
+        self._owners, self._exchange = self._build_exchange()
+
+    def _build_exchange(self) -> Tuple[np.ndarray, pd.DataFrame]:
+        net = self._network
+        has_outflow = net.catchment_outflow >= 0
+        has_inflow = net.catchment_inflow >= 0
+        sources = pd.DataFrame({"nexus_index": net.catchment_outflow[has_outflow],
+                                "source_partition": self._labels[has_outflow]}).drop_duplicates()
+        receivers = pd.DataFrame({"nexus_index": net.catchment_inflow[has_inflow],
+                                  "destination_partition": self._labels[has_inflow]}).drop_duplicates()
+
+        owners = np.full(net.num_nexuses, -1, dtype=np.int64)
+        first_source = sources.groupby("nexus_index")["source_partition"].min()
+        owners[first_source.index.to_numpy()] = first_source.to_numpy()
+        first_receiver = receivers.groupby("nexus_index")["destination_partition"].min()
+        owners[first_receiver.index.to_numpy()] = first_receiver.to_numpy()
+
+        terminal = np.setdiff1d(first_source.index.to_numpy(), first_receiver.index.to_numpy())
+        destinations = pd.concat([receivers, pd.DataFrame({"nexus_index": terminal,
+                                                           "destination_partition": owners[terminal]})])
+        exchange = sources.merge(destinations, on="nexus_index")
+        exchange = exchange[exchange["source_partition"] != exchange["destination_partition"]]
+        exchange = exchange.sort_values(["nexus_index", "source_partition", "destination_partition"])
+        exchange.insert(0, "nexus_id", net.nexus_ids[exchange["nexus_index"].to_numpy()])
+        return owners, exchange.reset_index(drop=True)
+
+    @property
+    def boundary_exchange(self) -> pd.DataFrame:
+        """
+        The table of boundary nexus flow exchanges between partitions.
+
+        Returns
+        -------
+        pd.DataFrame
+            Table with ``nexus_id``, ``nexus_index``, ``source_partition`` and ``destination_partition`` columns.
+        """
+        return self._exchange
+
+    @property
+    def cut_nexuses(self) -> np.ndarray:
+        """
+        The indices of the boundary nexuses, across which flow must be exchanged between partitions.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted integer array of nexus indices.
+        """
+        return np.unique(self._exchange["nexus_index"].to_numpy())
+
+    @property
+    def labels(self) -> np.ndarray:
+        """
+        The partition index of each catchment.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one entry per catchment of the network.
+        """
+        return self._labels
+
+    @property
+    def network(self) -> Network:
+        return self._network
+
+    @property
+    def num_partitions(self) -> int:
+        return self._num_partitions
+
+    @property
+    def nexus_owners(self) -> np.ndarray:
+        """
+        The partition responsible for reporting the total flow of each nexus, or ``-1`` for unconnected nexuses.
+
+        Returns
+        -------
+        np.ndarray
+            Integer array with one entry per nexus of the network.
+        """
+        return self._owners
+
+    def members(self, partition: int) -> np.ndarray:
+        """
+        The indices of the catchments in a partition.
+
+        Parameters
+        ----------
+        partition: int
+            The partition index.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted integer array of catchment indices.
+        """
+        return self._members[partition]
+
+    def subnetwork(self, partition: int) -> Network:
+        """
+        The subnetwork of a partition, including the boundary nexuses its catchments connect to.
+
+        Parameters
+        ----------
+        partition: int
+            The partition index.
+
+        Returns
+        -------
+        Network
+            The subnetwork for the partition.
+        """
+        return self._network.subnetwork(self._members[partition])
+
+    def weights(self, catchment_weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        The total weight of each partition.
+
+        Parameters
+        ----------
+        catchment_weights: Optional[np.ndarray]
+            The weight of each catchment, or ``None`` to count catchments.
+
+        Returns
+        -------
+        np.ndarray
+            The total weight of each partition.
+        """
+        return np.bincount(self._labels, weights=catchment_weights, minlength=self._num_partitions)
+
+
+def partition_network(network: Network, num_partitions: int, weights: Optional[np.ndarray] = None) -> Partitioning:
+    """
+    Split a network into balanced sub-basin partitions, cutting only at nexuses.
+
+    Catchments are visited in upstream-to-downstream order, accumulating the weight of the not-yet-partitioned
+    sub-basin draining through each one.  Once that weight reaches the per-partition target, the sub-basin is closed as
+    a partition, cutting the network at a single nexus: the outflow of the sub-basin's outlet catchment.  When joining
+    tributaries together overshoot the target, the larger tributaries are first closed as partitions of their own.
+    Whatever remains once ``num_partitions - 1`` partitions have been closed forms the last partition.
+
+    Where a nexus flows into several catchments, the sub-basin is grown along the first of them.
+
+    Parameters
+    ----------
+    network: Network
+        The network to partition.
+    num_partitions: int
+        The maximum number of partitions to create.
+    weights: Optional[np.ndarray]
+        The weight of each catchment (e.g., from ::function:`formulation_weights`), or ``None`` to weigh catchments
+        equally.
+
+    Returns
+    -------
+    Partitioning
+        The resulting partitioning.
+    """
+    if num_partitions < 1:
+        raise ValueError("Number of partitions must be positive")
+    n = network.num_catchments
+    weights = np.ones(n, dtype=np.float64) if weights is None else np.asarray(weights, dtype=np.float64)
+    if weights.shape != (n,):
+        raise ValueError("Partition weights must have one entry per catchment")
+
+    offsets, indices = network.receiving
+    primary = np.full(n, -1, dtype=np.int64)
+    outflow = network.catchment_outflow
+    routed = np.flatnonzero((outflow >= 0) & (offsets[outflow + 1] > offsets[outflow]))
+    primary[routed] = indices[offsets[outflow[routed]]]
+
+    tributary_offsets, tributary_indices = _csr(primary, n)
+    target = weights.sum() / num_partitions
+    accumulated = weights.copy()
+    is_outlet = np.zeros(n, dtype=bool)
+    closed = 0
+    for c in network.topological_order():
+        if closed < num_partitions - 1 and accumulated[c] > target:
+            # Where several open tributaries join to overshoot the target, close the substantial ones on their own first
+            tributaries = tributary_indices[tributary_offsets[c]:tributary_offsets[c + 1]]
+            tributaries = tributaries[~is_outlet[tributaries]]
+            for u in tributaries[np.argsort(-accumulated[tributaries], kind="stable")]:
+                if closed == num_partitions - 1 or accumulated[c] <= target or accumulated[u] < target / 2:
+                    break
+                is_outlet[u] = True
+                closed += 1
+                accumulated[c] -= accumulated[u]
+        if closed < num_partitions - 1 and accumulated[c] >= target:
+            is_outlet[c] = True
+            closed += 1
+        elif primary[c] >= 0:
+            accumulated[primary[c]] += accumulated[c]
+
+    # Label each catchment from the nearest outlet along its primary downstream path, working downstream to upstream
+    labels = np.full(n, -1, dtype=np.int64)
+    outlets = np.flatnonzero(is_outlet)
+    labels[outlets] = np.arange(outlets.size)
+    for c in network.topological_order()[::-1]:
+        if labels[c] < 0:
+            labels[c] = labels[primary[c]] if primary[c] >= 0 else -1
+    labels[labels < 0] = outlets.size
+    _, labels = np.unique(labels, return_inverse=True)
+    return Partitioning(network, labels)
+
+
+class _PartitionWorker:
+    """
+    The state and step logic for running a single partition, including its boundary flow exchanges.
+    """
+
+    __slots__ = ["partitioning", "partition", "catchments", "nexuses", "transfer", "sends", "receives", "owned"]
+
+    def __init__(self, partitioning: Partitioning, partition: int):
+        net = partitioning.network
+        self.partitioning = partitioning
+        self.partition = partition
+        self.catchments = partitioning.members(partition)
+        inflow = net.catchment_inflow[self.catchments]
+        outflow = net.catchment_outflow[self.catchments]
+        self.nexuses = np.unique(np.concatenate((inflow[inflow >= 0], outflow[outflow >= 0])))
+        offsets, _ = net.receiving
+        self.transfer = NexusTransfer(np.where(inflow >= 0, np.searchsorted(self.nexuses, inflow), -1),
+                                      np.where(outflow >= 0, np.searchsorted(self.nexuses, outflow), -1),
+                                      offsets[self.nexuses + 1] - offsets[self.nexuses])
+
+        exchange = partitioning.boundary_exchange
+        outgoing = exchange[exchange["source_partition"] == partition]
+        incoming = exchange[exchange["destination_partition"] == partition]
+        self.sends = {int(d): np.searchsorted(self.nexuses, g["nexus_index"].to_numpy())
+                      for d, g in outgoing.groupby("destination_partition")}
+        self.receives = {int(s): np.searchsorted(self.nexuses, g["nexus_index"].to_numpy())
+                         for s, g in incoming.groupby("source_partition")}
+        self.owned = np.flatnonzero(partitioning.nexus_owners[self.nexuses] == partition)
+
+    def run(self, forcing: np.ndarray, response: Response, inboxes: List[mp.Queue]) -> np.ndarray:
+        net = self.partitioning.network
+        num_steps = forcing.shape[0]
+        nexus_flow = np.zeros(self.nexuses.size, dtype=np.float64)
+        results = np.empty((num_steps, self.owned.size), dtype=np.float64)
+        pending: Dict[Tuple[int, int], np.ndarray] = {}
+        for step in range(num_steps):
+            inputs = forcing[step, self.catchments] + self.transfer.scatter(nexus_flow)
+            outputs = response(net, self.catchments, inputs, step)
+            nexus_flow = self.transfer.gather(outputs)
+            for destination, positions in self.sends.items():
+                inboxes[destination].put((self.partition, step, nexus_flow[positions]))
+            # Only nexuses for which this partition is a destination (including all it owns or receives from) hold
+            # complete flows after this, which are the only ones used
+            for source, positions in self.receives.items():
+                while (source, step) not in pending:
+                    message_source, message_step, values = inboxes[self.partition].get()
+                    pending[(message_source, message_step)] = values
+                nexus_flow[positions] += pending.pop((source, step))
+            results[step] = nexus_flow[self.owned]
+        return results
+
+
+def _run_worker(worker: _PartitionWorker, forcing: np.ndarray, response: Response, inboxes: List[mp.Queue],
+                results: mp.Queue):
+    try:
+        results.put((worker.partition, worker.run(forcing, response, inboxes), None))
+    except Exception as e:
+        results.put((worker.partition, None, repr(e)))
+
+
+def run_partitioned(partitioning: Partitioning,
+                    forcing: np.ndarray,
+                    response: Response = formulation_response,
+                    timeout: Optional[float] = None) -> np.ndarray:
+    """
+    Run a partitioned network with one local process per partition, exchanging boundary nexus flows between them.
+
+    Each partition advances as a ::class:`Simulation` would, so results match those of an unpartitioned run.  Partial
+    sums for boundary nexuses are then sent to the partitions that need them, as given by
+    ::attribute:`Partitioning.boundary_exchange`.
+
+    Worker processes are forked, so the network (including any formulation objects) and the forcing array are shared
+    with them rather than serialized.  As such, this requires a platform supporting the ``fork`` start method.
+
+    Parameters
+    ----------
+    partitioning: Partitioning
+        The partitioned network to run.
+    forcing: np.ndarray
+        Forcing inputs, as a time by catchment array ordered according to the network's catchment indices.
+    response: Response
+        Callable computing catchment outflows, by default using each catchment's formulation.
+    timeout: Optional[float]
+        Optional number of seconds to wait for each partition's results.
+
+    Returns
+    -------
+    np.ndarray
+        The flow at each nexus for each timestep, as a time by nexus array.
+
+    Raises
+    ------
+    RuntimeError
+        If a partition fails, or its worker process exits without reporting results (such as when killed by a signal).
+    TimeoutError
+        If a partition's results are not received within ``timeout`` seconds.
+    """
+    net = partitioning.network
+    if forcing.ndim != 2 or forcing.shape[1] != net.num_catchments:
+        raise ValueError("Forcing must be a time by catchment array")
+    context = mp.get_context("fork")
+    workers = [_PartitionWorker(partitioning, p) for p in range(partitioning.num_partitions)]
+    inboxes = [context.Queue() for _ in workers]
+    results = context.Queue()
+    processes = [context.Process(target=_run_worker, args=(w, forcing, response, inboxes, results), daemon=True)
+                 for w in workers]
+    for process in processes:
+        process.start()
+
+    flows = np.zeros((forcing.shape[0], net.num_nexuses), dtype=np.float64)
+    pending = set(range(len(processes)))
+    try:
+        while pending:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            # Workers found to have exited at the previous poll, whose results may still be in transit
+            exited = set()
+            while True:
+                wait = _POLL_INTERVAL if deadline is None else min(_POLL_INTERVAL, deadline - time.monotonic())
+                try:
+                    partition, values, error = results.get(timeout=max(wait, 0.0))
+                    break
+                except Empty:
+                    lost = exited & pending
+                    if lost:
+                        p = min(lost)
+                        raise RuntimeError("Partition {} worker exited with code {} without reporting results".format(
+                            p, processes[p].exitcode)) from None
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise TimeoutError("Timed out waiting for partition results") from None
+                    exited = {p for p in pending if processes[p].exitcode is not None}
+            pending.discard(partition)
+            if error is not None:
+                raise RuntimeError("Partition {} failed: {}".format(partition, error))
+            worker = workers[partition]
+            flows[:, worker.nexuses[worker.owned]] = values
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+    return flows
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from typing import Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+from ._arrays import _csr, _csr_gather
+
+if TYPE_CHECKING:
+    from ..hydrolocation.hydrolocation import HydroLocation
+    from .network import Network
+
+
+class NexusTree:
+    """
+    The downstream tree of the nexuses of a network, along which flow paths between nexuses are traced.
+
+    Each nexus flows downstream through its first receiving catchment (its ``via`` catchment) to that catchment's
+    outflow nexus (its ``parent``).  Nexuses without a receiving catchment, or whose receiving catchment has no outflow,
+    are roots.  Nexuses are numbered in depth-first pre-order, so the nexuses upstream of each nexus are those whose
+    pre-order positions fall in a contiguous range following its own.
+    """
+
+    __slots__ = ["parent", "via", "levels", "start", "size"]
+
+    def __init__(self, network: Network):
+        """
+        Build the tree of a network's nexuses.
+
+        Parameters
+        ----------
+        network: Network
+            The network.
+
+        Raises
+        ------
+        ValueError
+            If the nexuses form a cycle.
+        """
+        n = network.num_nexuses
+        offsets, indices = network.receiving
+        routed = np.flatnonzero(offsets[1:] > offsets[:-1])
+        self.via = np.full(n, -1, dtype=np.int64)
+        self.via[routed] = indices[offsets[routed]]
+        self.parent = np.full(n, -1, dtype=np.int64)
+        self.parent[routed] = network.catchment_outflow[self.via[routed]]
+
+        # Breadth-first from the roots, where the children gathered for each level are grouped by parent
+        child_offsets, children = _csr(self.parent, n)
+        self.levels: List[np.ndarray] = []
+        frontier = np.flatnonzero(self.parent < 0)
+        while frontier.size > 0:
+            self.levels.append(frontier)
+            frontier = _csr_gather(child_offsets, children, frontier)[1]
+        if sum(level.size for level in self.levels) != n:
+            raise ValueError("Network nexuses contain a cycle")
+
+        self.size = np.ones(n, dtype=np.int64)
+        # Every nexus below the roots has a parent, and only the parents of each level change, keeping this linear
+        for level in reversed(self.levels[1:]):
+            np.add.at(self.size, self.parent[level], self.size[level])
+        self.start = np.zeros(n, dtype=np.int64)
+        for i, level in enumerate(self.levels):
+            before = np.cumsum(self.size[level]) - self.size[level]
+            if i == 0:
+                self.start[level] = before
+                continue
+            parents = self.parent[level]
+            first = np.r_[True, parents[1:] != parents[:-1]]
+            group_before = np.repeat(before[first], np.diff(np.r_[np.flatnonzero(first), level.size]))
+            self.start[level] = self.start[parents] + 1 + before - group_before
+
+    def accumulate(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Sum per-catchment weights along the path from every nexus down to its root.
+
+        Parameters
+        ----------
+        weights: np.ndarray
+            The weight of each catchment.
+
+        Returns
+        -------
+        np.ndarray
+            The total weight of the ``via`` catchments on the path from each nexus to its root.
+        """
+        total = np.zeros(self.parent.size, dtype=np.float64)
+        for level in self.levels[1:]:
+            total[level] = total[self.parent[level]] + weights[self.via[level]]
+        return total
+
+    def connected_pairs(self, sources: np.ndarray, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find every pair of a source nexus and a distinct target nexus downstream of it.
+
+        Parameters
+        ----------
+        sources: np.ndarray
+            The source nexus indices.
+        targets: np.ndarray
+            The target nexus indices.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The positions within ``sources`` and ``targets`` of each connected pair.
+        """
+        by_start = np.argsort(self.start[sources], kind="stable")
+        source_starts = self.start[sources][by_start]
+        low = np.searchsorted(source_starts, self.start[targets], side="right")
+        high = np.searchsorted(source_starts, self.start[targets] + self.size[targets], side="left")
+        counts = high - low
+        target_positions = np.repeat(np.arange(targets.size), counts)
+        ranks = np.arange(target_positions.size) - np.repeat(np.cumsum(counts) - counts, counts) + low[target_positions]
+        return by_start[ranks], target_positions
+
+
+def _nexus_positions(network: Network, locations: Iterable[str | HydroLocation]) -> np.ndarray:
+    ids = [location if isinstance(location, str) else location.realized_nexus for location in locations]
+    return np.fromiter((network.nexus_index(nid) for nid in ids), dtype=np.int64, count=len(ids))
+
+
+def downstream_paths(network: Network,
+                     sources: Iterable[str | HydroLocation],
+                     targets: Optional[Iterable[str | HydroLocation]] = None) -> pd.DataFrame:
+    """
+    Compute the flow path length and travel time from hydrolocations to the hydrolocations downstream of them.
+
+    Only connected pairs are returned, so the result is the sparse form of the source by target distance and travel
+    time matrices.  All pairs of a batch are found together with a single pass over the network's nexus tree (see
+    ::class:`NexusTree`), plus a sort of the sources.
+
+    Parameters
+    ----------
+    network: Network
+        The network, with ::attribute:`Network.flowpath_length` set.
+    sources: Iterable[str | HydroLocation]
+        The source hydrolocations, or the identifiers of their nexuses.
+    targets: Optional[Iterable[str | HydroLocation]]
+        The target hydrolocations, or the identifiers of their nexuses, or ``None`` to use the sources.
+
+    Returns
+    -------
+    pd.DataFrame
+        Table with ``source_nexus_id``, ``target_nexus_id``, ``distance`` and ``travel_time`` columns, with a row for
+        every target downstream of a source, and travel times missing unless ::attribute:`Network.flowpath_celerity`
+        is set.
+    """
+    length = network.flowpath_length
+    if length is None:
+        raise ValueError("Network has no flowpath lengths")
+    sources = list(sources)
+    source_nexuses = _nexus_positions(network, sources)
+    target_nexuses = source_nexuses if targets is None else _nexus_positions(network, list(targets))
+    tree = network._cached("nexus_tree", NexusTree)
+    source_positions, target_positions = tree.connected_pairs(source_nexuses, target_nexuses)
+    a, b = source_nexuses[source_positions], target_nexuses[target_positions]
+    distance = tree.accumulate(length)
+    if network.flowpath_celerity is None:
+        travel_time = np.full(a.size, np.nan)
+    else:
+        duration = tree.accumulate(length / network.flowpath_celerity)
+        travel_time = duration[a] - duration[b]
+    return pd.DataFrame({"source_nexus_id": network.nexus_ids[a], "target_nexus_id": network.nexus_ids[b],
+                         "distance": distance[a] - distance[b], "travel_time": travel_time})
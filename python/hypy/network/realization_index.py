@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..realization import Realization
+    from .network import Network
+
+
+class _RealizationKind:
+    """
+    Columnar storage for the realizations of a single kind: parallel arrays of realization identifiers, catchment
+    indices and (optionally) realization objects, along with hashed lookups in each direction.
+    """
+
+    __slots__ = ["realization_ids", "catchments", "objects", "by_catchment", "_id_index"]
+
+    def __init__(self, num_catchments: int):
+        self.realization_ids = np.empty(0, dtype=object)
+        self.catchments = np.empty(0, dtype=np.int64)
+        self.objects = np.empty(0, dtype=object)
+        self.by_catchment = np.full(num_catchments, -1, dtype=np.int64)
+        self._id_index: Optional[pd.Index] = None
+
+    @property
+    def id_index(self) -> pd.Index:
+        if self._id_index is None:
+            self._id_index = pd.Index(self.realization_ids)
+        return self._id_index
+
+    def append(self, realization_ids: np.ndarray, catchments: np.ndarray, objects: np.ndarray):
+        if pd.Index(realization_ids).has_duplicates or self.id_index.isin(realization_ids).any():
+            raise ValueError("Realization identifiers must be unique within each kind")
+        if pd.Index(catchments).has_duplicates or (self.by_catchment[catchments] >= 0).any():
+            raise ValueError("Catchments may have only one realization of each kind")
+        self.by_catchment[catchments] = np.arange(self.catchments.size, self.catchments.size + catchments.size)
+        self.realization_ids = np.concatenate((self.realization_ids, realization_ids))
+        self.catchments = np.concatenate((self.catchments, catchments))
+        self.objects = np.concatenate((self.objects, objects))
+        self._id_index = None
+
+    def rows(self, realization_ids: Sequence[str]) -> np.ndarray:
+        rows = self.id_index.get_indexer(np.asarray(realization_ids, dtype=object))
+        if (rows < 0).any():
+            raise KeyError("Unknown realization(s) {}".format(list(np.asarray(realization_ids)[rows < 0])))
+        return rows
+
+
+class RealizationIndex:
+    """
+    Bidirectional index between the catchments of a ::class:`Network` and the realizations that back them.
+
+    Realizations are grouped by kind (e.g., ``"Catchment_Area"``, or a flowpath realization kind), with each
+    catchment having at most one realization of each kind.  Every kind is stored as columns of realization identifiers
+    and catchment indices, with a per-catchment array of row positions for catchment-to-realization lookups and a
+    hashed index for realization-to-catchment lookups, so both directions take constant time per entry, and bulk
+    lookups are array operations.
+    """
+
+    __slots__ = ["_network", "_kinds"]
+
+    def __init__(self, network: Network):
+        """
+        Initialize an empty index for a network.
+
+        Parameters
+        ----------
+        network: Network
+            The network whose catchments are being realized.
+        """
+        self._network = network
+        self._kinds: Dict[str, _RealizationKind] = {}
+
+    def __len__(self) -> int:
+        return sum(k.catchments.size for k in self._kinds.values())
+
+    @property
+    def kinds(self) -> Tuple[str, ...]:
+        """
+        The kinds of realization in the index.
+
+        Returns
+        -------
+        Tuple[str, ...]
+            The kinds of realization in the index.
+        """
+        return tuple(self._kinds)
+
+    def _kind(self, kind: str) -> _RealizationKind:
+        try:
+            return self._kinds[kind]
+        except KeyError:
+            raise KeyError("No realizations of kind {}".format(kind)) from None
+
+    def attach(self, realizations: Iterable[Realization], kind: Optional[str] = None,
+               assign: bool = False) -> RealizationIndex:
+        """
+        Attach realization objects, linking each to the catchment given by its ::attribute:`Realization.catchment_id`.
+
+        Parameters
+        ----------
+        realizations: Iterable[Realization]
+            The realizations to attach.
+        kind: Optional[str]
+            The kind to attach all realizations as, or ``None`` to use the type name of each realization.
+        assign: bool
+            Whether to also set the ::attribute:`Catchment.realization` of each realized catchment object retained by
+            the network.
+
+        Returns
+        -------
+        RealizationIndex
+            This instance.
+        """
+        realizations = list(realizations)
+        if any(r.catchment_id is None for r in realizations):
+            raise ValueError("Realizations must have a catchment identifier to be attached")
+        kinds = pd.Series([type(r).__name__ if kind is None else kind for r in realizations], dtype=object)
+        objects = np.empty(len(realizations), dtype=object)
+        objects[:] = realizations
+        catchments = self._network.catchment_indices([r.catchment_id for r in realizations])
+        realization_ids = np.array([r.id for r in realizations], dtype=object)
+        for name, rows in kinds.groupby(kinds, sort=False).indices.items():
+            self._append(name, realization_ids[rows], catchments[rows], objects[rows])
+        if assign:
+            for realization, catchment in zip(realizations, catchments):
+                self._network.catchment(int(catchment)).realization = realization
+        return self
+
+    def attach_table(self, table: pd.DataFrame, kind: str, realization_column: str = "realization_id",
+                     catchment_column: str = "catchment_id") -> RealizationIndex:
+        """
+        Attach realizations in bulk from a table of realization and catchment identifiers.
+
+        Parameters
+        ----------
+        table: pd.DataFrame
+            The table, with one row per realization.
+        kind: str
+            The kind of the realizations.
+        realization_column: str
+            The name of the column of realization identifiers.
+        catchment_column: str
+            The name of the column of realized catchment identifiers.
+
+        Returns
+        -------
+        RealizationIndex
+            This instance.
+        """
+        catchments = self._network.catchment_indices(table[catchment_column])
+        self._append(kind, table[realization_column].to_numpy(dtype=object), catchments,
+                     np.full(len(table), None, dtype=object))
+        return self
+
+    def _append(self, kind: str, realization_ids: np.ndarray, catchments: np.ndarray, objects: np.ndarray):
+        if kind not in self._kinds:
+            self._kinds[kind] = _RealizationKind(self._network.num_catchments)
+        self._kinds[kind].append(realization_ids, catchments, objects)
+
+    def catchment_for(self, realization_id: str, kind: Optional[str] = None) -> str:
+        """
+        Get the identifier of the catchment backed by a realization.
+
+        Parameters
+        ----------
+        realization_id: str
+            The realization identifier.
+        kind: Optional[str]
+            The kind of the realization, or ``None`` to search all kinds.
+
+        Returns
+        -------
+        str
+            The catchment identifier.
+        """
+        for name in (self._kinds if kind is None else (kind,)):
+            store = self._kind(name)
+            if realization_id in store.id_index:
+                return self._network.catchment_ids[store.catchments[store.id_index.get_loc(realization_id)]]
+        raise KeyError("Unknown realization {}".format(realization_id))
+
+    def catchments_for(self, realization_ids: Sequence[str], kind: str) -> np.ndarray:
+        """
+        Get the indices of the catchments backed by several realizations of a kind.
+
+        Parameters
+        ----------
+        realization_ids: Sequence[str]
+            The realization identifiers.
+        kind: str
+            The kind of the realizations.
+
+        Returns
+        -------
+        np.ndarray
+            The catchment index for each realization.
+        """
+        store = self._kind(kind)
+        return store.catchments[store.rows(realization_ids)]
+
+    def realization(self, realization_id: str, kind: str) -> Optional[Realization]:
+        """
+        Get an attached realization object, if the realization was attached as an object rather than from a table.
+
+        Parameters
+        ----------
+        realization_id: str
+            The realization identifier.
+        kind: str
+            The kind of the realization.
+
+        Returns
+        -------
+        Optional[Realization]
+            The realization object, or ``None`` if it was attached from a table.
+        """
+        store = self._kind(kind)
+        return store.objects[store.rows([realization_id])[0]]
+
+    def realization_for(self, catchment: int | str, kind: str) -> Optional[str]:
+        """
+        Get the identifier of the realization of a kind backing a catchment.
+
+        Parameters
+        ----------
+        catchment: int | str
+            The index or identifier of the catchment.
+        kind: str
+            The kind of realization.
+
+        Returns
+        -------
+        Optional[str]
+            The realization identifier, or ``None`` if the catchment has no realization of this kind.
+        """
+        index = self._network.catchment_index(catchment) if isinstance(catchment, str) else catchment
+        store = self._kind(kind)
+        row = store.by_catchment[index]
+        return None if row < 0 else store.realization_ids[row]
+
+    def realizations_for(self, catchments: np.ndarray, kind: str) -> np.ndarray:
+        """
+        Get the identifiers of the realizations of a kind backing several catchments.
+
+        Parameters
+        ----------
+        catchments: np.ndarray
+            The catchment indices.
+        kind: str
+            The kind of realization.
+
+        Returns
+        -------
+        np.ndarray
+            Object array of realization identifiers, with ``None`` for catchments without a realization of this kind.
+        """
+        store = self._kind(kind)
+        rows = store.by_catchment[catchments]
+        found = np.full(rows.size, None, dtype=object)
+        found[rows >= 0] = store.realization_ids[rows[rows >= 0]]
+        return found
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        The whole index as a table.
+
+        Returns
+        -------
+        pd.DataFrame
+            Table with ``kind``, ``realization_id`` and ``catchment_id`` columns.
+        """
+        frames: List[pd.DataFrame] = [
+            pd.DataFrame({"kind": name, "realization_id": store.realization_ids,
+                          "catchment_id": self._network.catchment_ids[store.catchments]})
+            for name, store in self._kinds.items()]
+        if not frames:
+            return pd.DataFrame(columns=["kind", "realization_id", "catchment_id"])
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import json
+import numpy as np
+
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .network import Network
+
+_ALIGNMENT = 64
+_HEADER_SIZE = np.dtype("<u8").itemsize
+
+
+def _shared_memory():
+    # Imported on use, since the module only exists from Python 3.8, while publishing to files works on any version
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        raise ImportError("Shared memory requires Python 3.8 or later; publish the network to a file path instead") \
+            from None
+    return shared_memory
+
+
+def _identifiers(ids: np.ndarray) -> np.ndarray:
+    """
+    Convert identifiers to a fixed-width string array, which can be placed in a flat buffer.
+    """
+    if ids.dtype.kind == "U":
+        return ids
+    return np.array(ids.tolist(), dtype=str) if ids.size > 0 else np.empty(0, dtype="<U1")
+
+
+def _arrays_to_publish(network: Network, arrays: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    published = {"catchment_ids": _identifiers(network.catchment_ids),
+                 "nexus_ids": _identifiers(network.nexus_ids),
+                 "catchment_inflow": network.catchment_inflow,
+                 "catchment_outflow": network.catchment_outflow,
+                 "contributing/0": network.contributing[0],
+                 "contributing/1": network.contributing[1],
+                 "receiving/0": network.receiving[0],
+                 "receiving/1": network.receiving[1]}
+    for key, value in network.derived_arrays.items():
+        if isinstance(value, tuple):
+            published.update({"derived/{}/{}".format(key, i): v for i, v in enumerate(value)})
+        else:
+            published["derived/{}".format(key)] = value
+    if network.flowpath_length is not None:
+        published["flowpath/length"] = network.flowpath_length
+    if network.flowpath_celerity is not None:
+        published["flowpath/celerity"] = network.flowpath_celerity
+    published.update({"array/{}".format(name): np.asarray(value) for name, value in arrays.items()})
+    return {name: np.ascontiguousarray(value) for name, value in published.items()}
+
+
+def _layout(arrays: Mapping[str, np.ndarray]) -> Tuple[bytes, List[int], int]:
+    """
+    Place arrays in a buffer after a JSON header describing them, returning the header, offsets and total size.
+    """
+    def header_for(offsets: List[int]) -> bytes:
+        return json.dumps([[name, value.dtype.str, list(value.shape), offset]
+                           for (name, value), offset in zip(arrays.items(), offsets)]).encode()
+
+    # The header size depends on the offsets, which depend on the header size, so allow room for the offsets to grow
+    header_size = len(header_for([0] * len(arrays))) + 20 * len(arrays)
+    offsets = []
+    position = _HEADER_SIZE + header_size
+    for value in arrays.values():
+        position += -position % _ALIGNMENT
+        offsets.append(position)
+        position += value.nbytes
+    header = header_for(offsets)
+    return header.ljust(header_size), offsets, max(position, _HEADER_SIZE + header_size)
+
+
+def _write(buffer: np.ndarray, arrays: Mapping[str, np.ndarray], header: bytes, offsets: List[int]):
+    buffer[:_HEADER_SIZE] = np.frombuffer(np.array(len(header), dtype="<u8").tobytes(), dtype=np.uint8)
+    buffer[_HEADER_SIZE:_HEADER_SIZE + len(header)] = np.frombuffer(header, dtype=np.uint8)
+    for value, offset in zip(arrays.values(), offsets):
+        buffer[offset:offset + value.nbytes] = value.reshape(-1).view(np.uint8)
+
+
+def _read(buffer: Any) -> Dict[str, np.ndarray]:
+    """
+    Get read-only views of the arrays placed in a buffer.
+    """
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    header_size = int(raw[:_HEADER_SIZE].view("<u8")[0])
+    arrays = {}
+    for name, dtype, shape, offset in json.loads(bytes(raw[_HEADER_SIZE:_HEADER_SIZE + header_size])):
+        value = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=buffer, offset=offset)
+        value.flags.writeable = False
+        arrays[name] = value
+    return arrays
+
+
+def _network_from(arrays: Mapping[str, np.ndarray]) -> Network:
+    derived: Dict[str, Any] = {}
+    parts: Dict[str, Dict[int, np.ndarray]] = {}
+    for name, value in arrays.items():
+        if name.startswith("derived/"):
+            key, _, part = name[len("derived/"):].partition("/")
+            if part:
+                parts.setdefault(key, {})[int(part)] = value
+            else:
+                derived[key] = value
+    derived.update({key: tuple(values[i] for i in range(len(values))) for key, values in parts.items()})
+    network = Network._from_arrays(arrays["catchment_ids"], arrays["nexus_ids"], arrays["catchment_inflow"],
+                                   arrays["catchment_outflow"], (arrays["contributing/0"], arrays["contributing/1"]),
+                                   (arrays["receiving/0"], arrays["receiving/1"]), derived)
+    if "flowpath/length" in arrays:
+        network.set_flowpath_attributes(arrays["flowpath/length"], arrays.get("flowpath/celerity"))
+    return network
+
+
+class SharedNetwork:
+    """
+    Handle to a ::class:`Network` published to shared memory or a memory-mapped file, for use by many processes
+    without each building or unpickling its own copy.
+
+    Publishing places the network's identifiers, topology arrays, nexus connections, flowpath attributes and
+    ::attribute:`Network.derived_arrays` (such as the topological order and stream orders) into a single flat buffer,
+    along with any additional arrays.
+    Attaching, by shared memory name or file path, wraps that buffer in a read-only network without copying it, so
+    every process shares one copy of the arrays.  Networks attached this way do not retain catchment or nexus objects,
+    and their topology cannot be changed.
+
+    Handles can be pickled, and are attached again by name when unpickled, so they can be passed directly to worker
+    processes.  On Python versions before 3.13, shared memory attached by a process that is not a descendant of the
+    publishing process may be removed when that process exits.
+    """
+
+    __slots__ = ["_memory", "_path", "_map", "_network", "_arrays", "_owner"]
+
+    @classmethod
+    def publish(cls,
+                network: Network,
+                name: Optional[str] = None,
+                path: Optional[str | Path] = None,
+                arrays: Optional[Mapping[str, np.ndarray]] = None,
+                attributes: bool = True) -> SharedNetwork:
+        """
+        Publish a network to a new shared memory block, or to a file.
+
+        Parameters
+        ----------
+        network: Network
+            The network to publish.
+        name: Optional[str]
+            The name of the shared memory block, or ``None`` for a generated name.
+        path: Optional[str | Path]
+            The path of a file to publish to instead of shared memory.
+        arrays: Optional[Mapping[str, np.ndarray]]
+            Additional arrays to publish along with the network, such as per-catchment parameters.
+        attributes: bool
+            Whether to compute the network's topological order and stream order attributes before publishing, so that
+            attached networks need not compute them.
+
+        Returns
+        -------
+        SharedNetwork
+            The handle of the publishing process, which is responsible for eventually calling ::method:`unlink`.
+        """
+        if attributes:
+            for attribute in ("hydrologic_sequence", "is_mainstem", "shreve_magnitude", "strahler_order"):
+                getattr(network, attribute)
+            network.catchment_edges()
+        published = _arrays_to_publish(network, arrays or {})
+        header, offsets, size = _layout(published)
+        handle = cls.__new__(cls)
+        handle._owner = True
+        handle._memory = None
+        handle._path = None
+        handle._map = None
+        if path is None:
+            handle._memory = _shared_memory().SharedMemory(name=name, create=True, size=size)
+            buffer = handle._memory.buf
+        else:
+            handle._path = Path(path)
+            handle._map = np.memmap(handle._path, dtype=np.uint8, mode="w+", shape=(size,))
+            buffer = handle._map
+        _write(np.frombuffer(buffer, dtype=np.uint8), published, header, offsets)
+        if handle._map is not None:
+            handle._map.flush()
+        handle._load(buffer)
+        return handle
+
+    @classmethod
+    def attach(cls, name: Optional[str] = None, path: Optional[str | Path] = None) -> SharedNetwork:
+        """
+        Attach to a published network.
+
+        Parameters
+        ----------
+        name: Optional[str]
+            The name of the shared memory block the network was published to.
+        path: Optional[str | Path]
+            The path of the file the network was published to, if given instead of a name.
+
+        Returns
+        -------
+        SharedNetwork
+            A handle providing a read-only network backed by the published arrays.
+        """
+        if (name is None) == (path is None):
+            raise ValueError("Exactly one of a shared memory name or a file path is required to attach")
+        handle = cls.__new__(cls)
+        handle._owner = False
+        handle._memory = None
+        handle._path = None
+        handle._map = None
+        if path is None:
+            shared_memory = _shared_memory()
+            try:
+                handle._memory = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                handle._memory = shared_memory.SharedMemory(name=name)
+            handle._load(handle._memory.buf)
+        else:
+            handle._path = Path(path)
+            handle._map = np.memmap(handle._path, dtype=np.uint8, mode="r")
+            handle._load(handle._map)
+        return handle
+
+    def __enter__(self) -> SharedNetwork:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    def __reduce__(self):
+        return _attach, (self.name, None if self._path is None else str(self._path))
+
+    def _load(self, buffer: Any):
+        published = _read(buffer)
+        self._arrays = {name[len("array/"):]: value for name, value in published.items() if name.startswith("array/")}
+        self._network = _network_from(published)
+
+    @property
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        The additional arrays published along with the network.
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            Map of array names to read-only arrays.
+        """
+        return self._arrays
+
+    @property
+    def name(self) -> Optional[str]:
+        """
+        The name of the shared memory block, or ``None`` if the network was published to a file.
+
+        Returns
+        -------
+        Optional[str]
+            The name of the shared memory block.
+        """
+        return None if self._memory is None else self._memory.name
+
+    @property
+    def network(self) -> Network:
+        """
+        The read-only network backed by the published arrays.
+
+        Returns
+        -------
+        Network
+            The network.
+        """
+        return self._network
+
+    def close(self):
+        """
+        Release this process's access to the published arrays.
+
+        The network and arrays of this handle must no longer be used, and any other references to them must have been
+        dropped, since they are views into the released memory.
+        """
+        self._network = None
+        self._arrays = {}
+        if self._memory is not None:
+            self._memory.close()
+        self._map = None
+
+    def unlink(self):
+        """
+        Remove the published network, once all processes have closed their handles to it.
+        """
+        if self._memory is not None:
+            self._memory.unlink()
+        elif self._path is not None and self._path.exists():
+            self._path.unlink()
+
+
+def _attach(name: Optional[str], path: Optional[str]) -> SharedNetwork:
+    return SharedNetwork.attach(name=name, path=path)
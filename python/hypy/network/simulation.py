@@ -0,0 +1,519 @@
+from __future__ import annotations
+
+import numpy as np
+
+from typing import Callable, Iterator, Mapping, Optional, Tuple, TYPE_CHECKING
+
+from ._arrays import _csr
+
+if TYPE_CHECKING:
+    from ..memoize import ResponseCache
+    from .forcing import ForcingProvider
+    from .network import Network
+
+# Signature of the callable computing catchment outflows for a timestep, given the network, the indices of the
+# catchments to compute, their total inputs, and the timestep index
+Response = Callable[["Network", np.ndarray, np.ndarray, int], np.ndarray]
+
+# Signature of the callable computing ensemble catchment outflows for a timestep, given the network, the indices of the
+# catchments to compute, their total inputs as a member by catchment array, the timestep index, and the member by
+# catchment arrays of any parameters varied across the ensemble
+EnsembleResponse = Callable[["Network", np.ndarray, np.ndarray, int, Mapping[str, np.ndarray]], np.ndarray]
+
+
+def formulation_response(network: Network, catchments: np.ndarray, inputs: np.ndarray, step: int,
+                         cache: Optional[ResponseCache] = None) -> np.ndarray:
+    """
+    Compute catchment outflows using the formulation of each catchment.
+
+    Catchments without a formulation pass their input through unchanged.  To memoize the responses of deterministic
+    formulations, skipping unchanged sub-basins, bind a cache with ``functools.partial(formulation_response,
+    cache=cache)``.
+
+    Parameters
+    ----------
+    network: Network
+        The network, which must retain its catchment objects.
+    catchments: np.ndarray
+        The indices of the catchments to compute.
+    inputs: np.ndarray
+        The total input flux of each catchment for this timestep.
+    step: int
+        The timestep index.
+    cache: Optional[ResponseCache]
+        Optional cache of the responses of deterministic formulations.
+
+    Returns
+    -------
+    np.ndarray
+        The outflow of each catchment for this timestep.
+    """
+    if cache is not None:
+        return cache.responses(network, catchments, inputs, step)
+    outputs = np.empty(catchments.size, dtype=np.float64)
+    for i, (catchment, input_flux) in enumerate(zip(catchments, inputs)):
+        formulation = getattr(network.catchment(int(catchment)), "formulation", None)
+        outputs[i] = input_flux if formulation is None else formulation.get_response(input_flux, step=step)
+    return outputs
+
+
+def formulation_ensemble_response(network: Network, catchments: np.ndarray, inputs: np.ndarray, step: int,
+                                  params: Mapping[str, np.ndarray]) -> np.ndarray:
+    """
+    Compute the catchment outflows of every ensemble member using the formulation of each catchment.
+
+    Each formulation computes all members at once through ::method:`Formulation.get_ensemble_response`, receiving the
+    member values of every varied parameter for its catchment.  Catchments without a formulation pass their inputs
+    through unchanged.
+
+    Parameters
+    ----------
+    network: Network
+        The network, which must retain its catchment objects.
+    catchments: np.ndarray
+        The indices of the catchments to compute.
+    inputs: np.ndarray
+        The total input flux of each member and catchment for this timestep, as a member by catchment array.
+    step: int
+        The timestep index.
+    params: Mapping[str, np.ndarray]
+        Map of the names of parameters varied across the ensemble to their values, as member by catchment arrays
+        ordered according to the network's catchment indices.
+
+    Returns
+    -------
+    np.ndarray
+        The outflow of each member and catchment for this timestep, as a member by catchment array.
+    """
+    outputs = np.empty(inputs.shape, dtype=np.float64)
+    for i, catchment in enumerate(catchments):
+        formulation = getattr(network.catchment(int(catchment)), "formulation", None)
+        if formulation is None:
+            outputs[:, i] = inputs[:, i]
+        else:
+            member_params = {name: values[:, catchment] for name, values in params.items()}
+            outputs[:, i] = formulation.get_ensemble_response(inputs[:, i], member_params, step=step)
+    return outputs
+
+
+class NexusTransfer:
+    """
+    The sparse operators moving water between a set of catchments and the nexuses they connect to.
+
+    Gathering sums the outflow of every catchment into its outflow nexus, and scattering splits the flow of every nexus
+    equally among its receiving catchments.  Both are applied along the last axis of their argument, so any leading
+    axes (e.g., ensemble members) are transferred together.
+    """
+
+    __slots__ = ["_num_catchments", "_num_nexuses", "_gather_offsets", "_gather_indices", "_gather_rows", "_routed",
+                 "_routed_inflow", "_routed_share"]
+
+    @classmethod
+    def from_network(cls, network: Network) -> NexusTransfer:
+        """
+        Build the operators for all catchments and nexuses of a network.
+
+        Parameters
+        ----------
+        network: Network
+            The network.
+
+        Returns
+        -------
+        NexusTransfer
+            The transfer operators, indexed by the network's catchment and nexus indices.
+        """
+        offsets, _ = network.receiving
+        return cls(network.catchment_inflow, network.catchment_outflow, np.diff(offsets))
+
+    def __init__(self, inflow: np.ndarray, outflow: np.ndarray, receiver_counts: np.ndarray):
+        """
+        Initialize from local catchment-to-nexus topology arrays.
+
+        Parameters
+        ----------
+        inflow: np.ndarray
+            The index of the inflow nexus of each catchment, or ``-1`` where it has none.
+        outflow: np.ndarray
+            The index of the outflow nexus of each catchment, or ``-1`` where it has none.
+        receiver_counts: np.ndarray
+            The number of catchments sharing the flow of each nexus, which may include catchments outside this set.
+        """
+        inflow = np.asarray(inflow, dtype=np.int64)
+        receiver_counts = np.asarray(receiver_counts)
+        self._num_catchments = inflow.size
+        self._num_nexuses = receiver_counts.size
+        self._gather_offsets, self._gather_indices = _csr(np.asarray(outflow, dtype=np.int64), self._num_nexuses)
+        self._gather_rows = np.flatnonzero(np.diff(self._gather_offsets) > 0)
+        self._routed = np.flatnonzero(inflow >= 0)
+        self._routed_inflow = inflow[self._routed]
+        self._routed_share = 1.0 / np.maximum(receiver_counts[self._routed_inflow], 1)
+
+    @property
+    def num_catchments(self) -> int:
+        return self._num_catchments
+
+    @property
+    def num_nexuses(self) -> int:
+        return self._num_nexuses
+
+    def gather(self, outflows: np.ndarray) -> np.ndarray:
+        """
+        Sum catchment outflows into the flow of each nexus.
+
+        Parameters
+        ----------
+        outflows: np.ndarray
+            Array of catchment outflows, with catchments along the last axis.
+
+        Returns
+        -------
+        np.ndarray
+            Array of nexus flows, with nexuses along the last axis.
+        """
+        outflows = np.asarray(outflows, dtype=np.float64)
+        flow = np.zeros(outflows.shape[:-1] + (self._num_nexuses,), dtype=np.float64)
+        if self._gather_rows.size > 0:
+            flow[..., self._gather_rows] = np.add.reduceat(outflows[..., self._gather_indices],
+                                                           self._gather_offsets[self._gather_rows], axis=-1)
+        return flow
+
+    def scatter(self, flow: np.ndarray) -> np.ndarray:
+        """
+        Split nexus flows equally among their receiving catchments.
+
+        Parameters
+        ----------
+        flow: np.ndarray
+            Array of nexus flows, with nexuses along the last axis.
+
+        Returns
+        -------
+        np.ndarray
+            Array of the inflow of each catchment, with catchments along the last axis, and ``0`` for catchments
+            without an inflow nexus.
+        """
+        flow = np.asarray(flow, dtype=np.float64)
+        inflows = np.zeros(flow.shape[:-1] + (self._num_catchments,), dtype=np.float64)
+        inflows[..., self._routed] = flow[..., self._routed_inflow] * self._routed_share
+        return inflows
+
+
+class Simulation:
+    """
+    Driver advancing a whole ::class:`Network` one timestep at a time.
+
+    At each timestep, the input of every catchment is its forcing plus an equal share of the previous timestep's flow
+    at its inflow nexus.  The ``response`` callable turns the inputs of all catchments into their outflows, which are
+    then summed into their outflow nexuses.  Both transfers are applied through a ::class:`NexusTransfer`, so each
+    timestep is a handful of array operations besides the response itself.
+    """
+
+    __slots__ = ["_network", "_response", "_transfer", "_catchments", "_flow", "_step"]
+
+    def __init__(self, network: Network, response: Response = formulation_response,
+                 initial_flow: Optional[np.ndarray] = None):
+        """
+        Initialize a simulation at its first timestep.
+
+        Parameters
+        ----------
+        network: Network
+            The network to simulate.
+        response: Response
+            Callable computing catchment outflows, by default using each catchment's formulation.
+        initial_flow: Optional[np.ndarray]
+            The flow at each nexus before the first timestep, or ``None`` for no flow.
+        """
+        self._network = network
+        self._response = response
+        self._transfer = NexusTransfer.from_network(network)
+        self._catchments = np.arange(network.num_catchments, dtype=np.int64)
+        self._flow = np.zeros(self._flow_shape, dtype=np.float64) if initial_flow is None else \
+            np.array(np.broadcast_to(initial_flow, self._flow_shape), dtype=np.float64)
+        self._step = 0
+
+    @property
+    def _flow_shape(self) -> Tuple[int, ...]:
+        return (self._network.num_nexuses,)
+
+    @property
+    def flow(self) -> np.ndarray:
+        """
+        The flow at each nexus as of the last completed timestep.
+
+        Returns
+        -------
+        np.ndarray
+            Float array with one entry per nexus.
+        """
+        return self._flow
+
+    @property
+    def network(self) -> Network:
+        return self._network
+
+    @property
+    def step_index(self) -> int:
+        """
+        The index of the next timestep to be run.
+
+        Returns
+        -------
+        int
+            The index of the next timestep to be run.
+        """
+        return self._step
+
+    @property
+    def transfer(self) -> NexusTransfer:
+        return self._transfer
+
+    def step(self, forcing: np.ndarray) -> np.ndarray:
+        """
+        Advance the simulation by one timestep.
+
+        Parameters
+        ----------
+        forcing: np.ndarray
+            The forcing input of each catchment for this timestep.
+
+        Returns
+        -------
+        np.ndarray
+            The flow at each nexus for this timestep.
+        """
+        inputs = np.asarray(forcing, dtype=np.float64) + self._transfer.scatter(self._flow)
+        outputs = self._respond(inputs)
+        self._flow = self._transfer.gather(outputs)
+        self._step += 1
+        return self._flow
+
+    def _respond(self, inputs: np.ndarray) -> np.ndarray:
+        return self._response(self._network, self._catchments, inputs, self._step)
+
+    def run(self, forcing: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Advance the simulation through a block of timesteps.
+
+        Parameters
+        ----------
+        forcing: np.ndarray
+            Forcing inputs, as a time by catchment array ordered according to the network's catchment indices.
+        out: Optional[np.ndarray]
+            Optional time by nexus array (e.g., a memory-mapped file) to write the results to.
+
+        Returns
+        -------
+        np.ndarray
+            The flow at each nexus for each timestep, as a time by nexus array.
+        """
+        if not 2 <= forcing.ndim <= len(self._flow_shape) + 1 or forcing.shape[-1] != self._network.num_catchments:
+            raise ValueError("Forcing must be a time by catchment array")
+        shape = (forcing.shape[0],) + self._flow_shape
+        if out is None:
+            out = np.empty(shape, dtype=np.float64)
+        elif out.shape != shape:
+            raise ValueError("Output must be a time by nexus array matching the forcing")
+        for t in range(forcing.shape[0]):
+            out[t] = self.step(forcing[t])
+        return out
+
+    def run_chunked(self,
+                    provider: ForcingProvider,
+                    chunk_size: int,
+                    stop: Optional[int] = None,
+                    prefetch_depth: int = 1,
+                    fill_value: Optional[float] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Advance the simulation through forcing streamed from a provider, a block of timesteps at a time.
+
+        Forcing is read from the provider starting at ::attribute:`step_index`, with the next block read on a
+        background thread while the current one is run, so memory use is bounded by the block size rather than the
+        length of the simulation.  The simulation only advances as the returned iterator is consumed.
+
+        Parameters
+        ----------
+        provider: ForcingProvider
+            The source of forcing.
+        chunk_size: int
+            The number of timesteps per block.
+        stop: Optional[int]
+            The timestep after the last to run, or ``None`` to run through all of the provider's timesteps.
+        prefetch_depth: int
+            The number of forcing blocks to read ahead, or ``0`` to read blocks on demand.
+        fill_value: Optional[float]
+            The forcing of catchments missing from the provider, or ``None`` to raise an error for them.
+
+        Returns
+        -------
+        Iterator[Tuple[int, np.ndarray]]
+            The first timestep of each block, and the flow at each nexus for the block, as a time by nexus array.
+        """
+        for start, forcing in provider.chunks(self._network, chunk_size, start=self._step, stop=stop,
+                                              prefetch_depth=prefetch_depth, fill_value=fill_value):
+            yield start, self.run(forcing)
+
+
+class EnsembleSimulation(Simulation):
+    """
+    Driver advancing every member of an ensemble over a whole ::class:`Network` together, one timestep at a time.
+
+    Members share the network topology and may share forcing, differing in their forcing or in the values of the
+    parameters varied across the ensemble.  Nexus flows are held as a member by nexus array, and each timestep moves
+    the flows of all members through the network with the same array operations as a single simulation, while the
+    ``response`` callable computes all members of each catchment at once.
+    """
+
+    __slots__ = ["_num_members", "_params"]
+
+    def __init__(self,
+                 network: Network,
+                 num_members: int,
+                 params: Optional[Mapping[str, np.ndarray]] = None,
+                 response: EnsembleResponse = formulation_ensemble_response,
+                 initial_flow: Optional[np.ndarray] = None):
+        """
+        Initialize an ensemble simulation at its first timestep.
+
+        Parameters
+        ----------
+        network: Network
+            The network to simulate.
+        num_members: int
+            The number of ensemble members.
+        params: Optional[Mapping[str, np.ndarray]]
+            Map of the names of parameters varied across the ensemble to their values, as member by catchment arrays
+            ordered according to the network's catchment indices.
+        response: EnsembleResponse
+            Callable computing ensemble catchment outflows, by default using each catchment's formulation.
+        initial_flow: Optional[np.ndarray]
+            The flow at each nexus before the first timestep, as a nexus array shared by all members or a member by
+            nexus array, or ``None`` for no flow.
+        """
+        if num_members < 1:
+            raise ValueError("Ensembles must have at least one member")
+        self._num_members = num_members
+        self._params = {name: np.asarray(values) for name, values in (params or {}).items()}
+        for name, values in self._params.items():
+            if values.shape != (num_members, network.num_catchments):
+                raise ValueError("Ensemble parameter {} must be a member by catchment array".format(name))
+        super().__init__(network, response, initial_flow)
+
+    @property
+    def _flow_shape(self) -> Tuple[int, ...]:
+        return self._num_members, self._network.num_nexuses
+
+    @property
+    def num_members(self) -> int:
+        return self._num_members
+
+    @property
+    def params(self) -> Mapping[str, np.ndarray]:
+        """
+        The parameters varied across the ensemble.
+
+        Returns
+        -------
+        Mapping[str, np.ndarray]
+            Map of parameter names to their values, as member by catchment arrays.
+        """
+        return self._params
+
+    def _respond(self, inputs: np.ndarray) -> np.ndarray:
+        inputs = np.broadcast_to(inputs, (self._num_members, self._network.num_catchments))
+        return self._response(self._network, self._catchments, inputs, self._step, self._params)
+
+    def step(self, forcing: np.ndarray) -> np.ndarray:
+        """
+        Advance every member of the ensemble by one timestep.
+
+        Parameters
+        ----------
+        forcing: np.ndarray
+            The forcing input of each catchment for this timestep, shared by all members, or as a member by catchment
+            array.
+
+        Returns
+        -------
+        np.ndarray
+            The flow at each nexus for this timestep, as a member by nexus array.
+        """
+        return super().step(forcing)
+
+    def run(self, forcing: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Advance every member of the ensemble through a block of timesteps.
+
+        Parameters
+        ----------
+        forcing: np.ndarray
+            Forcing inputs, as a time by catchment array shared by all members, or a time by member by catchment
+            array, ordered according to the network's catchment indices.
+        out: Optional[np.ndarray]
+            Optional time by member by nexus array to write the results to.
+
+        Returns
+        -------
+        np.ndarray
+            The flow at each nexus for each timestep and member, as a time by member by nexus array.
+        """
+        return super().run(forcing, out)
+
+
+def simulate(network: Network, forcing: np.ndarray, response: Response = formulation_response) -> np.ndarray:
+    """
+    Run a network through all timesteps of a forcing array in a single process.
+
+    Parameters
+    ----------
+    network: Network
+        The network to simulate.
+    forcing: np.ndarray
+        Forcing inputs, as a time by catchment array ordered according to the network's catchment indices.
+    response: Response
+        Callable computing catchment outflows, by default using each catchment's formulation.
+
+    Returns
+    -------
+    np.ndarray
+        The flow at each nexus for each timestep, as a time by nexus array.
+
+    See Also
+    -------
+    ::class:`Simulation`
+    """
+    return Simulation(network, response).run(forcing)
+
+
+def simulate_ensemble(network: Network,
+                      forcing: np.ndarray,
+                      num_members: int,
+                      params: Optional[Mapping[str, np.ndarray]] = None,
+                      response: EnsembleResponse = formulation_ensemble_response) -> np.ndarray:
+    """
+    Run every member of an ensemble through all timesteps of a forcing array in a single pass.
+
+    Parameters
+    ----------
+    network: Network
+        The network to simulate.
+    forcing: np.ndarray
+        Forcing inputs, as a time by catchment array shared by all members, or a time by member by catchment array.
+    num_members: int
+        The number of ensemble members.
+    params: Optional[Mapping[str, np.ndarray]]
+        Map of the names of parameters varied across the ensemble to their values, as member by catchment arrays.
+    response: EnsembleResponse
+        Callable computing ensemble catchment outflows, by default using each catchment's formulation.
+
+    Returns
+    -------
+    np.ndarray
+        The flow at each nexus for each timestep and member, as a time by member by nexus array.
+
+    See Also
+    -------
+    ::class:`EnsembleSimulation`
+    """
+    return EnsembleSimulation(network, num_members, params, response).run(forcing)
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from typing import Any, Dict, Mapping, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+    from .network import Network
+
+TABLES = ("catchments", "nexuses", "edges", "hydrolocations", "realizations")
+"""The names of the tables a network is exported to, in order."""
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Arrow export requires the optional pyarrow dependency (install hypy[arrow])") from None
+    return pyarrow
+
+
+def _references(codes: np.ndarray, ids: np.ndarray) -> pd.Categorical:
+    """
+    Wrap an index array as a categorical of identifiers, with the index array as its codes and ``-1`` as missing.
+    """
+    return pd.Categorical.from_codes(codes, categories=pd.Index(ids, dtype=object))
+
+
+def _coordinates(shape: Any) -> Tuple[float, float]:
+    if shape is None:
+        return np.nan, np.nan
+    if hasattr(shape, "x"):
+        return shape.x, shape.y
+    return tuple(shape)[:2]
+
+
+def to_pandas(network: Network, attributes: bool = True) -> Dict[str, pd.DataFrame]:
+    """
+    Export a network as a set of data frames built directly from its arrays.
+
+    References between tables are categorical columns whose codes are the network's index arrays and whose categories
+    are its identifier arrays, so the export is made of array operations alone, except for hydrolocations, which are
+    read from retained nexus objects.
+
+    Parameters
+    ----------
+    network: Network
+        The network to export.
+    attributes: bool
+        Whether to include derived per-catchment attributes (topological level, hydrologic sequence, stream orders and
+        mainstem), which requires the network to be acyclic.
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        The tables named in ::data:`TABLES`:
+        ``catchments`` (``catchment_id``, ``inflow_nexus_id``, ``outflow_nexus_id``, any ``flowpath_length`` and
+        ``flowpath_celerity`` and any attributes),
+        ``nexuses`` (``nexus_id``, ``num_contributing``, ``num_receiving``),
+        ``edges`` (``upstream_catchment_id``, ``downstream_catchment_id``, ``nexus_id``),
+        ``hydrolocations`` (``nexus_id``, ``type``, ``x``, ``y``, ``station_id``) and
+        ``realizations`` (``kind``, ``realization_id``, ``catchment_id``).
+    """
+    catchment_ids = network.catchment_ids
+    nexus_ids = network.nexus_ids
+    catchments = pd.DataFrame({"catchment_id": catchment_ids,
+                               "inflow_nexus_id": _references(network.catchment_inflow, nexus_ids),
+                               "outflow_nexus_id": _references(network.catchment_outflow, nexus_ids)})
+    if network.flowpath_length is not None:
+        catchments["flowpath_length"] = network.flowpath_length
+    if network.flowpath_celerity is not None:
+        catchments["flowpath_celerity"] = network.flowpath_celerity
+    if attributes:
+        catchments["topological_level"] = network.topological_levels()
+        catchments["hydrologic_sequence"] = network.hydrologic_sequence
+        catchments["strahler_order"] = network.strahler_order
+        catchments["shreve_magnitude"] = network.shreve_magnitude
+        catchments["mainstem_id"] = _references(network.mainstem, catchment_ids)
+
+    nexuses = pd.DataFrame({"nexus_id": nexus_ids,
+                            "num_contributing": np.diff(network.contributing[0]),
+                            "num_receiving": np.diff(network.receiving[0])})
+
+    upstream, downstream = network.catchment_edges()
+    edges = pd.DataFrame({"upstream_catchment_id": _references(upstream, catchment_ids),
+                          "downstream_catchment_id": _references(downstream, catchment_ids),
+                          "nexus_id": _references(network.catchment_outflow[upstream], nexus_ids)})
+
+    located = [(i, nexus.hydro_location) for i, nexus in enumerate(network.nexus_objects or ())
+               if getattr(nexus, "hydro_location", None) is not None]
+    coordinates = np.array([_coordinates(location.geometry) for _, location in located], dtype=float).reshape(-1, 2)
+    hydrolocations = pd.DataFrame({
+        "nexus_id": _references(np.array([i for i, _ in located], dtype=np.int64), nexus_ids),
+        "type": pd.Series([location.ltype.name for _, location in located], dtype=object),
+        "x": coordinates[:, 0],
+        "y": coordinates[:, 1],
+        "station_id": pd.Series([getattr(location, "station_id", None) for _, location in located], dtype=object)})
+
+    if not network.has_realizations:
+        realizations = pd.DataFrame({"kind": pd.Series(dtype=object), "realization_id": pd.Series(dtype=object),
+                                     "catchment_id": pd.Series(dtype=object)})
+    else:
+        realizations = network.realizations.to_frame()
+
+    return dict(zip(TABLES, (catchments, nexuses, edges, hydrolocations, realizations)))
+
+
+def to_arrow(network: Network, attributes: bool = True) -> Dict[str, pa.Table]:
+    """
+    Export a network as a set of Arrow tables.
+
+    Numeric columns are converted without copying where Arrow allows, and references between tables are
+    dictionary-encoded, with the network's index arrays as the dictionary indices.
+
+    Parameters
+    ----------
+    network: Network
+        The network to export.
+    attributes: bool
+        Whether to include derived per-catchment attributes, which requires the network to be acyclic.
+
+    Returns
+    -------
+    Dict[str, pa.Table]
+        The tables named in ::data:`TABLES`, with the same columns as those of ::function:`to_pandas`.
+
+    Raises
+    ------
+    ImportError
+        If pyarrow is not installed.
+    """
+    pa = _pyarrow()
+    return {name: pa.Table.from_pandas(frame, preserve_index=False)
+            for name, frame in to_pandas(network, attributes).items()}
+
+
+def _positions(column: pd.Series, ids: pd.Index, name: str) -> np.ndarray:
+    """
+    Get the index within ``ids`` of every entry of a reference column, or ``-1`` for missing entries.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype) and column.cat.categories.equals(ids):
+        return column.cat.codes.to_numpy(dtype=np.int64)
+    values = column.to_numpy(dtype=object)
+    missing = pd.isna(values)
+    positions = ids.get_indexer(values)
+    unknown = (positions < 0) & ~missing
+    if unknown.any():
+        raise ValueError("Column {} references unknown identifier(s) {}".format(name, list(values[unknown][:10])))
+    return np.where(missing, -1, positions).astype(np.int64)
+
+
+def network_arguments(tables: Mapping[str, pd.DataFrame]) -> Dict[str, Any]:
+    """
+    Read the constructor arguments of a network from tables in the layout of ::function:`to_pandas`.
+
+    Only the ``catchments`` table is required.  Without a ``nexuses`` table, the nexuses are those referenced by the
+    catchments, ordered by first reference.
+
+    Parameters
+    ----------
+    tables: Mapping[str, pd.DataFrame]
+        The tables, by name.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The keyword arguments for the ::class:`Network` initializer.
+    """
+    catchments = tables["catchments"]
+    if "nexuses" in tables:
+        nexus_ids = pd.Index(tables["nexuses"]["nexus_id"].to_numpy(dtype=object), dtype=object)
+    else:
+        referenced = pd.concat([catchments["inflow_nexus_id"].astype(object),
+                                catchments["outflow_nexus_id"].astype(object)]).dropna()
+        nexus_ids = pd.Index(pd.unique(referenced.to_numpy(dtype=object)), dtype=object)
+    return {"catchment_ids": catchments["catchment_id"].to_numpy(dtype=object),
+            "nexus_ids": nexus_ids.to_numpy(),
+            "catchment_inflow": _positions(catchments["inflow_nexus_id"], nexus_ids, "inflow_nexus_id"),
+            "catchment_outflow": _positions(catchments["outflow_nexus_id"], nexus_ids, "outflow_nexus_id")}
+
+
+def arrow_to_pandas(tables: Mapping[str, pa.Table]) -> Dict[str, pd.DataFrame]:
+    """
+    Convert Arrow tables to data frames, with dictionary-encoded columns becoming categoricals.
+
+    Parameters
+    ----------
+    tables: Mapping[str, pa.Table]
+        The tables, by name.
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        The converted tables, by name.
+    """
+    return {name: table.to_pandas() for name, table in tables.items()}
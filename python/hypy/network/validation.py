@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from enum import Enum, auto
+from typing import Iterable, List, Tuple, TYPE_CHECKING
+
+from ._arrays import _csr, _csr_gather
+
+if TYPE_CHECKING:
+    from ..catchment import Catchment
+    from ..nexus import Nexus
+    from ..realization import Realization
+
+
+class ValidationCheck(Enum):
+    """
+        Enumeration of the topology invariants checked by ::function:`validate`
+    """
+    # An identifier is used by more than one catchment, or by more than one nexus
+    DUPLICATE_ID = auto()
+    # A nexus lists a catchment that is not part of the network
+    UNKNOWN_CATCHMENT = auto()
+    # A nexus lists a catchment as contributing/receiving, but the catchment's outflow/inflow is not that nexus
+    NEXUS_NOT_RECIPROCATED = auto()
+    # A catchment's inflow/outflow nexus does not list the catchment as receiving/contributing
+    CATCHMENT_NOT_RECIPROCATED = auto()
+    # A catchment is part of a cycle of catchment connections
+    CYCLE = auto()
+    # A catchment's containing catchment is not part of the network
+    DANGLING_CONTAINING_CATCHMENT = auto()
+    # Containing/contained catchment relationships do not refer back to each other
+    CONTAINMENT_NOT_RECIPROCATED = auto()
+    # A catchment's conjoined catchment is not part of the network, or does not list it as conjoined in return
+    CONJOINT_NOT_RECIPROCATED = auto()
+    # A realization's catchment identifier does not refer to a catchment of the network
+    DANGLING_REALIZATION = auto()
+    # A catchment's realization refers to a different catchment
+    MISMATCHED_REALIZATION = auto()
+
+
+class ValidationError(ValueError):
+    """
+    Error raised for a network that fails validation, carrying the full ::class:`ValidationReport`.
+    """
+
+    def __init__(self, report: ValidationReport):
+        super().__init__("Network failed validation with {} issue(s): {}".format(
+            len(report), ", ".join("{} {}".format(n, c) for c, n in report.counts().items())))
+        self.report = report
+
+
+class ValidationReport:
+    """
+    The structured result of validating a network, listing every violated invariant rather than only the first.
+
+    Each issue has the check that failed, the type and identifier of the object it was found on, and the identifier
+    of the related object involved (where there is one).
+    """
+
+    __slots__ = ["_issues"]
+
+    _COLUMNS = ["check", "object_type", "object_id", "related_id"]
+
+    def __init__(self, issues: pd.DataFrame):
+        self._issues = issues.reset_index(drop=True)
+
+    def __bool__(self) -> bool:
+        return self.is_valid
+
+    def __len__(self) -> int:
+        return len(self._issues)
+
+    @property
+    def issues(self) -> pd.DataFrame:
+        """
+        Table of all issues found.
+
+        Returns
+        -------
+        pd.DataFrame
+            Table with ``check`` (::class:`ValidationCheck` name), ``object_type``, ``object_id`` and ``related_id``
+            columns.
+        """
+        return self._issues
+
+    @property
+    def is_valid(self) -> bool:
+        return len(self._issues) == 0
+
+    def counts(self) -> pd.Series:
+        """
+        The number of issues found by each check.
+
+        Returns
+        -------
+        pd.Series
+            The number of issues, indexed by check name.
+        """
+        return self._issues["check"].value_counts(sort=False)
+
+    def for_check(self, check: ValidationCheck) -> pd.DataFrame:
+        """
+        The issues found by a particular check.
+
+        Parameters
+        ----------
+        check: ValidationCheck
+            The check.
+
+        Returns
+        -------
+        pd.DataFrame
+            The subset of ::attribute:`issues` found by the check.
+        """
+        return self._issues[self._issues["check"] == check.name]
+
+    def raise_if_invalid(self):
+        """
+        Raise an error if any issues were found.
+
+        Raises
+        ------
+        ValidationError
+            If any issues were found.
+        """
+        if not self.is_valid:
+            raise ValidationError(self)
+
+
+def _issues(check: ValidationCheck, object_type: str, object_ids, related_ids=None) -> pd.DataFrame:
+    object_ids = np.asarray(object_ids, dtype=object)
+    related_ids = np.full(object_ids.size, None, dtype=object) if related_ids is None else related_ids
+    return pd.DataFrame({"check": check.name, "object_type": object_type, "object_id": object_ids,
+                         "related_id": np.asarray(related_ids, dtype=object)}, columns=ValidationReport._COLUMNS)
+
+
+class _Codes:
+    """
+    Assigns contiguous integer codes to identifiers, so relationships can be checked as integer arrays.
+    """
+
+    __slots__ = ["_index"]
+
+    def __init__(self, ids: Iterable[str]):
+        self._index = pd.Index(np.asarray(list(ids), dtype=object)).drop_duplicates()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self._index.to_numpy()[codes]
+
+    def encode(self, ids: Iterable[str]) -> np.ndarray:
+        ids = np.asarray(list(ids), dtype=object)
+        codes = self._index.get_indexer(ids).astype(np.int64)
+        missing = codes < 0
+        if missing.any():
+            new_codes, new_ids = pd.factorize(ids[missing])
+            codes[missing] = new_codes + len(self._index)
+            self._index = self._index.append(pd.Index(new_ids, dtype=object))
+        return codes
+
+
+def _unmatched(left: Tuple[np.ndarray, np.ndarray], right: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """
+    Mask of the pairs in ``left`` that do not also appear in ``right``, with pairs given as two integer code arrays.
+    """
+    size = max(int(a.max()) + 1 if a.size > 0 else 0 for a in left + right)
+    keys = left[0] * size + left[1]
+    known = np.sort(right[0] * size + right[1])
+    positions = np.minimum(np.searchsorted(known, keys), max(known.size - 1, 0))
+    return known[positions] != keys if known.size > 0 else np.ones(keys.size, dtype=bool)
+
+
+def _cyclic(upstream: np.ndarray, downstream: np.ndarray, n: int) -> np.ndarray:
+    """
+    Find the nodes of a directed graph that lie on a cycle: the members of strongly connected components of more than
+    one node, and nodes with an edge to themselves.
+
+    Nodes with no remaining incoming or no remaining outgoing edges are first peeled away in bulk, leaving only the
+    cycles and any nodes between them for an iterative Tarjan search of their strongly connected components.
+    """
+    remaining = np.ones(n, dtype=bool)
+    out_offsets, out_indices = _csr(upstream, n)
+    in_offsets, in_indices = _csr(downstream, n)
+    successor_of, predecessor_of = downstream[out_indices], upstream[in_indices]
+    in_degree = np.bincount(downstream, minlength=n)
+    out_degree = np.bincount(upstream, minlength=n)
+    peel = np.flatnonzero((in_degree == 0) | (out_degree == 0))
+    while peel.size > 0:
+        remaining[peel] = False
+        _, successors = _csr_gather(out_offsets, successor_of, peel)
+        _, predecessors = _csr_gather(in_offsets, predecessor_of, peel)
+        # Only the degrees of the neighbours of peeled nodes change, keeping peeling linear overall
+        np.subtract.at(in_degree, successors, 1)
+        np.subtract.at(out_degree, predecessors, 1)
+        candidates = np.unique(np.concatenate((successors, predecessors)))
+        peel = candidates[remaining[candidates] & ((in_degree[candidates] <= 0) | (out_degree[candidates] <= 0))]
+
+    on_cycle = np.zeros(n, dtype=bool)
+    on_cycle[upstream[(upstream == downstream) & remaining[upstream]]] = True
+    kept = remaining[upstream] & remaining[downstream]
+    out_offsets, out_indices = _csr(upstream[kept], n)
+    offsets, successor_of = out_offsets.tolist(), downstream[kept][out_indices].tolist()
+    order, low = [-1] * n, [0] * n
+    on_stack = [False] * n
+    stack: List[int] = []
+    visited = 0
+    for root in np.flatnonzero(remaining).tolist():
+        if order[root] >= 0:
+            continue
+        order[root] = low[root] = visited
+        visited += 1
+        stack.append(root)
+        on_stack[root] = True
+        # Depth-first search frames of node and position of its next outgoing edge
+        frames = [[root, offsets[root]]]
+        while frames:
+            frame = frames[-1]
+            node, edge = frame
+            if edge < offsets[node + 1]:
+                frame[1] += 1
+                successor = successor_of[edge]
+                if order[successor] < 0:
+                    order[successor] = low[successor] = visited
+                    visited += 1
+                    stack.append(successor)
+                    on_stack[successor] = True
+                    frames.append([successor, offsets[successor]])
+                elif on_stack[successor]:
+                    low[node] = min(low[node], order[successor])
+                continue
+            frames.pop()
+            if frames:
+                parent = frames[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == order[node]:
+                component = []
+                while not component or component[-1] != node:
+                    component.append(stack.pop())
+                    on_stack[component[-1]] = False
+                if len(component) > 1:
+                    on_cycle[component] = True
+    return np.flatnonzero(on_cycle)
+
+
+def validate(catchments: Iterable[Catchment],
+             nexuses: Iterable[Nexus] = tuple(),
+             realizations: Iterable[Realization] = tuple()) -> ValidationReport:
+    """
+    Check the topology invariants of a network of objects, reporting every violation found.
+
+    The object graph is read once into flat identifier tables, after which each invariant is checked over the whole
+    network at once using table joins and array operations.  The nexuses checked are those given along with those
+    referenced by any of the catchments, and the realizations checked are those given along with those attached to any
+    of the catchments.
+
+    Parameters
+    ----------
+    catchments: Iterable[Catchment]
+        The catchments of the network.
+    nexuses: Iterable[Nexus]
+        Any additional nexuses of the network.
+    realizations: Iterable[Realization]
+        Any additional realizations for catchments of the network.
+
+    Returns
+    -------
+    ValidationReport
+        The report of all issues found.
+    """
+    catchments = list(catchments)
+    nexus_objects = {id(n): n for n in nexuses}
+    nexus_objects.update((id(n), n) for c in catchments for n in (c.inflow, c.outflow) if n is not None)
+    nexus_list = list(nexus_objects.values())
+    realization_list = list(realizations) + [c.realization for c in catchments if c.realization is not None]
+
+    # Catchments of the network take the first codes, so any code past those is for an unknown catchment
+    catchment_ids = [c.id for c in catchments]
+    cat_codes = _Codes(catchment_ids)
+    num_known = len(cat_codes)
+    nex_codes = _Codes(n.id for n in nexus_list)
+    found: List[pd.DataFrame] = []
+    for object_type, ids in (("catchment", pd.Series(catchment_ids, dtype=object)),
+                             ("nexus", pd.Series([n.id for n in nexus_list], dtype=object))):
+        found.append(_issues(ValidationCheck.DUPLICATE_ID, object_type, ids[ids.duplicated()].unique()))
+
+    def pairs(linked: List[Tuple[str, str]], related_codes: _Codes = cat_codes) -> Tuple[np.ndarray, np.ndarray]:
+        return cat_codes.encode(p[0] for p in linked), related_codes.encode(p[1] for p in linked)
+
+    # Catchment-nexus links as seen from each side, as (catchment, nexus) code pairs per role
+    def from_catchments(attribute: str) -> Tuple[np.ndarray, np.ndarray]:
+        nexus_of = [getattr(c, attribute) for c in catchments]
+        return pairs([(c, n.id) for c, n in zip(catchment_ids, nexus_of) if n is not None], nex_codes)
+
+    def from_nexuses(attribute: str) -> Tuple[np.ndarray, np.ndarray]:
+        return pairs([(c.id, n.id) for n in nexus_list for c in getattr(n, attribute)], nex_codes)
+
+    outflows, inflows = from_catchments("outflow"), from_catchments("inflow")
+    contributing, receiving = from_nexuses("contributing_catchments"), from_nexuses("receiving_catchments")
+    for nexus_side, catchment_side in ((contributing, outflows), (receiving, inflows)):
+        unknown = nexus_side[0] >= num_known
+        found.append(_issues(ValidationCheck.UNKNOWN_CATCHMENT, "nexus", nex_codes.decode(nexus_side[1][unknown]),
+                             cat_codes.decode(nexus_side[0][unknown])))
+        unmatched = ~unknown & _unmatched(nexus_side, catchment_side)
+        found.append(_issues(ValidationCheck.NEXUS_NOT_RECIPROCATED, "nexus",
+                             nex_codes.decode(nexus_side[1][unmatched]), cat_codes.decode(nexus_side[0][unmatched])))
+        unmatched = _unmatched(catchment_side, nexus_side)
+        found.append(_issues(ValidationCheck.CATCHMENT_NOT_RECIPROCATED, "catchment",
+                             cat_codes.decode(catchment_side[0][unmatched]),
+                             nex_codes.decode(catchment_side[1][unmatched])))
+
+    # Cycles among catchment connections, i.e., the outflow nexus of one being the inflow of another
+    in_offsets, in_positions = _csr(inflows[1], len(nex_codes))
+    owner, positions = _csr_gather(in_offsets, in_positions, outflows[1])
+    cyclic = _cyclic(outflows[0][owner], inflows[0][positions], len(cat_codes))
+    found.append(_issues(ValidationCheck.CYCLE, "catchment", cat_codes.decode(cyclic)))
+
+    # Containment and conjoint relationships, as (catchment, related catchment) code pairs
+    containing = pairs([(c.id, c.containing_catchment.id) for c in catchments if c.containing_catchment is not None])
+    contained = pairs([(i.id, c.id) for c in catchments for i in c.contained_catchments])
+    dangling = containing[1] >= num_known
+    found.append(_issues(ValidationCheck.DANGLING_CONTAINING_CATCHMENT, "catchment",
+                         cat_codes.decode(containing[0][dangling]), cat_codes.decode(containing[1][dangling])))
+    unmatched = ~dangling & _unmatched(containing, contained)
+    found.append(_issues(ValidationCheck.CONTAINMENT_NOT_RECIPROCATED, "catchment",
+                         cat_codes.decode(containing[0][unmatched]), cat_codes.decode(containing[1][unmatched])))
+    unmatched = _unmatched(contained, containing)
+    found.append(_issues(ValidationCheck.CONTAINMENT_NOT_RECIPROCATED, "catchment",
+                         cat_codes.decode(contained[0][unmatched]), cat_codes.decode(contained[1][unmatched])))
+    conjoined = pairs([(c.id, j.id) for c in catchments for j in c.conjoined_catchments])
+    unmatched = _unmatched(conjoined, conjoined[::-1])
+    found.append(_issues(ValidationCheck.CONJOINT_NOT_RECIPROCATED, "catchment",
+                         cat_codes.decode(conjoined[0][unmatched]), cat_codes.decode(conjoined[1][unmatched])))
+
+    # Realizations
+    realized = pd.DataFrame([(r.id, r.catchment_id) for r in realization_list if r.catchment_id is not None],
+                            columns=["realization_id", "catchment_id"], dtype=object).drop_duplicates()
+    dangling = ~realized["catchment_id"].isin(catchment_ids)
+    found.append(_issues(ValidationCheck.DANGLING_REALIZATION, "realization", realized["realization_id"][dangling],
+                         realized["catchment_id"][dangling]))
+    mismatched = [(c.id, c.realization.id) for c in catchments
+                  if c.realization is not None and c.realization.catchment_id not in (None, c.id)]
+    found.append(_issues(ValidationCheck.MISMATCHED_REALIZATION, "catchment", [m[0] for m in mismatched],
+                         [m[1] for m in mismatched]))
+
+    return ValidationReport(pd.concat(found, ignore_index=True))
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from .serialization import deepcopy_linked, reduce_linked, set_slot_state, slot_state
+
 if TYPE_CHECKING:
     from .catchment import Catchment, Catchments_Collection
     from .hydrolocation.hydrolocation import HydroLocation
@@ -37,6 +39,15 @@ class Nexus:
         self._receiving_catchments = self._convert_collection_to_tuple(receiving_catchments) 
         self._contributing_catchments = self._convert_collection_to_tuple(contributing_catchments) 
 
+    def __copy__(self) -> Nexus:
+        return set_slot_state(type(self).__new__(type(self)), slot_state(self))
+
+    def __deepcopy__(self, memo: dict) -> Nexus:
+        return deepcopy_linked(self, memo)
+
+    def __reduce__(self):
+        return reduce_linked(self)
+
     @property
     def id(self) -> str:
         """Return nexus identifier
@@ -48,6 +59,17 @@ class Nexus:
         """
         return self._id
 
+    @property
+    def hydro_location(self) -> HydroLocation:
+        """Return the HydroLocation associated with this nexus
+
+        Returns
+        -------
+        HydroLocation
+            HydroLocation associated with this nexus
+        """
+        return self._hydro_location
+
     @property
     def receiving_catchments (self) -> tuple[Catchment, ...]:
         """Tuple of Catchment object(s) receiving water from nexus
@@ -84,6 +106,10 @@ class Nexus:
         -------
         tuple[Catchment, ...]
             A tuple containing the catchments included directly or in the container parameter object.
+        Raises
+        ------
+        TypeError
+            If the parameter is not a catchment, list or tuple.
         """
         # avoid circular import
         from .catchment import Catchment
@@ -94,4 +120,5 @@ class Nexus:
         elif isinstance(collection, Catchment):
             return (collection,)
         else:
-            raise AssertionError("unreachable")
+            raise TypeError("Expected a catchment or a list or tuple of catchments, but got {}".format(
+                type(collection).__name__))
@@ -1,5 +1,7 @@
 from typing import Optional
 
+from .serialization import set_slot_state, slot_state
+
 class Realization(object):
     """
     Implementation of the HY Features Realization concept.
@@ -24,6 +26,12 @@ class Realization(object):
         self._id = realization_id
         self._catchment_id = catchment_id
 
+    def __getstate__(self):
+        return slot_state(self)
+
+    def __setstate__(self, state):
+        set_slot_state(self, state)
+
     @property
     def id(self) -> str:
         """Return realization identifier
@@ -0,0 +1,412 @@
+"""
+Compact, recursion-free serialization of the slotted hypy object types.
+
+Catchments, nexuses and catchment formulations refer to one another (a catchment to its outflow nexus, the nexus to its
+receiving catchments, and so on), so pickling or deep-copying any one of them with the default protocol recurses along
+the whole connected graph, hitting the recursion limit on long mainstems.  Instead, these objects are flattened into an
+::class:`ObjectGraph`: a record of the slot values of every connected object, with references between them replaced by
+positions, which is saved without recursion and restores every cross-link in a single pass.
+
+Pickling or deep-copying any one of these objects therefore saves every object linked to it, directly or indirectly,
+rather than the object alone; shallow copies keep the links of the copy to the original objects, and never flatten the
+graph.  A graph flattened while pickling is shared by every object of it pickled by the same pickler, for as long as the
+pickler's memo holds it, so several objects of one graph pickled together, even by ::function:`pickle.dumps`, are
+restored linked to one another; a ::class:`Pickler`, ::function:`dumps` or a ::class:`Network` do the same without
+relying on the memo.  Deep copies share flattened graphs through the copy's memo, so objects of one graph deep-copied
+together stay linked.
+"""
+from __future__ import annotations
+
+import copy
+import operator
+import pickle
+import threading
+import weakref
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+_SKIPPED_SLOTS = ("__dict__", "__weakref__")
+
+_slot_names: Dict[type, Tuple[str, ...]] = {}
+_slot_getters: Dict[type, Callable[[Any], Tuple[Any, ...]]] = {}
+_linked_types: Optional[Tuple[type, ...]] = None
+_linked_reducers: Optional[Tuple[Callable, ...]] = None
+# Whether each type seen while flattening is a linked type (1), a sequence type (2) or neither (0)
+_kinds: Dict[type, int] = {}
+
+# Graphs flattened by ::function:`reduce_linked` on each thread, by the ids of their objects.  Each graph is referred to
+# weakly, so it is only shared while the memo of the pickler that saved it holds it: for the rest of a pickling
+# operation, and never across operations, nor between threads pickling at the same time.
+_reduced = threading.local()
+
+
+class _Unset:
+    """
+    Marker for a slot without a value.
+    """
+
+    def __reduce__(self):
+        return "UNSET"
+
+
+UNSET = _Unset()
+
+
+def _linked() -> Tuple[type, ...]:
+    global _linked_types
+    if _linked_types is None:
+        # Imported here, since these modules use this one
+        from .catchment import Catchment
+        from .formulation import Formulation
+        from .nexus import Nexus
+        _linked_types = (Catchment, Nexus, Formulation)
+    return _linked_types
+
+
+def _reduced_linked(obj: Any) -> bool:
+    """
+    Whether an object is reduced by ::function:`reduce_linked`, rather than by a reduction of its own type.
+    """
+    global _linked_reducers
+    if _linked_reducers is None:
+        _linked_reducers = tuple(cls.__reduce__ for cls in _linked())
+    return getattr(type(obj), "__reduce__", None) in _linked_reducers
+
+
+def slot_names(cls: type) -> Tuple[str, ...]:
+    """
+    Get the names of the slots of a type, including those declared by its supertypes.
+
+    Parameters
+    ----------
+    cls: type
+        The type.
+
+    Returns
+    -------
+    Tuple[str, ...]
+        The slot names, from the most general supertype to the type itself.
+    """
+    names = _slot_names.get(cls)
+    if names is None:
+        names = []
+        for klass in reversed(cls.__mro__):
+            slots = klass.__dict__.get("__slots__", ())
+            for name in (slots,) if isinstance(slots, str) else slots:
+                if name not in _SKIPPED_SLOTS and name not in names:
+                    names.append(name)
+        names = _slot_names[cls] = tuple(names)
+    return names
+
+
+def slot_state(obj: Any) -> Tuple[Any, ...]:
+    """
+    Get the state of a slotted object, as the value of each of its slots, followed by its ``__dict__`` if it has one.
+
+    Parameters
+    ----------
+    obj: Any
+        The object.
+
+    Returns
+    -------
+    Tuple[Any, ...]
+        The values of the slots named by ::function:`slot_names`, with ::data:`UNSET` for any without a value.
+    """
+    getter = _slot_getters.get(type(obj))
+    if getter is None:
+        names = slot_names(type(obj))
+        getter = _slot_getters[type(obj)] = operator.attrgetter(*names) if len(names) > 1 else \
+            lambda o: (getattr(o, names[0]),) if names else ()
+    try:
+        state = getter(obj)
+    except AttributeError:
+        state = tuple(getattr(obj, name, UNSET) for name in slot_names(type(obj)))
+    attributes = getattr(obj, "__dict__", None)
+    return state if attributes is None else state + (attributes,)
+
+
+def set_slot_state(obj: Any, state: Tuple[Any, ...]) -> Any:
+    """
+    Restore the state of a slotted object from ::function:`slot_state`.
+
+    Parameters
+    ----------
+    obj: Any
+        The object, typically created with ``__new__``.
+    state: Tuple[Any, ...]
+        The state.
+
+    Returns
+    -------
+    Any
+        The object.
+    """
+    names = slot_names(type(obj))
+    for name, value in zip(names, state):
+        if value is not UNSET:
+            object.__setattr__(obj, name, value)
+    if len(state) > len(names):
+        obj.__dict__.update(state[-1])
+    return obj
+
+
+class ObjectGraph:
+    """
+    Flattened record of a graph of linked catchments, nexuses and formulations.
+
+    Each object is recorded as its type and its ::function:`slot_state`, with any slot referring to another object of
+    the graph, or to a tuple or list of them, recorded separately as a link by position.  Other slot values, such as
+    hydrolocations and realizations, are kept as they are.  Graphs pickle and deep-copy in time linear in their size,
+    without recursing along links, and ::method:`restore` rebuilds the objects and their links in a single pass.
+    """
+
+    __slots__ = ["_types", "_states", "_links", "_positions", "_objects", "_restored", "__weakref__"]
+
+    @classmethod
+    def flatten(cls, objects: Iterable[Any]) -> ObjectGraph:
+        """
+        Flatten the graph of every object linked, directly or indirectly, to any of several objects.
+
+        Parameters
+        ----------
+        objects: Iterable[Any]
+            Catchments, nexuses or formulations, which are placed first in the graph, in order.
+
+        Returns
+        -------
+        ObjectGraph
+            The graph.
+        """
+        linked = _linked()
+
+        def kind(t: type) -> int:
+            k = _kinds.get(t)
+            if k is None:
+                k = _kinds[t] = 1 if issubclass(t, linked) else 2 if issubclass(t, (tuple, list)) else 0
+            return k
+
+        graph = cls.__new__(cls)
+        graph._types = []
+        graph._states = []
+        graph._links = []
+        graph._positions = {}
+        graph._objects = []
+        graph._restored = None
+
+        def position(obj: Any) -> int:
+            i = graph._positions.get(id(obj))
+            if i is None:
+                i = graph._positions[id(obj)] = len(graph._objects)
+                graph._objects.append(obj)
+            return i
+
+        for obj in objects:
+            if not isinstance(obj, linked):
+                raise TypeError("Cannot flatten {} objects".format(type(obj).__name__))
+            position(obj)
+        # Objects are appended as they are first reached, so iterating by position visits each exactly once
+        i = 0
+        while i < len(graph._objects):
+            obj = graph._objects[i]
+            state = slot_state(obj)
+            linked_slots = None
+            for s, value in enumerate(state):
+                k = _kinds.get(type(value))
+                if k is None:
+                    k = kind(type(value))
+                if k == 1:
+                    graph._links.append((i, s, position(value)))
+                elif k == 2 and value and all(kind(type(v)) == 1 for v in value):
+                    graph._links.append((i, s, type(value)([position(v) for v in value])))
+                else:
+                    continue
+                linked_slots = (linked_slots or []) + [s]
+            if linked_slots is not None:
+                state = tuple(None if s in linked_slots else value for s, value in enumerate(state))
+            graph._types.append(type(obj))
+            graph._states.append(state)
+            i += 1
+        return graph
+
+    @classmethod
+    def _from_records(cls, types: List[type], states: List[Tuple[Any, ...]], links: List[Tuple[int, int, Any]]):
+        graph = cls.__new__(cls)
+        graph._types = types
+        graph._states = states
+        graph._links = links
+        graph._positions = None
+        graph._objects = None
+        graph._restored = None
+        return graph
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def __reduce__(self):
+        return ObjectGraph._from_records, (self._types, self._states, self._links)
+
+    def position(self, obj: Any) -> int:
+        """
+        Get the position of an object within a graph flattened by this process.
+
+        Parameters
+        ----------
+        obj: Any
+            The object.
+
+        Returns
+        -------
+        int
+            The position of the object.
+        """
+        if self._positions is None or id(obj) not in self._positions:
+            raise KeyError("Object is not part of this graph")
+        return self._positions[id(obj)]
+
+    def restore(self) -> List[Any]:
+        """
+        Rebuild the objects of the graph, along with their links, which is done only once per graph.
+
+        Returns
+        -------
+        List[Any]
+            The rebuilt objects, in the order of their positions.
+        """
+        if self._restored is None:
+            restored = [set_slot_state(cls.__new__(cls), state) for cls, state in zip(self._types, self._states)]
+            names = [slot_names(cls) for cls in self._types]
+            for i, s, target in self._links:
+                value = restored[target] if isinstance(target, int) else type(target)(restored[t] for t in target)
+                object.__setattr__(restored[i], names[i][s], value)
+            self._restored = restored
+        return self._restored
+
+
+def _graph_member(graph: ObjectGraph, position: int) -> Any:
+    return graph.restore()[position]
+
+
+def reduce_linked(obj: Any) -> Tuple[Any, Tuple[ObjectGraph, int]]:
+    """
+    Reduce a catchment, nexus or formulation for pickling, as its position in its flattened graph.
+
+    The graph of every object linked to it is flattened only once per pickling operation: it is shared with the other
+    objects of the graph for as long as the pickler's memo holds it, and flattened anew by later operations, so that
+    the reduction always reflects the current links.
+
+    Parameters
+    ----------
+    obj: Any
+        The object.
+
+    Returns
+    -------
+    Tuple[Any, Tuple[ObjectGraph, int]]
+        The reduction, as a function restoring the object from its graph and the arguments to it.
+    """
+    graphs = getattr(_reduced, "graphs", None)
+    if graphs is None:
+        graphs = _reduced.graphs = weakref.WeakValueDictionary()
+    graph = graphs.get(id(obj))
+    if graph is None:
+        graph = ObjectGraph.flatten((obj,))
+        graphs.update(dict.fromkeys(graph._positions, graph))
+    return _graph_member, (graph, graph.position(obj))
+
+
+def deepcopy_linked(obj: Any, memo: Dict[int, Any]) -> Any:
+    """
+    Deep-copy a catchment, nexus or formulation, along with every object linked to it.
+
+    Every other object of the flattened graph is entered in the copy's memo, so that deep-copying it within the same
+    operation returns its copy from the same copied graph.
+
+    Parameters
+    ----------
+    obj: Any
+        The object.
+    memo: Dict[int, Any]
+        The memo of the deep-copy operation.
+
+    Returns
+    -------
+    Any
+        The copy.
+    """
+    graph = ObjectGraph.flatten((obj,))
+    copied = copy.deepcopy(graph, memo).restore()
+    memo.update(zip(graph._positions, copied))
+    # The memo is keyed by ids, so the copied objects must outlive the operation
+    memo.setdefault(id(memo), []).append(graph)
+    return copied[graph.position(obj)]
+
+
+class Pickler(pickle.Pickler):
+    """
+    Pickler flattening the graph of linked catchments, nexuses and formulations only once for all of its objects that
+    it pickles, so that they are saved once and restored linked to one another.
+
+    The flattened graphs are held with the pickler's memo, and dropped along with it by ::method:`clear_memo`.
+    """
+
+    def __init__(self, file, protocol: Optional[int] = None, **kwargs):
+        super().__init__(file, protocol, **kwargs)
+        self._graphs: Dict[int, ObjectGraph] = {}
+
+    def clear_memo(self):
+        super().clear_memo()
+        self._graphs.clear()
+
+    def reducer_override(self, obj: Any):
+        if not _reduced_linked(obj):
+            return NotImplemented
+        graph = self._graphs.get(id(obj))
+        if graph is None:
+            graph = ObjectGraph.flatten((obj,))
+            self._graphs.update(dict.fromkeys(graph._positions, graph))
+        return _graph_member, (graph, graph.position(obj))
+
+
+def dumps(objects: Iterable[Any], protocol: int = pickle.HIGHEST_PROTOCOL) -> bytes:
+    """
+    Pickle catchments, nexuses or formulations, along with every object linked to them, as a single flattened graph.
+
+    Parameters
+    ----------
+    objects: Iterable[Any]
+        The objects.
+    protocol: int
+        The pickle protocol.
+
+    Returns
+    -------
+    bytes
+        The pickled graph.
+
+    See Also
+    -------
+    ::function:`loads`
+    """
+    objects = list(objects)
+    graph = ObjectGraph.flatten(objects)
+    return pickle.dumps((graph, [graph.position(obj) for obj in objects]), protocol=protocol)
+
+
+def loads(data: bytes) -> List[Any]:
+    """
+    Unpickle objects pickled by ::function:`dumps`.
+
+    Parameters
+    ----------
+    data: bytes
+        The pickled graph.
+
+    Returns
+    -------
+    List[Any]
+        The objects originally given to ::function:`dumps`, linked to one another and to the rest of their graph.
+    """
+    graph, positions = pickle.loads(data)
+    restored = graph.restore()
+    return [restored[i] for i in positions]
@@ -0,0 +1,16 @@
+import pytest
+from typing import Dict, Optional, Tuple
+
+
+@pytest.fixture
+def small_topology() -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """
+        Small branching network: cat-1 and cat-2 join into cat-3, which joins cat-4 into cat-5
+    """
+    return {
+        'cat-1': (None, 'nex-1'),
+        'cat-2': (None, 'nex-1'),
+        'cat-3': ('nex-1', 'nex-2'),
+        'cat-4': (None, 'nex-2'),
+        'cat-5': ('nex-2', 'nex-3'),
+    }
@@ -0,0 +1,125 @@
+import time
+import numpy as np
+
+from collections import defaultdict
+from typing import Callable, Dict, List, Mapping, Optional, Tuple, Type
+
+from hypy import Catchment, CatchmentFormulation, FormulatableCatchment, HydroLocation, Network, Nexus
+
+"""
+    Builders of catchment and nexus objects and networks shared by the test suites
+"""
+
+
+def build_catchments(topology: Dict[str, Tuple[Optional[str], Optional[str]]],
+                     catchment_type: type = Catchment,
+                     locations: Optional[Mapping[str, HydroLocation]] = None) -> Tuple[List[Catchment], Dict[str, Nexus]]:
+    """
+        Build linked catchment and nexus objects from a map of catchment id to (inflow, outflow) nexus ids, giving
+        nexuses the hydrolocations in ``locations`` or otherwise one without a geometry
+    """
+    nexus_ids = {nid for pair in topology.values() for nid in pair if nid is not None}
+    # Nexuses are initialized once the catchments linking them exist, so their links are set through the constructor
+    nexuses = {nid: Nexus.__new__(Nexus) for nid in sorted(nexus_ids)}
+    catchments = [catchment_type(cid, {}, inflow=nexuses.get(inflow), outflow=nexuses.get(outflow))
+                  for cid, (inflow, outflow) in topology.items()]
+    receiving, contributing = defaultdict(list), defaultdict(list)
+    for catchment, (inflow, outflow) in zip(catchments, topology.values()):
+        receiving[inflow].append(catchment)
+        contributing[outflow].append(catchment)
+    locations = locations or {}
+    for nid, nexus in nexuses.items():
+        nexus.__init__(nid, locations.get(nid, HydroLocation(nid)), receiving_catchments=tuple(receiving[nid]),
+                       contributing_catchments=tuple(contributing[nid]))
+    return catchments, nexuses
+
+
+def binary_tree_topology(size: int) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """
+        Topology of a binary tree of catchments, where catchment ``i`` flows into catchment ``(i - 1) // 2``
+    """
+    topology = {}
+    for i in range(size):
+        inflow = 'nex-{}'.format(i) if 2 * i + 1 < size else None
+        outflow = 'nex-{}'.format((i - 1) // 2) if i > 0 else 'nex-outlet'
+        topology['cat-{}'.format(i)] = (inflow, outflow)
+    return topology
+
+
+def binary_tree_network(size: int, scale: Optional[float] = None) -> Network:
+    """
+        Network of a binary tree of catchments, each given its own ::class:`ScalingFormulation` when ``scale`` is given
+    """
+    if scale is None:
+        return Network.from_catchments(build_catchments(binary_tree_topology(size))[0])
+    catchments, _ = build_catchments(binary_tree_topology(size), catchment_type=FormulatableCatchment)
+    for catchment in catchments:
+        catchment.formulation = ScalingFormulation('form-' + catchment.id, scale)
+    return Network.from_catchments(catchments)
+
+
+def chain_network(depth: int, width: int = 0) -> Network:
+    """
+        Network without retained objects of a chain of ``depth`` catchments, where catchment ``i`` flows into catchment
+        ``i + 1``, followed by ``width`` catchments each flowing into a nexus of its own
+    """
+    size = depth + width
+    inflow = np.full(size, -1, dtype=np.int64)
+    inflow[1:depth] = np.arange(depth - 1)
+    return Network(['cat-{}'.format(i) for i in range(size)], ['nex-{}'.format(i) for i in range(size)], inflow,
+                   np.arange(size, dtype=np.int64))
+
+
+def elapsed(prepare: Callable[[], Callable[[], object]], repeats: int = 3) -> float:
+    """
+        Best of several times of a computation, set up afresh by ``prepare`` outside the timing for every repeat
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        compute = prepare()
+        start = time.perf_counter()
+        compute()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class ScalingFormulation(CatchmentFormulation):
+    """
+        Deterministic formulation scaling its input, counting how often it is computed
+    """
+
+    __slots__ = ['scale', 'calls', 'deterministic']
+
+    @classmethod
+    def factory_create_from_config(cls, local_config: dict, global_config: Optional[dict] = None):
+        pass
+
+    @classmethod
+    def get_formulation_type(cls) -> str:
+        return cls.__name__
+
+    @classmethod
+    def get_required_params_for_type(cls) -> Dict[str, Type]:
+        return {'scale': float}
+
+    def __init__(self, formulation_id: str, scale: float, deterministic: bool = True):
+        super().__init__(formulation_id=formulation_id, catchment=None)
+        self.scale = scale
+        self.calls = 0
+        self.deterministic = deterministic
+
+    def get_response(self, input_flux: float, **kwargs) -> float:
+        self.calls += 1
+        return self.scale * input_flux
+
+    @property
+    def is_deterministic(self) -> bool:
+        return self.deterministic
+
+    @property
+    def param_values(self):
+        return {'scale': self.scale}
+
+    @property
+    def required_params(self) -> Dict[str, Type]:
+        return self.get_required_params_for_type()
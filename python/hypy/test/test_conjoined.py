@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from hypy import Catchment, Network
+from hypy.network import ConjoinedIndex
+
+"""
+    Test suite for the conjoined catchment group index
+"""
+
+
+@pytest.fixture
+def network():
+    """
+        Network with a chain of conjoined catchments a-b-c, a pair d-e, and a lone catchment f
+    """
+    a, b, c, d, e, f = (Catchment('cat-{}'.format(x), {}) for x in 'abcdef')
+    a._conjoined_catchments = (b,)
+    b._conjoined_catchments = (a, c)
+    c._conjoined_catchments = (b,)
+    d._conjoined_catchments = (e, Catchment('cat-elsewhere', {}))
+    e._conjoined_catchments = (d,)
+    yield Network.from_catchments([a, b, c, d, e, f])
+
+
+def test_conjoined_groups(network):
+    """
+        Test transitive conjoint relationships form single groups with contiguous members
+    """
+    groups = network.conjoined_groups
+    assert groups.num_groups == 3
+    assert list(groups.group_ids) == [0, 0, 0, 1, 1, 2]
+    assert list(network.catchment_ids[groups.members(groups.group_of(network.catchment_index('cat-c')))]) == \
+        ['cat-a', 'cat-b', 'cat-c']
+    assert list(groups.sizes) == [3, 2, 1]
+    assert np.array_equal(groups.members_array[groups.offsets[1]:groups.offsets[2]], groups.members(1))
+    assert network.conjoined_groups is groups
+
+
+def test_conjoined_groups_follow_links(network):
+    """
+        Test the groups are kept until refreshed, and then rebuilt from the changed conjoint relationships
+    """
+    groups = network.conjoined_groups
+    assert groups.num_groups == 3
+    f, e = network.catchment('cat-f'), network.catchment('cat-e')
+    e._conjoined_catchments = e.conjoined_catchments + (f,)
+    f._conjoined_catchments = (e,)
+    assert network.conjoined_groups is groups
+    network.refresh()
+    groups = network.conjoined_groups
+    assert list(groups.group_ids) == [0, 0, 0, 1, 1, 1]
+
+
+def test_components_from_links():
+    """
+        Test groups from links listed in arbitrary order and direction
+    """
+    rng = np.random.default_rng(3)
+    labels = rng.integers(0, 50, size=1000)
+    order = np.argsort(labels, kind='stable')
+    first, second = order[:-1], order[1:]
+    same = labels[first] == labels[second]
+    shuffle = rng.permutation(np.count_nonzero(same))
+    index = ConjoinedIndex(1000, second[same][shuffle], first[same][shuffle])
+    assert index.num_groups == np.unique(labels).size
+    for group in range(index.num_groups):
+        assert np.all(labels[index.members(group)] == labels[index.members(group)[0]])
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from hypy import Simulation, simulate
+from hypy.network import ArrayForcing, NetCDFForcing, ParquetForcing, prefetch
+from hypy.test.helpers import binary_tree_network
+
+"""
+    Test suite for chunked forcing providers
+"""
+
+
+@pytest.fixture
+def network():
+    """
+        Binary tree network to force
+    """
+    yield binary_tree_network(15)
+
+
+@pytest.fixture
+def forcing(network):
+    """
+        Forcing ordered by network catchment index, along with a source column order differing from it
+    """
+    values = np.random.default_rng(4).random((23, network.num_catchments))
+    order = np.random.default_rng(5).permutation(network.num_catchments)
+    yield values, order
+
+
+def test_array_forcing_chunks(network, forcing, tmp_path):
+    """
+        Test memory-mapped forcing is read in aligned blocks covering every timestep
+    """
+    values, order = forcing
+    np.save(tmp_path / 'forcing.npy', values[:, order])
+    provider = ArrayForcing.from_npy(tmp_path / 'forcing.npy', network.catchment_ids[order])
+    chunks = list(provider.chunks(network, chunk_size=5))
+    assert [start for start, _ in chunks] == [0, 5, 10, 15, 20]
+    assert np.array_equal(np.vstack([block for _, block in chunks]), values)
+
+
+def test_missing_catchments(network, forcing):
+    """
+        Test catchments missing from the source are rejected unless filled
+    """
+    values, _ = forcing
+    provider = ArrayForcing(values[:, 1:], network.catchment_ids[1:])
+    assert not hasattr(provider, '__dict__')
+    with pytest.raises(KeyError):
+        provider.chunks(network, chunk_size=5)
+    _, block = next(iter(provider.chunks(network, chunk_size=5, fill_value=0.0)))
+    assert np.all(block[:, 0] == 0.0)
+    assert np.array_equal(block[:, 1:], values[:5, 1:])
+
+
+def test_prefetch_errors_and_early_stop():
+    """
+        Test errors while producing are raised to the consumer, and the producer stops when the consumer does
+    """
+    def failing():
+        yield 1
+        raise RuntimeError('unreadable')
+
+    with pytest.raises(RuntimeError):
+        list(prefetch(failing()))
+    produced = []
+
+    def counting():
+        for i in range(1000):
+            produced.append(i)
+            yield i
+
+    items = prefetch(counting(), depth=2)
+    assert next(items) == 0
+    items.close()
+    assert len(produced) < 10
+
+
+def test_run_chunked(network, forcing):
+    """
+        Test a chunked run matches running all forcing at once, resuming from the simulation's current step
+    """
+    values, order = forcing
+    provider = ArrayForcing(values[:, order], network.catchment_ids[order])
+    simulation = Simulation(network)
+    simulation.run(values[:3])
+    blocks = list(simulation.run_chunked(provider, chunk_size=8))
+    assert [start for start, _ in blocks] == [3, 11, 19]
+    assert np.allclose(np.vstack([flows for _, flows in blocks]), simulate(network, values)[3:])
+
+
+def test_netcdf_forcing(network, forcing, tmp_path):
+    """
+        Test forcing read from a NetCDF variable with catchments as the first dimension
+    """
+    netcdf = pytest.importorskip('netCDF4')
+    values, order = forcing
+    with netcdf.Dataset(str(tmp_path / 'forcing.nc'), 'w') as dataset:
+        dataset.createDimension('catchment', network.num_catchments)
+        dataset.createDimension('time', values.shape[0])
+        ids = dataset.createVariable('ids', str, ('catchment',))
+        ids[:] = np.asarray(network.catchment_ids[order], dtype=object)
+        dataset.createVariable('precip', 'f8', ('catchment', 'time'))[:] = values[:, order].T
+    provider = NetCDFForcing(tmp_path / 'forcing.nc', 'precip')
+    assert provider.num_steps == values.shape[0]
+    assert np.allclose(np.vstack([block for _, block in provider.chunks(network, chunk_size=10)]), values)
+    provider.close()
+
+
+def test_parquet_forcing(network, forcing, tmp_path):
+    """
+        Test forcing read from a wide Parquet file spanning several row groups
+    """
+    pa = pytest.importorskip('pyarrow')
+    parquet = pytest.importorskip('pyarrow.parquet')
+    values, order = forcing
+    columns = {cid: values[:, i] for i, cid in zip(order, network.catchment_ids[order])}
+    columns['time'] = np.arange(values.shape[0])
+    parquet.write_table(pa.table(columns), str(tmp_path / 'forcing.parquet'), row_group_size=4)
+    provider = ParquetForcing(tmp_path / 'forcing.parquet', time_column='time')
+    assert provider.num_steps == values.shape[0]
+    assert np.allclose(np.vstack([block for _, block in provider.chunks(network, chunk_size=7)]), values)
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from hypy import NWISLocation, Network
+from hypy.test.helpers import binary_tree_network, build_catchments
+
+"""
+    Test suite for gauge coverage of network catchments
+"""
+
+
+@pytest.fixture
+def tree():
+    """
+        Binary tree network of 63 catchments
+    """
+    yield binary_tree_network(63)
+
+
+def gauge(network, nexus):
+    return NWISLocation('gauge-{}'.format(nexus), network.nexus_ids[nexus])
+
+
+def walk_to_gauge(network, catchment, gauged):
+    """
+        Find the controlling gauge nexus of a catchment by walking downstream
+    """
+    nexus = network.catchment_outflow[catchment]
+    while nexus >= 0 and nexus not in gauged:
+        receiving = network.receiving_catchments(nexus)
+        nexus = network.catchment_outflow[receiving[0]] if receiving.size > 0 else -1
+    return nexus
+
+
+def test_gauge_coverage(tree):
+    """
+        Test each catchment's controlling gauge against walking downstream, along with the gauge basins
+    """
+    gauged = [tree.nexus_index(n) for n in ('nex-outlet', 'nex-1', 'nex-5', 'nex-11')]
+    coverage = tree.gauge_coverage([gauge(tree, n) for n in gauged])
+    assert list(coverage.station_ids) == ['gauge-{}'.format(n) for n in gauged]
+    for c in range(tree.num_catchments):
+        assert coverage.gauge_nexuses[coverage.catchment_gauge[c]] == walk_to_gauge(tree, c, gauged)
+    offsets, indices = coverage.basins()
+    assert sorted(indices) == list(range(tree.num_catchments))
+    for g in range(coverage.num_gauges):
+        assert all(coverage.catchment_gauge[coverage.basin_catchments(g)] == g)
+    assert list(coverage.downstream_gauge) == [-1, 0, 0, 2]
+    assert coverage.incremental_totals(np.ones(tree.num_catchments)).sum() == tree.num_catchments
+
+
+def test_add_gauges(tree):
+    """
+        Test that adding gauges gives the same labels as covering with all of them at once
+    """
+    first = [tree.nexus_index(n) for n in ('nex-outlet', 'nex-5')]
+    added = [tree.nexus_index(n) for n in ('nex-2', 'nex-1', 'nex-25', 'nex-12')]
+    coverage = tree.gauge_coverage([gauge(tree, n) for n in first])
+    coverage.add_gauges([gauge(tree, n) for n in added])
+    expected = tree.gauge_coverage([gauge(tree, n) for n in first + added])
+    assert np.array_equal(coverage.catchment_gauge, expected.catchment_gauge)
+    assert np.array_equal(coverage.basins()[1], expected.basins()[1])
+    with pytest.raises(ValueError):
+        coverage.add_gauges([gauge(tree, first[1])])
+
+
+def test_ungauged_catchments(small_topology):
+    """
+        Test gauges found from retained nexus objects, leaving catchments without a gauge downstream unlabelled
+    """
+    catchments, _ = build_catchments(small_topology, locations={'nex-1': NWISLocation('01', 'nex-1')})
+    network = Network.from_catchments(catchments)
+    coverage = network.gauge_coverage()
+    assert list(coverage.station_ids) == ['01']
+    labelled = network.catchment_ids[coverage.catchment_gauge == 0]
+    assert sorted(labelled) == ['cat-1', 'cat-2']
+    assert list(coverage.incremental_totals(np.arange(5.0))) == \
+        [float(sum(network.catchment_indices(['cat-1', 'cat-2'])))]
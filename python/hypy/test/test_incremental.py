@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from hypy import simulate
+from hypy.network import IncrementalSimulation
+from hypy.test.helpers import ScalingFormulation, binary_tree_network
+
+"""
+    Test suite for incremental re-simulation
+"""
+
+
+@pytest.fixture
+def network():
+    """
+        Binary tree network with a scaling formulation for every catchment
+    """
+    yield binary_tree_network(31, scale=0.5)
+
+
+@pytest.fixture
+def forcing(network):
+    """
+        Random forcing for the network
+    """
+    yield np.random.default_rng(7).random((9, network.num_catchments))
+
+
+def test_run_matches_simulation(network, forcing):
+    """
+        Test a full run gives the same flows as a simulation
+    """
+    assert np.allclose(IncrementalSimulation(network, forcing).run(), simulate(network, forcing))
+
+
+def test_rerun_after_parameter_edit(network, forcing):
+    """
+        Test only the edited catchment and those downstream of it are re-simulated, with correct results
+    """
+    incremental = IncrementalSimulation(network, forcing)
+    incremental.run()
+    incremental.set_param_values('cat-9', {'scale': 0.9})
+    flows = incremental.rerun()
+    assert list(network.catchment_ids[incremental.last_region]) == ['cat-0', 'cat-1', 'cat-4', 'cat-9']
+    assert np.allclose(flows, simulate(network, forcing))
+    incremental.set_param_values('cat-9', {'scale': 0.9})
+    incremental.rerun()
+    assert incremental.last_region.size == 0
+
+
+def test_rerun_after_new_formulation_and_mark(network, forcing):
+    """
+        Test assigning a new formulation object, and marking a catchment, are both re-simulated
+    """
+    incremental = IncrementalSimulation(network, forcing)
+    incremental.run()
+    incremental.set_formulation('cat-20', ScalingFormulation('form-new', 0.1))
+    forcing[:, network.catchment_index('cat-5')] += 1.0
+    incremental.mark_changed(['cat-5'])
+    assert list(network.catchment_ids[incremental.changed_catchments()]) == ['cat-5', 'cat-20']
+    assert np.allclose(incremental.rerun(), simulate(network, forcing))
+
+
+def test_rerun_after_topology_edit(network, forcing):
+    """
+        Test moving a catchment's outflow re-simulates both its old and new downstream paths
+    """
+    incremental = IncrementalSimulation(network, forcing)
+    incremental.run()
+    network.set_outflow('cat-30', 'nex-outlet')
+    flows = incremental.rerun()
+    assert {'cat-14', 'cat-30'} <= set(network.catchment_ids[incremental.last_region])
+    assert np.allclose(flows, simulate(network, forcing))
+
+
+def test_rerun_ignores_direct_edit_until_marked(network, forcing):
+    """
+        Test a formulation edited directly is only re-simulated once marked as changed
+    """
+    incremental = IncrementalSimulation(network, forcing)
+    incremental.run()
+    network.catchment('cat-9').formulation.scale = 0.9
+    incremental.rerun()
+    assert incremental.last_region.size == 0
+    incremental.mark_changed(['cat-9'])
+    flows = incremental.rerun()
+    assert list(network.catchment_ids[incremental.last_region]) == ['cat-0', 'cat-1', 'cat-4', 'cat-9']
+    assert np.allclose(flows, simulate(network, forcing))
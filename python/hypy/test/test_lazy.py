@@ -0,0 +1,99 @@
+import gc
+import pickle
+import pandas as pd
+import pytest
+
+from hypy import HydroLocation, HydroLocationType, Network, Nexus
+from hypy.network import LazyNetwork, SharedNetwork
+from hypy.test.helpers import build_catchments
+
+"""
+    Test suite for lazily materialized catchment and nexus objects
+"""
+
+
+@pytest.fixture
+def tables(small_topology):
+    """
+        Exported tables of a network with a located nexus and realizations
+    """
+    location = HydroLocation('nex-2', (1.0, 2.0), HydroLocationType.confluence)
+    catchments, _ = build_catchments(small_topology, locations={'nex-2': location})
+    network = Network.from_catchments(catchments)
+    network.realizations.attach_table(pd.DataFrame({'realization_id': ['fp-3'], 'catchment_id': ['cat-3']}),
+                                      'flowpath')
+    yield network.to_pandas()
+
+
+def test_lazy_links(tables):
+    """
+        Test that links are followed by materializing only the objects reached
+    """
+    lazy = LazyNetwork.from_pandas(tables)
+    cat_3 = lazy.catchment('cat-3')
+    assert len(lazy) == 1
+    assert isinstance(cat_3.outflow, Nexus)
+    assert cat_3.outflow.id == 'nex-2'
+    assert sorted(c.id for c in cat_3.upper_catchments) == ['cat-1', 'cat-2']
+    assert [c.id for c in cat_3.lower_catchments] == ['cat-5']
+    assert cat_3.lower_catchments[0].inflow is cat_3.outflow
+    assert lazy.catchment('cat-1').inflow is None
+    assert len(lazy) == 6
+
+
+def test_lazy_attributes(tables):
+    """
+        Test hydrolocations and realizations built from the tables
+    """
+    lazy = LazyNetwork.from_pandas(tables, realization_kind='flowpath')
+    location = lazy.nexus('nex-2').hydro_location
+    assert (location.realized_nexus, location.geometry, location.ltype) == \
+        ('nex-2', (1.0, 2.0), HydroLocationType.confluence)
+    assert lazy.nexus('nex-1').hydro_location.geometry is None
+    assert lazy.catchment('cat-3').realization.id == 'fp-3'
+    assert lazy.catchment('cat-1').realization is None
+
+
+def test_lazy_eviction(tables):
+    """
+        Test that the cache is bounded, while objects still referenced elsewhere keep their identity
+    """
+    lazy = LazyNetwork.from_pandas(tables, max_objects=2)
+    cat_3 = lazy.catchment('cat-3')
+    cat_3.upper_catchments
+    assert len(lazy) == 2
+    assert lazy.catchment('cat-3') is cat_3
+    lazy.clear()
+    assert len(lazy) == 0
+    assert lazy.catchment(cat_3.index) is cat_3
+    lazy.catchment('cat-5').realization = 'temporary'
+    lazy.clear()
+    gc.collect()
+    assert lazy.catchment('cat-5').realization is None
+    with pytest.raises(IndexError):
+        lazy.catchment(10)
+    with pytest.raises(ValueError):
+        LazyNetwork(lazy.network, max_objects=0)
+
+
+def test_lazy_pickle(tables):
+    """
+        Test that pickled objects are materialized again from their pickled network
+    """
+    lazy = LazyNetwork.from_pandas(tables)
+    cat_3, lazy_copy = pickle.loads(pickle.dumps((lazy.catchment('cat-3'), lazy)))
+    assert cat_3 is lazy_copy.catchment('cat-3')
+    assert cat_3.outflow.id == 'nex-2'
+
+
+def test_lazy_shared_snapshot(tables, tmp_path):
+    """
+        Test materializing objects from a network published to a file
+    """
+    path = tmp_path / 'network.bin'
+    with SharedNetwork.publish(Network.from_pandas(tables), path=path):
+        attached = SharedNetwork.attach(path=path)
+        lazy = LazyNetwork(attached.network)
+        assert sorted(c.id for c in lazy.nexus('nex-2').contributing_catchments) == ['cat-3', 'cat-4']
+        del lazy
+        attached.close()
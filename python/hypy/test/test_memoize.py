@@ -0,0 +1,131 @@
+import functools
+import gc
+import numpy as np
+import pytest
+
+from hypy import ResponseCache, simulate
+from hypy.network import formulation_response, partition_network, run_partitioned
+from hypy.test.helpers import ScalingFormulation, binary_tree_network
+
+"""
+    Test suite for memoization of formulation responses
+"""
+
+
+@pytest.fixture
+def network():
+    """
+        Binary tree network with a scaling formulation for every catchment
+    """
+    yield binary_tree_network(15, scale=0.5)
+
+
+@pytest.fixture
+def forcing(network):
+    """
+        Random forcing for the network
+    """
+    yield np.random.default_rng(6).random((8, network.num_catchments))
+
+
+class OpaqueFormulation(ScalingFormulation):
+    """
+        Deterministic scaling formulation not exposing its parameter values
+    """
+
+    __slots__ = []
+
+    @property
+    def param_values(self):
+        return None
+
+
+def _calls(network):
+    return sum(network.catchment(i).formulation.calls for i in range(network.num_catchments))
+
+
+def test_rerun_skips_unchanged(network, forcing):
+    """
+        Test a rerun only recomputes sub-basins downstream of a changed parameter, with unchanged results
+    """
+    cache = ResponseCache(sub_basin_size=4)
+    response = functools.partial(formulation_response, cache=cache)
+    expected = simulate(network, forcing)
+    calls = _calls(network)
+    assert np.allclose(simulate(network, forcing, response), expected)
+    assert _calls(network) == 2 * calls
+    assert np.allclose(simulate(network, forcing, response), expected)
+    assert _calls(network) == 2 * calls
+    assert cache.hits == cache.misses > 0
+
+    network.catchment('cat-14').formulation.scale = 0.25
+    simulate(network, forcing, response)
+    recomputed = _calls(network) - 2 * calls
+    assert 0 < recomputed < calls
+
+
+def test_not_memoized(network, forcing):
+    """
+        Test formulations not declaring themselves deterministic or not exposing their parameters are always computed
+    """
+    random = network.catchment('cat-3').formulation = ScalingFormulation('form-random', 0.5, deterministic=False)
+    opaque = network.catchment('cat-4').formulation = OpaqueFormulation('form-opaque', 0.5)
+    response = functools.partial(formulation_response, cache=ResponseCache())
+    expected = simulate(network, forcing)
+    for _ in range(2):
+        assert np.allclose(simulate(network, forcing, response), expected)
+    assert random.calls == opaque.calls == 3 * forcing.shape[0]
+
+
+def test_eviction_and_persistence(network, forcing, tmp_path):
+    """
+        Test least recently used responses are evicted from memory, but read back from the database
+    """
+    cache = ResponseCache(max_entries=2, path=tmp_path / 'responses.db')
+    simulate(network, forcing, functools.partial(formulation_response, cache=cache))
+    assert len(cache) == 2
+    cache.close()
+    calls = _calls(network)
+    reopened = ResponseCache(max_entries=2, path=tmp_path / 'responses.db')
+    simulate(network, forcing, functools.partial(formulation_response, cache=reopened))
+    assert _calls(network) == calls
+    assert reopened.hits == cache.misses
+    reopened.close()
+
+
+def _read_from_database(network, catchments, inputs, step, cache):
+    """
+        Response of a worker, failing unless it read memoized responses from the database
+    """
+    outputs = cache.responses(network, catchments, inputs, step)
+    if cache.hits == 0:
+        raise RuntimeError('No responses were read from the database')
+    return outputs
+
+
+def test_partitioned_workers_read_database(network, forcing, tmp_path):
+    """
+        Test forked workers open their own connections to read persisted responses
+    """
+    cache = ResponseCache(path=tmp_path / 'responses.db', sub_basin_size=4)
+    response = functools.partial(formulation_response, cache=cache)
+    expected = simulate(network, forcing, response)
+    cache.close()
+    cache = ResponseCache(path=tmp_path / 'responses.db', sub_basin_size=4)
+    flows = run_partitioned(partition_network(network, 2), forcing, functools.partial(_read_from_database, cache=cache))
+    assert np.allclose(flows, expected)
+    assert len(cache) == 0
+    cache.close()
+
+
+def test_plans_follow_networks(forcing):
+    """
+        Test plans are kept per network, so a network built after another is collected never reuses its plans
+    """
+    cache = ResponseCache(sub_basin_size=4)
+    response = functools.partial(formulation_response, cache=cache)
+    simulate(binary_tree_network(15, scale=0.5), forcing, response)
+    gc.collect()
+    assert len(cache._plans) == 0
+    network = binary_tree_network(15, scale=0.25)
+    assert np.allclose(simulate(network, forcing, response), simulate(network, forcing))
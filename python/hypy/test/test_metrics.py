@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from hypy import metrics
+
+"""
+    Test suite for skill metrics
+"""
+
+
+def _reference(metric, s, o):
+    """
+        Straightforward single-location metric definitions
+    """
+    keep = ~(np.isnan(s) | np.isnan(o))
+    s, o = s[keep], o[keep]
+    if metric == 'nse':
+        return 1 - np.sum((s - o) ** 2) / np.sum((o - o.mean()) ** 2)
+    if metric == 'kge':
+        r = np.corrcoef(s, o)[0, 1]
+        return 1 - np.sqrt((r - 1) ** 2 + (s.std() / o.std() - 1) ** 2 + (s.mean() / o.mean() - 1) ** 2)
+    if metric == 'rmse':
+        return np.sqrt(np.mean((s - o) ** 2))
+    if metric == 'bias':
+        return s.mean() - o.mean()
+    if metric == 'pbias':
+        return 100 * (s.sum() - o.sum()) / o.sum()
+
+
+@pytest.fixture
+def flows():
+    """
+        Simulated and observed time by location arrays with gaps in the observations
+    """
+    rng = np.random.default_rng(42)
+    observed = 10 + rng.gamma(2.0, 5.0, size=(200, 6))
+    simulated = observed * rng.normal(1.0, 0.2, size=observed.shape) + 1.0
+    observed[rng.random(observed.shape) < 0.1] = np.nan
+    observed[:, 5] = np.nan
+    yield simulated, observed
+
+
+@pytest.mark.parametrize('metric', ['nse', 'kge', 'rmse', 'bias', 'pbias'])
+def test_metric(flows, metric):
+    """
+        Test each vectorized metric matches a per-location computation, with NaN for locations without observations
+    """
+    simulated, observed = flows
+    values = getattr(metrics, metric)(simulated, observed)
+    expected = [_reference(metric, simulated[:, j], observed[:, j]) for j in range(5)]
+    assert np.allclose(values[:5], expected)
+    assert np.isnan(values[5])
+
+
+def test_metric_mask(flows):
+    """
+        Test a mask excludes entries
+    """
+    simulated, observed = flows
+    mask = np.zeros(simulated.shape, dtype=bool)
+    mask[:100] = True
+    assert np.allclose(metrics.nse(simulated, observed, mask)[:5], metrics.nse(simulated[:100], observed[:100])[:5])
+
+
+@pytest.mark.parametrize('metric', ['nse', 'kge', 'rmse', 'pbias'])
+def test_rolling(flows, metric):
+    """
+        Test rolling window metrics match computing each window separately
+    """
+    simulated, observed = flows
+    window = 30
+    values = metrics.rolling(metric, simulated, observed, window)
+    assert values.shape == (simulated.shape[0] - window + 1, simulated.shape[1])
+    for end in (window - 1, 77, simulated.shape[0] - 1):
+        start = end - window + 1
+        expected = getattr(metrics, metric)(simulated[start:end + 1], observed[start:end + 1])
+        assert np.allclose(values[start], expected, equal_nan=True)
+
+
+def test_accumulator(flows):
+    """
+        Test streaming chunks gives the same results as computing over everything at once
+    """
+    simulated, observed = flows
+    accumulator = metrics.MetricAccumulator()
+    for start in range(0, simulated.shape[0], 37):
+        accumulator.update(simulated[start:start + 37], observed[start:start + 37])
+    for metric in metrics.METRICS:
+        assert np.allclose(accumulator.compute(metric), getattr(metrics, metric)(simulated, observed),
+                           equal_nan=True)
+    assert accumulator.count[5] == 0
+
+
+def test_unsupported_metric(flows):
+    """
+        Test an unknown metric name is rejected
+    """
+    with pytest.raises(ValueError):
+        metrics.rolling('r2', *flows, window=5)
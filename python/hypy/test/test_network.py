@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from hypy import Network
+from hypy.test.helpers import build_catchments, chain_network, elapsed
+
+"""
+    Test suite for Network class
+"""
+
+
+@pytest.fixture
+def network(small_topology):
+    """
+        Network object to test
+    """
+    catchments, nexuses = build_catchments(small_topology)
+    yield Network.from_catchments(catchments)
+
+
+def test_network(network):
+    """
+        Test proper construction of network
+    """
+    assert network.num_catchments == 5
+    assert network.num_nexuses == 3
+    assert network.catchment(network.catchment_index('cat-3')).id == 'cat-3'
+    assert network.nexus('nex-2').id == 'nex-2'
+    assert network.catchment_outflow[network.catchment_index('cat-5')] == network.nexus_index('nex-3')
+    assert network.catchment_inflow[network.catchment_index('cat-1')] == -1
+
+
+def test_contributing_and_receiving(network):
+    """
+        Test the derived contributing and receiving catchments of each nexus
+    """
+    nex_1 = network.nexus_index('nex-1')
+    contributing = network.catchment_ids[network.contributing_catchments(nex_1)]
+    assert sorted(contributing) == ['cat-1', 'cat-2']
+    assert list(network.catchment_ids[network.receiving_catchments(nex_1)]) == ['cat-3']
+    assert network.receiving_catchments(network.nexus_index('nex-3')).size == 0
+
+
+def test_topological_order(network):
+    """
+        Test every catchment comes after the catchments upstream of it
+    """
+    order = network.topological_order()
+    position = np.empty_like(order)
+    position[order] = np.arange(order.size)
+    upstream, downstream = network.catchment_edges()
+    assert upstream.size == 4
+    assert np.all(position[upstream] < position[downstream])
+
+
+def test_topological_order_cycle():
+    """
+        Test a cyclic network is rejected
+    """
+    network = Network.from_ids(['cat-a', 'cat-b'], ['nex-a', 'nex-b'], ['nex-b', 'nex-a'], ['nex-a', 'nex-b'])
+    with pytest.raises(ValueError):
+        network.topological_order()
+
+
+def test_subnetwork(network):
+    """
+        Test a subnetwork keeps its catchments' nexuses, including those at its boundary
+    """
+    sub = network.subnetwork(network.catchment_indices(['cat-3', 'cat-5']))
+    assert list(sub.catchment_ids) == ['cat-3', 'cat-5']
+    assert sorted(sub.nexus_ids) == ['nex-1', 'nex-2', 'nex-3']
+    assert sub.nexus_ids[sub.catchment_inflow[0]] == 'nex-1'
+    assert sub.nexus_ids[sub.catchment_outflow[1]] == 'nex-3'
+    assert sub.catchment('cat-5') is network.catchment('cat-5')
+
+
+def test_stream_order(network):
+    """
+        Test Strahler order, Shreve magnitude and hydrologic sequence of the small network
+    """
+    order = dict(zip(network.catchment_ids, network.strahler_order))
+    magnitude = dict(zip(network.catchment_ids, network.shreve_magnitude))
+    assert order == {'cat-1': 1, 'cat-2': 1, 'cat-3': 2, 'cat-4': 1, 'cat-5': 2}
+    assert magnitude == {'cat-1': 1, 'cat-2': 1, 'cat-3': 2, 'cat-4': 1, 'cat-5': 3}
+    sequence = network.hydrologic_sequence
+    upstream, downstream = network.catchment_edges()
+    assert np.all(sequence[upstream] < sequence[downstream])
+
+
+def test_mainstem(network):
+    """
+        Test the mainstem follows the larger tributary at each confluence
+    """
+    path = network.catchment_ids[network.mainstem_path('cat-5')]
+    assert list(path) == ['cat-1', 'cat-3', 'cat-5']
+    assert network.catchment_ids[network.mainstem[network.catchment_index('cat-4')]] == 'cat-4'
+    assert list(network.catchment_ids[network.is_mainstem]) == ['cat-1', 'cat-3', 'cat-5']
+
+
+def test_ordering_scales_linearly():
+    """
+        Test topological levels, stream orders and mainstems take time linear in the size of a network, rather than in
+        its size times its depth, by adding many unlinked catchments to a deep chain
+    """
+    def prepare(width):
+        network = chain_network(2000, width)
+        return lambda: (network.strahler_order, network.shreve_magnitude, network.mainstem)
+
+    network = chain_network(5, 2)
+    assert list(network.strahler_order) == [1] * 7
+    assert list(network.mainstem) == [4, 4, 4, 4, 4, 5, 6]
+    assert elapsed(lambda: prepare(200000)) < 3 * elapsed(lambda: prepare(0))
+
+
+def test_cache_invalidation(network):
+    """
+        Test derived attributes are recomputed after the topology changes
+    """
+    version = network.topology_version
+    assert network.shreve_magnitude[network.catchment_index('cat-5')] == 3
+    network.set_outflow('cat-4', None)
+    assert network.topology_version > version
+    assert network.shreve_magnitude[network.catchment_index('cat-5')] == 2
+    network.refresh()
+    assert network.shreve_magnitude[network.catchment_index('cat-5')] == 3
+
+
+def test_downstream_closure(network):
+    """
+        Test the downstream closure follows outflows through to the outlet
+    """
+    closure = network.downstream_closure(network.catchment_indices(['cat-1', 'cat-4']))
+    assert list(network.catchment_ids[closure]) == ['cat-1', 'cat-3', 'cat-4', 'cat-5']
@@ -53,3 +53,10 @@ def test_nexus(nexus):
     assert nexus.receiving_catchments[0].id == 'cat-hymod-receive0'
 
     assert nexus.contributing_catchments[1].id == 'cat-hymod-contribute1'
+
+def test_nexus_invalid_collection():
+    """
+        Test an invalid catchment collection is rejected with a type error
+    """
+    with pytest.raises(TypeError):
+        Nexus('nex-test', HydroLocation('nex-test'), receiving_catchments={'cat-1'})
@@ -1,9 +1,14 @@
 import pytest
+import asyncio
 import json
+import threading
+import time
+from aiohttp import web
 import pandas as pd
 import datetime as dt
 from pathlib import Path
 from hypy import NWISLocation, HydroLocationType
+from hypy.hydrolocation import gather_data, iter_data, nwis_location
 
 """
     Test suite for NWISLocation
@@ -71,3 +76,144 @@ def test_nwislocation(location):
     assert location.geometry == (0,0)
 
     assert location.ltype == HydroLocationType.hydrometricStation
+
+def _iv_payload(station_id):
+    """
+        Minimal NWIS instantaneous values response with one observation for a station, or none for the 'empty' station
+    """
+    if station_id == 'empty':
+        return {'value': {'timeSeries': []}}
+    return {'value': {'timeSeries': [{
+        'sourceInfo': {'siteCode': [{'value': station_id}]},
+        'variable': {'variableName': 'Streamflow, ft&#179;/s', 'unit': {'unitCode': 'ft3/s'}},
+        'values': [{'value': [{'value': station_id, 'qualifiers': ['P'], 'dateTime': '2020-01-01T00:00:00.000-05:00'}]}]
+    }]}}
+
+@pytest.fixture
+def offline_nwis(monkeypatch):
+    """
+        NWIS locations whose requests are served by a slow local stub service that tracks concurrency
+    """
+    state = {'active': 0, 'peak': 0, 'requests': 0}
+
+    async def handle(request):
+        state['requests'] += 1
+        state['active'] += 1
+        state['peak'] = max(state['peak'], state['active'])
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            state['active'] -= 1
+        return web.json_response(_iv_payload(request.query['sites']))
+
+    app = web.Application()
+    app.router.add_get('/nwis/iv/', handle)
+    runner = web.AppRunner(app)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    loop.run_until_complete(site.start())
+    port = runner.addresses[0][1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(nwis_location, '_IV_URL', 'http://127.0.0.1:{}/nwis/iv/'.format(port))
+    locations = [NWISLocation(str(i), 'nex-{}'.format(i)) for i in range(10)]
+    yield locations, state
+    asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+def test_get_data_async(offline_nwis):
+    """
+        Test async retrieval for a single location
+    """
+    locations, _ = offline_nwis
+    data = asyncio.run(locations[3].get_data_async(start='2020-01-01'))
+    assert data['value'][0] == 3.0
+    assert data['usgs_site_code'][0] == '3'
+    assert data['value_time'][0] == pd.Timestamp('2020-01-01 05:00')
+
+def test_get_data_offline(offline_nwis):
+    """
+        Test blocking and async retrieval validate, request and parse alike, including empty responses
+    """
+    locations, state = offline_nwis
+    pd.testing.assert_frame_equal(locations[3].get_data(start='2020-01-01'),
+                                  asyncio.run(locations[3].get_data_async(start='2020-01-01')))
+    empty = NWISLocation('empty', 'nex-empty')
+    data = empty.get_data()
+    assert data.empty
+    assert list(data.columns) == ['value_time', 'variable_name', 'usgs_site_code', 'measurement_unit', 'value',
+                                  'qualifiers', 'series']
+    assert str(data['value'].dtype) == 'float32'
+    pd.testing.assert_frame_equal(data, asyncio.run(empty.get_data_async()))
+    requests = state['requests']
+    with pytest.raises(ValueError):
+        locations[3].get_data(end='2020-01-01')
+    with pytest.raises(ValueError):
+        asyncio.run(locations[3].get_data_async(end='2020-01-01'))
+    assert state['requests'] == requests
+
+def test_gather_data(offline_nwis):
+    """
+        Test bulk async retrieval keeps input order and bounds concurrency
+    """
+    locations, state = offline_nwis
+    data = asyncio.run(gather_data(locations, max_concurrency=3))
+    assert [d['value'][0] for d in data] == [float(i) for i in range(10)]
+    assert state['peak'] <= 3
+
+def test_iter_data(offline_nwis):
+    """
+        Test streaming async retrieval yields every location and bounds concurrency
+    """
+    locations, state = offline_nwis
+
+    async def collect():
+        return {location.station_id: data async for location, data in iter_data(locations, max_concurrency=2)}
+
+    data = asyncio.run(collect())
+    assert sorted(data) == sorted(location.station_id for location in locations)
+    assert state['peak'] <= 2
+
+def test_iter_data_early_exit(offline_nwis):
+    """
+        Test closing the stream early stops further requests from being started
+    """
+    locations, state = offline_nwis
+    started = []
+
+    async def first():
+        stream = iter_data(locations, max_concurrency=2)
+        async for location, data in stream:
+            started.append(location)
+            break
+        await stream.aclose()
+        return state['requests']
+
+    requests = asyncio.run(first())
+    time.sleep(0.1)
+    assert len(started) == 1
+    assert state['peak'] <= 2
+    assert requests <= 2
+    assert state['requests'] == requests
+
+def test_gather_data_cancel(offline_nwis):
+    """
+        Test cancelling bulk retrieval cancels requests in flight and starts no others
+    """
+    locations, state = offline_nwis
+
+    async def cancel():
+        task = asyncio.ensure_future(gather_data(locations, max_concurrency=2))
+        while state['requests'] == 0:
+            await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel())
+    time.sleep(0.1)
+    assert state['requests'] <= 2
+    assert state['active'] == 0
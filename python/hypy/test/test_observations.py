@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hypy import NWISLocation, Network
+from hypy.network import align_observations
+
+"""
+    Test suite for aligning gauge observations to network nexuses
+"""
+
+
+@pytest.fixture
+def network():
+    """
+        Network with three nexuses
+    """
+    yield Network.from_ids(['cat-1', 'cat-2'], ['nex-1', 'nex-2', 'nex-3'], [None, 'nex-1'], ['nex-1', 'nex-2'])
+
+
+@pytest.fixture
+def locations():
+    """
+        Gauges at two of the network's nexuses
+    """
+    yield [NWISLocation('01', 'nex-2'), NWISLocation('02', 'nex-1')]
+
+
+def _frame(times, values, unit):
+    return pd.DataFrame({'value_time': pd.to_datetime(times), 'value': values, 'measurement_unit': unit})
+
+
+def test_align_observations(network, locations):
+    """
+        Test observations are binned, averaged and converted onto the time axis
+    """
+    time = pd.date_range('2020-01-01 00:00', periods=3, freq='h')
+    data = [_frame(['2020-01-01 00:00', '2020-01-01 00:30', '2020-01-01 02:15'], [1.0, 3.0, 5.0], 'm3/s'),
+            _frame(['2020-01-01 01:00', '2020-01-01 04:00'], [100.0, 7.0], 'ft3/s')]
+    aligned = align_observations(network, locations, time, data=data)
+    assert aligned.values.shape == (3, 2)
+    assert list(aligned.nexus_indices) == [network.nexus_index('nex-2'), network.nexus_index('nex-1')]
+    assert aligned.values[0, 0] == pytest.approx(2.0)
+    assert aligned.values[2, 0] == pytest.approx(5.0)
+    assert aligned.values[1, 1] == pytest.approx(2.8316846592)
+    assert np.array_equal(aligned.mask, [[True, False], [False, True], [True, False]])
+    assert np.isnan(aligned.values[~aligned.mask]).all()
+
+
+def test_align_observations_nodata(network, locations):
+    """
+        Test missing-value markers are masked out
+    """
+    time = pd.date_range('2020-01-01', periods=2, freq='h')
+    data = [_frame(['2020-01-01 00:00'], [-999999.0], 'm3/s'), _frame([], [], 'm3/s')]
+    aligned = align_observations(network, locations, time, data=data)
+    assert not aligned.mask.any()
+
+
+def test_align_observations_units(network, locations):
+    """
+        Test unknown units are rejected rather than silently misconverted
+    """
+    time = pd.date_range('2020-01-01', periods=2, freq='h')
+    data = [_frame(['2020-01-01 00:00'], [1.0], 'furlongs'), _frame([], [], 'm3/s')]
+    with pytest.raises(ValueError):
+        align_observations(network, locations, time, data=data)
@@ -0,0 +1,105 @@
+import os
+import signal
+import numpy as np
+import pytest
+
+from hypy import partition_network, run_partitioned
+from hypy.network import formulation_response
+from hypy.test.helpers import binary_tree_network
+
+"""
+    Test suite for network partitioning
+"""
+
+
+def _run_serial(network, forcing):
+    """
+        Reference single-process run using the same timestep semantics as run_partitioned
+    """
+    offsets, _ = network.receiving
+    receiver_counts = np.maximum(np.diff(offsets), 1)
+    has_inflow = network.catchment_inflow >= 0
+    has_outflow = network.catchment_outflow >= 0
+    catchments = np.arange(network.num_catchments)
+    nexus_flow = np.zeros(network.num_nexuses)
+    flows = np.empty((forcing.shape[0], network.num_nexuses))
+    for step in range(forcing.shape[0]):
+        inputs = forcing[step].astype(float)
+        inputs[has_inflow] += (nexus_flow / receiver_counts)[network.catchment_inflow[has_inflow]]
+        outputs = formulation_response(network, catchments, inputs, step)
+        nexus_flow = np.bincount(network.catchment_outflow[has_outflow], weights=outputs[has_outflow],
+                                 minlength=network.num_nexuses)
+        flows[step] = nexus_flow
+    return flows
+
+
+@pytest.fixture
+def network():
+    """
+        Binary tree network to partition
+    """
+    yield binary_tree_network(63)
+
+
+def test_partition_balance(network):
+    """
+        Test partitions cover the network with roughly balanced sizes
+    """
+    partitioning = partition_network(network, 4)
+    assert partitioning.num_partitions == 4
+    assert partitioning.weights().sum() == network.num_catchments
+    assert partitioning.weights().max() <= 2 * network.num_catchments / 4
+    members = np.sort(np.concatenate([partitioning.members(p) for p in range(4)]))
+    assert np.array_equal(members, np.arange(network.num_catchments))
+
+
+def test_partition_cuts(network):
+    """
+        Test each partition is a sub-basin, so only the outlets of closed partitions are cut
+    """
+    partitioning = partition_network(network, 4)
+    exchange = partitioning.boundary_exchange
+    assert len(exchange) == 3
+    assert set(exchange['nexus_index']) == set(partitioning.cut_nexuses)
+    assert set(exchange.columns) == {'nexus_id', 'nexus_index', 'source_partition', 'destination_partition'}
+    assert np.all(exchange['source_partition'] != exchange['destination_partition'])
+    for p in range(partitioning.num_partitions):
+        sub = partitioning.subnetwork(p)
+        assert sub.num_catchments == partitioning.members(p).size
+
+
+def test_partition_weights(network):
+    """
+        Test weighted partitioning balances the weights rather than the catchment counts
+    """
+    weights = np.ones(network.num_catchments)
+    weights[network.catchment_index('cat-1')] = 100.0
+    partitioning = partition_network(network, 2, weights=weights)
+    assert partitioning.num_partitions == 2
+    assert partitioning.labels[network.catchment_index('cat-1')] != partitioning.labels[0]
+
+
+def test_run_partitioned(network):
+    """
+        Test a multi-process partitioned run matches a single-process run
+    """
+    forcing = np.random.default_rng(0).random((12, network.num_catchments))
+    partitioning = partition_network(network, 3)
+    flows = run_partitioned(partitioning, forcing, timeout=60)
+    assert np.allclose(flows, _run_serial(network, forcing))
+
+
+def _killed_response(network, catchments, inputs, step):
+    """
+        Response killing its worker process, as the OOM killer would
+    """
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def test_run_partitioned_worker_killed(network):
+    """
+        Test that a worker process dying without reporting is detected rather than waited on forever
+    """
+    forcing = np.zeros((2, network.num_catchments))
+    with pytest.raises(RuntimeError, match='without reporting'):
+        run_partitioned(partition_network(network, 2), forcing, response=_killed_response)
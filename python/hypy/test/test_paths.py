@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from hypy import HydroLocation, Network
+from hypy.test.helpers import binary_tree_network, build_catchments, chain_network, elapsed
+
+"""
+    Test suite for flow path distance and travel time queries
+"""
+
+
+@pytest.fixture
+def network(small_topology):
+    """
+        Network with flowpath lengths and celerities, in catchment order cat-1 to cat-5
+    """
+    catchments, nexuses = build_catchments(small_topology)
+    network = Network.from_catchments(catchments)
+    order = network.catchment_indices(['cat-1', 'cat-2', 'cat-3', 'cat-4', 'cat-5'])
+    length, celerity = np.zeros(5), np.zeros(5)
+    length[order] = [1.0, 2.0, 3.0, 4.0, 5.0]
+    celerity[order] = [1.0, 1.0, 3.0, 2.0, 0.5]
+    network.set_flowpath_attributes(length, celerity)
+    yield network
+
+
+def test_downstream_paths(network):
+    """
+        Test distances and travel times between connected pairs of nexuses, and that unconnected pairs are omitted
+    """
+    paths = network.downstream_paths(['nex-1', 'nex-2', 'nex-3'])
+    paths = paths.set_index(['source_nexus_id', 'target_nexus_id']).sort_index()
+    assert list(paths.index) == [('nex-1', 'nex-2'), ('nex-1', 'nex-3'), ('nex-2', 'nex-3')]
+    assert list(paths['distance']) == [3.0, 8.0, 5.0]
+    assert list(paths['travel_time']) == [1.0, 11.0, 10.0]
+
+
+def test_downstream_paths_targets(network):
+    """
+        Test separate sources and targets, given as hydrolocations, and missing travel times without celerities
+    """
+    paths = network.downstream_paths([HydroLocation('nex-2'), 'nex-3'], targets=['nex-2', HydroLocation('nex-3')])
+    assert list(zip(paths['source_nexus_id'], paths['target_nexus_id'], paths['distance'])) == [('nex-2', 'nex-3', 5.0)]
+    network.set_flowpath_attributes(network.flowpath_length)
+    assert np.isnan(network.downstream_paths(['nex-1', 'nex-3'])['travel_time']).all()
+
+
+def test_downstream_paths_requires_lengths(small_topology):
+    """
+        Test that queries fail for a network without flowpath lengths, and that attributes must be per-catchment
+    """
+    network = Network.from_catchments(build_catchments(small_topology)[0])
+    with pytest.raises(ValueError):
+        network.downstream_paths(['nex-1'])
+    with pytest.raises(ValueError):
+        network.set_flowpath_attributes(np.ones(3))
+
+
+def test_downstream_paths_binary_tree():
+    """
+        Test all pairs of a binary tree against walking down from each source
+    """
+    network = binary_tree_network(63)
+    length = np.arange(1.0, network.num_catchments + 1)
+    network.set_flowpath_attributes(length)
+    expected = {}
+    for nexus in network.nexus_ids:
+        distance = 0.0
+        current = network.nexus_index(nexus)
+        while network.receiving_catchments(current).size > 0:
+            catchment = network.receiving_catchments(current)[0]
+            if network.catchment_outflow[catchment] < 0:
+                break
+            distance += length[catchment]
+            current = network.catchment_outflow[catchment]
+            expected[(nexus, network.nexus_ids[current])] = distance
+    paths = network.downstream_paths(network.nexus_ids)
+    assert dict(zip(zip(paths['source_nexus_id'], paths['target_nexus_id']), paths['distance'])) == expected
+
+
+def test_subnetwork_keeps_flowpath_attributes(network):
+    """
+        Test that subnetworks carry the flowpath attributes of their catchments
+    """
+    sub = network.subnetwork(network.catchment_indices(['cat-3', 'cat-5']))
+    assert list(sub.flowpath_length) == [3.0, 5.0]
+    assert list(sub.downstream_paths(['nex-1', 'nex-3'])['distance']) == [8.0]
+
+
+def test_downstream_paths_scale_linearly():
+    """
+        Test building the nexus tree takes time linear in the number of nexuses, rather than in that number times the
+        depth of the network, by adding many unlinked nexuses to a deep chain
+    """
+    def prepare(width):
+        network = chain_network(2000, width)
+        network.set_flowpath_attributes(np.ones(network.num_catchments))
+        return lambda: network.downstream_paths(['nex-0'], ['nex-1999'])
+
+    assert prepare(5)()['distance'].tolist() == [1999.0]
+    assert elapsed(lambda: prepare(200000)) < 3 * elapsed(lambda: prepare(0))
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hypy import Catchment_Area, Network, Realization
+from hypy.test.helpers import build_catchments
+
+"""
+    Test suite for the network realization index
+"""
+
+
+@pytest.fixture
+def network(small_topology):
+    """
+        Network to index realizations for
+    """
+    catchments, nexuses = build_catchments(small_topology)
+    yield Network.from_catchments(catchments)
+
+
+def test_attach_objects(network):
+    """
+        Test attaching realization objects indexes them by their type in both directions
+    """
+    areas = [Catchment_Area('area-{}'.format(i), 'cat-{}'.format(i)) for i in (1, 3, 5)]
+    index = network.realizations.attach(areas, assign=True)
+    assert index.kinds == ('Catchment_Area',)
+    assert len(index) == 3
+    assert index.realization_for('cat-3', 'Catchment_Area') == 'area-3'
+    assert index.realization_for('cat-2', 'Catchment_Area') is None
+    assert index.catchment_for('area-5') == 'cat-5'
+    assert index.realization('area-1', 'Catchment_Area') is areas[0]
+    assert network.catchment('cat-1').realization is areas[0]
+
+
+def test_attach_table(network):
+    """
+        Test bulk attaching several kinds from tables and looking them up in bulk
+    """
+    index = network.realizations
+    index.attach_table(pd.DataFrame({'realization_id': ['area-2', 'area-4'], 'catchment_id': ['cat-2', 'cat-4']}),
+                       kind='Catchment_Area')
+    index.attach_table(pd.DataFrame({'fp': ['fp-5', 'fp-3'], 'cat': ['cat-5', 'cat-3']}), kind='flowpath',
+                       realization_column='fp', catchment_column='cat')
+    found = index.realizations_for(network.catchment_indices(['cat-2', 'cat-3', 'cat-4']), 'Catchment_Area')
+    assert list(found) == ['area-2', None, 'area-4']
+    assert list(network.catchment_ids[index.catchments_for(['fp-3', 'fp-5'], 'flowpath')]) == ['cat-3', 'cat-5']
+    assert index.catchment_for('fp-3', kind='flowpath') == 'cat-3'
+    assert index.realization('fp-3', 'flowpath') is None
+    assert len(index.to_frame()) == 4
+
+
+def test_attach_conflicts(network):
+    """
+        Test a catchment cannot have two realizations of the same kind, and realizations must be for known catchments
+    """
+    index = network.realizations.attach([Realization('r-1', 'cat-1')], kind='area')
+    with pytest.raises(ValueError):
+        index.attach([Realization('r-2', 'cat-1')], kind='area')
+    with pytest.raises(ValueError):
+        index.attach([Realization('r-1', 'cat-2')], kind='area')
+    with pytest.raises(KeyError):
+        index.attach([Realization('r-3', 'cat-missing')], kind='area')
+    with pytest.raises(ValueError):
+        index.attach([Realization('r-4')], kind='area')
+    assert np.array_equal(index.realizations_for(np.arange(2), 'area'), ['r-1', None])
@@ -0,0 +1,174 @@
+import copy
+import io
+import pickle
+import pytest
+
+from hypy import Catchment_Area, FormulatableCatchment, HydroLocation, HydroLocationType, Network
+from hypy.serialization import ObjectGraph, Pickler, dumps, loads
+from hypy.test.helpers import ScalingFormulation, build_catchments
+
+"""
+    Test suite for pickling, copying and flattening of linked hypy objects
+"""
+
+
+@pytest.fixture
+def mainstem():
+    """
+        Linked catchments along a mainstem far longer than the recursion limit, with their nexuses
+    """
+    size = 5000
+    catchments, _ = build_catchments({'cat-{}'.format(i): ('nex-{}'.format(i) if i > 0 else None,
+                                                           'nex-{}'.format(i + 1)) for i in range(size)})
+    for catchment in catchments:
+        catchment.realization = Catchment_Area(catchment.id.replace('cat', 'real'), catchment.id)
+    yield catchments
+
+
+def check_mainstem(catchments, size=5000):
+    """
+        Walk a restored mainstem, checking every link
+    """
+    catchment = catchments[0]
+    for i in range(size - 1):
+        assert catchment.id == 'cat-{}'.format(i)
+        assert catchment.realization.catchment_id == catchment.id
+        downstream = catchment.outflow.receiving_catchments[0]
+        assert downstream.inflow is catchment.outflow
+        assert downstream.upper_catchments == (catchment,)
+        catchment = downstream
+    assert catchment.outflow.hydro_location.realized_nexus == 'nex-{}'.format(size)
+
+
+def test_pickle_long_mainstem(mainstem):
+    """
+        Test pickling a catchment of a long mainstem, which restores its whole linked graph
+    """
+    check_mainstem([pickle.loads(pickle.dumps(mainstem[0]))])
+
+
+def test_deepcopy_long_mainstem(mainstem):
+    """
+        Test deep-copying a catchment of a long mainstem
+    """
+    copied = copy.deepcopy(mainstem[0])
+    assert copied is not mainstem[0]
+    assert copied.outflow is not mainstem[0].outflow
+    check_mainstem([copied])
+
+
+def test_pickle_shares_graph(mainstem):
+    """
+        Test that objects of one graph pickled together, by ``pickle.dumps`` or a pickler, or deep-copied together, are
+        restored into one graph
+    """
+    objects = (mainstem[10], mainstem[:3], mainstem[11].inflow)
+    buffer = io.BytesIO()
+    Pickler(buffer).dump(objects)
+    for restored in (pickle.loads(buffer.getvalue()), pickle.loads(pickle.dumps(objects)), copy.deepcopy(objects)):
+        assert restored[0].outflow is restored[2]
+        assert restored[1][0].outflow is restored[1][1].inflow
+        assert len(pickle.dumps(restored)) < 1.5 * len(pickle.dumps(restored[0]))
+
+
+def test_pickle_reflects_current_links(small_topology):
+    """
+        Test that each ``pickle.dumps`` call flattens the graph anew, so that links changed in between are saved
+    """
+    catchments, _ = build_catchments(small_topology)
+    catchment = catchments[0]
+    assert pickle.loads(pickle.dumps([catchment, catchment.outflow]))[1].id == catchment.outflow.id
+    outflow = catchment.outflow
+    object.__setattr__(catchment, '_outflow', None)
+    try:
+        restored = pickle.loads(pickle.dumps([catchment, outflow]))
+        assert restored[0].outflow is None
+    finally:
+        object.__setattr__(catchment, '_outflow', outflow)
+
+
+def test_deepcopy_network_with_realizations(small_topology):
+    """
+        Test that deep-copying a network gives its realization index and objects to the copy, not to another network
+    """
+    network = Network.from_catchments(build_catchments(small_topology)[0])
+    network.realizations.attach([Catchment_Area('area-{}'.format(i), c) for i, c in enumerate(network.catchment_ids)],
+                                kind='area')
+    copied = copy.deepcopy(network)
+    assert copied.realizations is not network.realizations
+    assert copied.realizations._network is copied
+    assert copied.realizations.catchment_for('area-0', 'area') == network.catchment_ids[0]
+    assert copied.catchment(0) is not network.catchment(0)
+    assert copied.catchment(0).outflow is copied.nexus(copied.catchment(0).outflow.id)
+    pair = copy.deepcopy([network, network.catchment(0)])
+    assert pair[1] is pair[0].catchment(0)
+
+
+def test_copy_is_shallow(mainstem):
+    """
+        Test that copying an object keeps its links to the original objects
+    """
+    copied = copy.copy(mainstem[1])
+    assert copied is not mainstem[1]
+    assert copied.outflow is mainstem[1].outflow
+    assert copy.copy(mainstem[1].outflow).receiving_catchments == mainstem[1].outflow.receiving_catchments
+
+
+def test_dumps_and_loads(mainstem):
+    """
+        Test the flattened serialization of several objects, including repeated ones
+    """
+    restored = loads(dumps([mainstem[4], mainstem[0], mainstem[4]]))
+    assert [c.id for c in restored] == ['cat-4', 'cat-0', 'cat-4']
+    assert restored[0] is restored[2]
+    check_mainstem(restored[1:])
+
+
+def test_object_graph(small_topology):
+    """
+        Test that a flattened graph holds every linked object once, and cannot hold other objects
+    """
+    catchments, nexuses = build_catchments(small_topology)
+    graph = ObjectGraph.flatten(catchments[:1])
+    assert len(graph) == len(catchments) + len(nexuses)
+    assert graph.position(catchments[0]) == 0
+    restored = graph.restore()
+    assert restored is graph.restore()
+    assert sorted(o.id for o in restored) == sorted([c.id for c in catchments] + list(nexuses))
+    with pytest.raises(TypeError):
+        ObjectGraph.flatten([HydroLocation('nex-1')])
+
+
+def test_pickle_formulation():
+    """
+        Test that a formulation and its catchment are restored linked to each other
+    """
+    formulation = ScalingFormulation('scale', 2.0)
+    catchment = FormulatableCatchment('cat-1', {}, formulation=formulation)
+    restored = pickle.loads(pickle.dumps(formulation))
+    assert restored.scale == 2.0
+    assert restored.catchment.id == 'cat-1'
+    assert restored.catchment.formulation is restored
+    assert copy.deepcopy(catchment).formulation.catchment.formulation.scale == 2.0
+
+
+def test_pickle_leaves():
+    """
+        Test pickling of hydrolocations and realizations
+    """
+    location = pickle.loads(pickle.dumps(HydroLocation('nex-1', (1.0, 2.0), HydroLocationType.confluence)))
+    assert (location.realized_nexus, location.geometry, location.ltype) == \
+        ('nex-1', (1.0, 2.0), HydroLocationType.confluence)
+    realization = pickle.loads(pickle.dumps(Catchment_Area('real-1')))
+    assert isinstance(realization, Catchment_Area)
+    assert (realization.id, realization.catchment_id) == ('real-1', None)
+
+
+def test_pickle_network(small_topology):
+    """
+        Test pickling a network retaining its objects
+    """
+    network = Network.from_catchments(build_catchments(small_topology)[0])
+    restored = pickle.loads(pickle.dumps(network))
+    assert list(restored.catchment_ids) == list(network.catchment_ids)
+    assert restored.catchment('cat-3').outflow is restored.nexus('nex-2')
@@ -0,0 +1,112 @@
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+
+from hypy import simulate
+from hypy.network import SharedNetwork
+from hypy.test.helpers import binary_tree_network
+
+"""
+    Test suite for publishing networks to shared memory
+"""
+
+
+@pytest.fixture
+def network():
+    """
+        Binary tree network to publish
+    """
+    yield binary_tree_network(31)
+
+
+def _halving(network, catchments, inputs, step):
+    """
+        Response halving every catchment's input
+    """
+    return 0.5 * inputs
+
+
+def _outlet_flow(handle, forcing):
+    """
+        Worker task simulating an attached network
+    """
+    network = handle.network
+    return simulate(network, forcing, _halving)[:, network.nexus_index('nex-outlet')] * handle.arrays['scale'][0]
+
+
+def test_publish_and_attach(network):
+    """
+        Test an attached network has the same topology and attributes, backed by read-only shared arrays
+    """
+    with SharedNetwork.publish(network, arrays={'scale': np.ones(network.num_catchments)}) as published:
+        attached = SharedNetwork.attach(name=published.name)
+        view = attached.network
+        assert list(view.catchment_ids) == list(network.catchment_ids)
+        assert view.catchment_index('cat-7') == network.catchment_index('cat-7')
+        assert view.derived_arrays.keys() == network.derived_arrays.keys()
+        assert np.array_equal(view.strahler_order, network.strahler_order)
+        assert np.array_equal(view.topological_order(), network.topological_order())
+        assert not view.catchment_outflow.flags.writeable
+        with pytest.raises(ValueError):
+            view.set_outflow('cat-3', None)
+        del view
+        attached.close()
+
+
+def test_file_backed(network, tmp_path):
+    """
+        Test publishing to and attaching from a memory-mapped file
+    """
+    published = SharedNetwork.publish(network, path=tmp_path / 'network.bin', attributes=False)
+    attached = SharedNetwork.attach(path=tmp_path / 'network.bin')
+    assert np.array_equal(attached.network.receiving[1], network.receiving[1])
+    assert list(attached.network.nexus_ids) == list(network.nexus_ids)
+    attached.close()
+    published.close()
+    published.unlink()
+    assert not (tmp_path / 'network.bin').exists()
+
+
+def test_attached_paths(network, tmp_path):
+    """
+        Test flow path distances and travel times are computed the same on an attached network
+    """
+    rng = np.random.default_rng(9)
+    network.set_flowpath_attributes(rng.uniform(1.0, 5.0, network.num_catchments),
+                                    rng.uniform(0.5, 2.0, network.num_catchments))
+    locations = ['nex-{}'.format(i) for i in range(0, 15, 2)] + ['nex-outlet']
+    expected = network.downstream_paths(locations)
+    with SharedNetwork.publish(network, path=tmp_path / 'network.bin') as published:
+        view = published.network
+        assert not view.flowpath_length.flags.writeable
+        paths = view.downstream_paths(locations)
+        assert len(paths) > 0
+        pd.testing.assert_frame_equal(paths, expected)
+        del view, paths
+
+
+def test_workers_attach(network):
+    """
+        Test worker processes attach to a pickled handle and simulate the shared network
+    """
+    forcing = np.random.default_rng(8).random((5, network.num_catchments))
+    expected = simulate(network, forcing, _halving)[:, network.nexus_index('nex-outlet')]
+    with SharedNetwork.publish(network, arrays={'scale': np.ones(1)}) as published:
+        with mp.get_context('spawn').Pool(2) as pool:
+            results = pool.starmap(_outlet_flow, [(published, forcing)] * 2)
+    for result in results:
+        assert np.allclose(result, expected)
+
+
+def test_without_shared_memory(network, tmp_path, monkeypatch):
+    """
+        Test publishing to a file works without the shared memory module, which only publishing by name requires
+    """
+    monkeypatch.setitem(sys.modules, 'multiprocessing.shared_memory', None)
+    monkeypatch.delattr(mp, 'shared_memory', raising=False)
+    with SharedNetwork.publish(network, path=tmp_path / 'network.bin') as handle:
+        assert list(handle.network.catchment_ids) == list(network.catchment_ids)
+    with pytest.raises(ImportError):
+        SharedNetwork.publish(network)
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from hypy import EnsembleSimulation, Simulation, simulate, simulate_ensemble
+from hypy.network import NexusTransfer
+from hypy.test.helpers import binary_tree_network
+
+"""
+    Test suite for the time-stepped network simulation driver
+"""
+
+
+@pytest.fixture
+def network():
+    """
+        Binary tree network to simulate
+    """
+    yield binary_tree_network(31)
+
+
+def _run_objects(network, forcing):
+    """
+        Reference run walking the contributing and receiving catchments of every nexus object
+    """
+    flow = {nexus_id: 0.0 for nexus_id in network.nexus_ids}
+    flows = np.empty((forcing.shape[0], network.num_nexuses))
+    for step in range(forcing.shape[0]):
+        outputs = {}
+        for i, catchment_id in enumerate(network.catchment_ids):
+            inflow = network.catchment(i).inflow
+            share = 0.0 if inflow is None else flow[inflow.id] / len(inflow.receiving_catchments)
+            outputs[catchment_id] = forcing[step, i] + share
+        flow = {nexus_id: sum(outputs[c.id] for c in network.nexus(nexus_id).contributing_catchments)
+                for nexus_id in network.nexus_ids}
+        flows[step] = [flow[nexus_id] for nexus_id in network.nexus_ids]
+    return flows
+
+
+def test_simulate(network):
+    """
+        Test a simulation matches walking the object graph
+    """
+    forcing = np.random.default_rng(1).random((10, network.num_catchments))
+    assert np.allclose(simulate(network, forcing), _run_objects(network, forcing))
+
+
+def test_step_and_run(network):
+    """
+        Test stepping one timestep at a time matches running a block, with results written to a supplied array
+    """
+    forcing = np.random.default_rng(2).random((6, network.num_catchments))
+    expected = simulate(network, forcing)
+    simulation = Simulation(network)
+    first = [simulation.step(forcing[t]).copy() for t in range(2)]
+    out = np.zeros((4, network.num_nexuses))
+    assert simulation.run(forcing[2:], out=out) is out
+    assert simulation.step_index == 6
+    assert np.allclose(np.vstack(first + [out]), expected)
+    with pytest.raises(ValueError):
+        simulation.run(forcing[:, :3])
+
+
+def test_transfer_shares_and_leading_axes():
+    """
+        Test a nexus feeding several catchments splits its flow, and leading axes are transferred together
+    """
+    transfer = NexusTransfer(np.array([-1, 0, 0, 1]), np.array([0, 1, 1, -1]), np.array([2, 1]))
+    outflows = np.array([[1.0, 2.0, 3.0, 4.0], [10.0, 20.0, 30.0, 40.0]])
+    assert np.allclose(transfer.gather(outflows), [[1.0, 5.0], [10.0, 50.0]])
+    assert np.allclose(transfer.scatter(np.array([4.0, 5.0])), [0.0, 2.0, 2.0, 5.0])
+
+
+@pytest.fixture
+def formulated_network():
+    """
+        Binary tree network with a scaling formulation for every catchment
+    """
+    yield binary_tree_network(15, scale=0.5)
+
+
+def test_parameter_ensemble(formulated_network):
+    """
+        Test each member of a parameter ensemble matches a separate simulation with that member's parameters
+    """
+    network = formulated_network
+    forcing = np.random.default_rng(3).random((7, network.num_catchments))
+    scales = np.random.default_rng(4).uniform(0.1, 0.9, size=(4, network.num_catchments))
+    flows = simulate_ensemble(network, forcing, 4, params={'scale': scales})
+    assert flows.shape == (7, 4, network.num_nexuses)
+    assert all(network.catchment(i).formulation.scale == 0.5 for i in range(network.num_catchments))
+    with pytest.raises(ValueError):
+        simulate_ensemble(network, forcing, 4, params={'rate': scales})
+    for member in range(4):
+        for i in range(network.num_catchments):
+            network.catchment(i).formulation.scale = scales[member, i]
+        assert np.allclose(flows[:, member], simulate(network, forcing))
+
+
+def test_forcing_ensemble(formulated_network):
+    """
+        Test an ensemble of member forcing without varied parameters, stepping per member forcing
+    """
+    network = formulated_network
+    forcing = np.random.default_rng(5).random((5, 3, network.num_catchments))
+    ensemble = EnsembleSimulation(network, 3)
+    flows = np.stack([ensemble.step(forcing[t]).copy() for t in range(5)])
+    for member in range(3):
+        assert np.allclose(flows[:, member], simulate(network, forcing[:, member]))
+    with pytest.raises(ValueError):
+        EnsembleSimulation(network, 3, params={'scale': np.ones((2, network.num_catchments))})
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hypy import HydroLocation, HydroLocationType, NWISLocation, Network
+from hypy.network import LazyNetwork
+from hypy.test.helpers import build_catchments
+
+"""
+    Test suite for tabular export and import of networks
+"""
+
+
+@pytest.fixture
+def network(small_topology):
+    """
+        Network with realizations to export
+    """
+    catchments, nexuses = build_catchments(small_topology)
+    network = Network.from_catchments(catchments)
+    network.realizations.attach_table(pd.DataFrame({'realization_id': ['fp-3', 'fp-5'],
+                                                    'catchment_id': ['cat-3', 'cat-5']}), 'flowpath')
+    yield network
+
+
+def assert_same_topology(left, right):
+    assert list(left.catchment_ids) == list(right.catchment_ids)
+    assert list(left.nexus_ids) == list(right.nexus_ids)
+    assert np.array_equal(left.catchment_inflow, right.catchment_inflow)
+    assert np.array_equal(left.catchment_outflow, right.catchment_outflow)
+
+
+def test_to_pandas(network):
+    """
+        Test the exported tables reference each other by identifier
+    """
+    tables = network.to_pandas()
+    catchments = tables['catchments'].set_index('catchment_id')
+    assert catchments.loc['cat-3', 'inflow_nexus_id'] == 'nex-1'
+    assert pd.isna(catchments.loc['cat-1', 'inflow_nexus_id'])
+    assert catchments.loc['cat-5', 'shreve_magnitude'] == 3
+    assert catchments.loc['cat-1', 'mainstem_id'] == 'cat-5'
+    edges = tables['edges']
+    assert set(zip(edges['upstream_catchment_id'], edges['downstream_catchment_id'])) == \
+        {('cat-1', 'cat-3'), ('cat-2', 'cat-3'), ('cat-3', 'cat-5'), ('cat-4', 'cat-5')}
+    assert sorted(tables['hydrolocations']['nexus_id']) == ['nex-1', 'nex-2', 'nex-3']
+    assert list(tables['nexuses']['num_contributing']) == [2, 2, 1]
+    assert list(tables['realizations']['realization_id']) == ['fp-3', 'fp-5']
+
+
+def test_from_pandas_round_trip(network):
+    """
+        Test a network rebuilt from its tables has the same topology and realizations
+    """
+    rebuilt = Network.from_pandas(network.to_pandas())
+    assert_same_topology(network, rebuilt)
+    assert rebuilt.realizations.realization_for('cat-5', 'flowpath') == 'fp-5'
+
+
+def test_round_trip_locations_and_flowpaths(small_topology):
+    """
+        Test hydrolocations, gauge stations and flowpath attributes survive export and import
+    """
+    locations = {'nex-1': NWISLocation('01', 'nex-1', (3.0, 4.0)),
+                 'nex-2': HydroLocation('nex-2', (1.0, 2.0), HydroLocationType.confluence)}
+    network = Network.from_catchments(build_catchments(small_topology, locations=locations)[0])
+    network.set_flowpath_attributes(np.arange(1.0, 6.0), np.full(5, 0.5))
+    tables = network.to_pandas()
+    assert list(tables['hydrolocations'].set_index('nexus_id')['station_id'].loc[['nex-1', 'nex-2']]) == ['01', None]
+    rebuilt = Network.from_pandas(tables)
+    assert np.array_equal(rebuilt.flowpath_length, network.flowpath_length)
+    assert np.array_equal(rebuilt.flowpath_celerity, network.flowpath_celerity)
+    lazy = LazyNetwork.from_pandas(tables)
+    gauge = lazy.nexus('nex-1').hydro_location
+    assert isinstance(gauge, NWISLocation)
+    assert (gauge.station_id, gauge.realized_nexus, gauge.geometry) == ('01', 'nex-1', (3.0, 4.0))
+    location = lazy.nexus('nex-2').hydro_location
+    assert (location.geometry, location.ltype) == ((1.0, 2.0), HydroLocationType.confluence)
+    assert lazy.nexus('nex-3').hydro_location.ltype == HydroLocationType.UNDEFINED
+
+
+def test_from_pandas_plain_columns():
+    """
+        Test building from a catchments table of plain identifier columns, deriving the nexuses
+    """
+    table = pd.DataFrame({'catchment_id': ['cat-a', 'cat-b'], 'inflow_nexus_id': [None, 'nex-a'],
+                          'outflow_nexus_id': ['nex-a', 'nex-b']})
+    network = Network.from_pandas({'catchments': table})
+    assert list(network.nexus_ids) == ['nex-a', 'nex-b']
+    assert list(network.topological_order()) == [0, 1]
+    table.loc[0, 'outflow_nexus_id'] = 'nex-unknown'
+    with pytest.raises(ValueError):
+        Network.from_pandas({'catchments': table, 'nexuses': pd.DataFrame({'nexus_id': ['nex-a', 'nex-b']})})
+
+
+def test_arrow_round_trip(network):
+    """
+        Test Arrow export dictionary-encodes references and round trips
+    """
+    pa = pytest.importorskip('pyarrow')
+    tables = network.to_arrow()
+    assert pa.types.is_dictionary(tables['catchments'].schema.field('outflow_nexus_id').type)
+    assert tables['catchments'].column('inflow_nexus_id').null_count == 3
+    assert_same_topology(network, Network.from_arrow(tables))
+    assert tables['hydrolocations'].column('station_id').null_count == 3
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from hypy import Catchment, Catchment_Area, Network, Realization
+from hypy.network import ValidationCheck, ValidationError, validate
+from hypy.network.validation import _cyclic
+from hypy.test.helpers import build_catchments, elapsed
+
+"""
+    Test suite for network validation
+"""
+
+
+@pytest.fixture
+def network_objects(small_topology):
+    """
+        Well-formed catchment and nexus objects
+    """
+    yield build_catchments(small_topology)
+
+
+def test_valid_network(network_objects):
+    """
+        Test a well-formed network passes validation
+    """
+    catchments, nexuses = network_objects
+    report = validate(catchments, nexuses.values())
+    assert report.is_valid
+    assert len(report) == 0
+    report.raise_if_invalid()
+    assert Network.from_catchments(catchments).validate().is_valid
+
+
+def test_reciprocity(network_objects):
+    """
+        Test every one-sided nexus/catchment link is reported, not only the first
+    """
+    catchments, nexuses = network_objects
+    stray = Catchment('cat-stray', {})
+    nexuses['nex-1']._receiving_catchments = (catchments[0], stray)
+    catchments[3]._outflow = nexuses['nex-3']
+    report = validate(catchments)
+    unknown = report.for_check(ValidationCheck.UNKNOWN_CATCHMENT)
+    assert list(unknown['related_id']) == ['cat-stray']
+    assert set(report.for_check(ValidationCheck.NEXUS_NOT_RECIPROCATED)['object_id']) == {'nex-1', 'nex-2'}
+    not_reciprocated = report.for_check(ValidationCheck.CATCHMENT_NOT_RECIPROCATED)
+    assert set(zip(not_reciprocated['object_id'], not_reciprocated['related_id'])) == \
+        {('cat-3', 'nex-1'), ('cat-4', 'nex-3')}
+    with pytest.raises(ValidationError) as e:
+        report.raise_if_invalid()
+    assert e.value.report is report
+
+
+def test_cycle():
+    """
+        Test catchments on a cycle are reported, but not those merely upstream of it
+    """
+    catchments, _ = build_catchments({'cat-a': ('nex-c', 'nex-a'), 'cat-b': ('nex-a', 'nex-b'),
+                                      'cat-c': ('nex-b', 'nex-c'), 'cat-d': (None, 'nex-a')})
+    report = validate(catchments)
+    assert sorted(report.for_check(ValidationCheck.CYCLE)['object_id']) == ['cat-a', 'cat-b', 'cat-c']
+
+
+def test_cycles_joined_by_chain():
+    """
+        Test catchments on an acyclic chain between two cycles are not reported
+    """
+    catchments, _ = build_catchments({'cat-a': ('nex-b', 'nex-a'), 'cat-b': ('nex-a', 'nex-b'),
+                                      'cat-x': ('nex-a', 'nex-x'), 'cat-y': ('nex-x', 'nex-c'),
+                                      'cat-c': ('nex-d', 'nex-c'), 'cat-d': ('nex-c', 'nex-d'),
+                                      'cat-e': ('nex-e', 'nex-e')})
+    report = validate(catchments)
+    assert sorted(report.for_check(ValidationCheck.CYCLE)['object_id']) == ['cat-a', 'cat-b', 'cat-c', 'cat-d', 'cat-e']
+
+
+def test_cycle_search_scales_linearly():
+    """
+        Test the cycle search takes time linear in the number of catchments, rather than in that number times the depth
+        of the network, by adding many unlinked catchments to a deep chain
+    """
+    upstream = np.arange(1999)
+    downstream = upstream + 1
+    assert not _cyclic(upstream, downstream, 202000).any()
+    assert elapsed(lambda: lambda: _cyclic(upstream, downstream, 202000)) < \
+        3 * elapsed(lambda: lambda: _cyclic(upstream, downstream, 2000))
+
+
+def test_containment_and_conjoint():
+    """
+        Test dangling and one-sided containment and conjoint relationships are reported
+    """
+    outside = Catchment('cat-outside', {})
+    parent = Catchment('cat-parent', {})
+    child = Catchment('cat-child', {}, containing_catchment=parent)
+    orphan = Catchment('cat-orphan', {}, containing_catchment=outside)
+    conjoined = Catchment('cat-conjoined', {}, conjoined_catchments=child)
+    report = validate([parent, child, orphan, conjoined])
+    dangling = report.for_check(ValidationCheck.DANGLING_CONTAINING_CATCHMENT)
+    assert list(dangling['object_id']) == ['cat-orphan']
+    assert list(report.for_check(ValidationCheck.CONTAINMENT_NOT_RECIPROCATED)['object_id']) == ['cat-child']
+    assert list(report.for_check(ValidationCheck.CONJOINT_NOT_RECIPROCATED)['object_id']) == ['cat-conjoined']
+
+
+def test_realizations(network_objects):
+    """
+        Test realizations pointing at missing or different catchments are reported
+    """
+    catchments, nexuses = network_objects
+    catchments[0].realization = Catchment_Area('real-1', 'cat-2')
+    report = validate(catchments, realizations=[Realization('real-2', 'cat-missing'), Realization('real-3')])
+    assert list(report.for_check(ValidationCheck.DANGLING_REALIZATION)['object_id']) == ['real-2']
+    mismatched = report.for_check(ValidationCheck.MISMATCHED_REALIZATION)
+    assert list(zip(mismatched['object_id'], mismatched['related_id'])) == [('cat-1', 'real-1')]
+
+
+def test_duplicate_ids(network_objects):
+    """
+        Test duplicate identifiers are reported
+    """
+    catchments, nexuses = network_objects
+    report = validate(catchments + [Catchment('cat-1', {})])
+    assert list(report.for_check(ValidationCheck.DUPLICATE_ID)['object_id']) == ['cat-1']